@@ -0,0 +1,134 @@
+"""Benchmark of loading the Contxt environment config (`ContxtEnvironment`) and token cache.
+
+Writes a synthetic `defaults.yml` with `--services` services of `--environments` environments
+each, then times repeated `ContxtEnvironment(filename)` and `StoredTokenCache()` constructions
+(the latter against a temporary home directory), reporting percentiles in milliseconds as JSON.
+Pass `--no-schema-cache` to rebuild the marshmallow schemas on every load, as before they were
+memoized, and `--no-binary-cache` to parse the YAML file on every load. Example:
+
+    python benchmarks/config_load.py --iterations 200 --output results.json
+"""
+import argparse
+import os
+import tempfile
+import time
+from statistics import mean
+from typing import Callable, Dict, List
+
+import harness
+
+from contxt.services.auth import StoredTokenCache
+from contxt.utils.config import (
+    ApiEnvironment,
+    ContxtCliEnvironmentConfig,
+    ContxtEnvironmentConfig,
+    CurrentContext,
+    CustomEnvironmentConfig,
+    config_schema,
+    write_config_class_to_file,
+)
+from contxt.utils.contxt_environment import ContxtEnvironment
+
+AUTH_PROVIDER = "contxt.auth0.com"
+
+
+def environment_config(services: int, environments: int) -> CustomEnvironmentConfig:
+    return CustomEnvironmentConfig(
+        defaults={"org": None},
+        currentContext={f"service-{s}": CurrentContext("production") for s in range(services)},
+        serviceConfigs=[
+            ContxtEnvironmentConfig(
+                service=f"service-{s}",
+                environment="production" if e == 0 else f"environment-{e}",
+                isGraph=s % 2 == 0,
+                apiEnvironment=ApiEnvironment(
+                    baseUrl=f"https://service-{s}.example.com/{e}",
+                    clientId=f"audience-{s}-{e}",
+                    authProvider=AUTH_PROVIDER,
+                ),
+            )
+            for s in range(services)
+            for e in range(environments)
+        ],
+        cliConfigs=[
+            ContxtCliEnvironmentConfig(
+                environment="production",
+                clientId="cli",
+                forAuthProvider=AUTH_PROVIDER,
+                apiEnvironment=ApiEnvironment(
+                    baseUrl="https://contxtauth.com/v1", clientId="cli-audience"
+                ),
+            )
+        ],
+    )
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+
+    def at(q: float) -> float:
+        return round(values[min(int(q * len(values)), len(values) - 1)], 4)
+
+    return {"mean": round(mean(values), 4), "p50": at(0.5), "p90": at(0.9), "max": round(values[-1], 4)}
+
+
+def time_calls(call: Callable[[], object], iterations: int, schema_cache: bool) -> Dict[str, float]:
+    durations = []
+    for _ in range(iterations):
+        if not schema_cache:
+            config_schema.cache_clear()
+        start = time.perf_counter()
+        call()
+        durations.append((time.perf_counter() - start) * 1000)
+    return percentiles(durations)
+
+
+def run(args: argparse.Namespace) -> dict:
+    ContxtEnvironment.binary_cache = args.binary_cache
+    with tempfile.TemporaryDirectory() as home:
+        os.environ["HOME"] = os.environ["USERPROFILE"] = home
+        filename = os.path.join(home, "defaults.yml")
+        write_config_class_to_file(
+            filename, environment_config(args.services, args.environments), CustomEnvironmentConfig
+        )
+        # warm up imports and caches
+        ContxtEnvironment(filename)
+        StoredTokenCache().get_token("client", "audience")
+
+        results = {
+            "contxt_environment_ms": time_calls(
+                lambda: ContxtEnvironment(filename), args.iterations, args.schema_cache
+            ),
+            "stored_token_cache_ms": time_calls(StoredTokenCache, args.iterations, args.schema_cache),
+            "config_bytes": os.path.getsize(filename),
+        }
+
+    return {
+        "results": results,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--services", type=int, default=12, help="Services in the config")
+    parser.add_argument("--environments", type=int, default=3, help="Environments per service")
+    parser.add_argument("--iterations", type=int, default=100, help="Constructions to time")
+    parser.add_argument(
+        "--no-schema-cache",
+        dest="schema_cache",
+        action="store_false",
+        help="Rebuild the marshmallow schemas on every load",
+    )
+    parser.add_argument(
+        "--no-binary-cache",
+        dest="binary_cache",
+        action="store_false",
+        help="Parse the YAML file on every load, instead of its binary cache",
+    )
+
+
+def main(argv=None):
+    harness.main(__doc__, add_arguments, run, argv)
+
+
+if __name__ == "__main__":
+    main()
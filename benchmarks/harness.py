@@ -0,0 +1,49 @@
+"""Command line shared by the benchmarks.
+
+Each benchmark adds its options to the parser and defines `run(args)`, returning its sections of
+the results (i.e. `{"results": ...}`). `main` adds the options used and the environment, and
+writes them all as JSON to `--output` or stdout.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+from typing import Callable, Dict, Optional, Sequence
+
+from contxt import __version__
+
+
+def environment() -> Dict[str, object]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "contxt_sdk": __version__,
+        "cpus": multiprocessing.cpu_count(),
+    }
+
+
+def main(
+    description: Optional[str],
+    add_arguments: Callable[[argparse.ArgumentParser], None],
+    run: Callable[[argparse.Namespace], Dict[str, object]],
+    argv: Optional[Sequence[str]] = None,
+) -> None:
+    parser = argparse.ArgumentParser(
+        description=description, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    add_arguments(parser)
+    parser.add_argument("--output", help="File to write the JSON results to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = {
+        "config": {k: v for k, v in sorted(vars(args).items()) if k != "output"},
+        "environment": environment(),
+        **run(args),
+    }
+    output = json.dumps(results, indent=2, sort_keys=True) + "\n"
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output)
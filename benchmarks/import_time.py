@@ -0,0 +1,74 @@
+"""Benchmark of the time taken to import the SDK's services, as measured by `python -X importtime`.
+
+Runs each statement `--iterations` times in a fresh interpreter, reporting the median cumulative
+milliseconds `importtime` gives for `contxt.services` and the median milliseconds taken by the
+whole statement (i.e. including a graph service and its schema, loaded on access), as JSON.
+Example:
+
+    python benchmarks/import_time.py --iterations 20 --output results.json
+"""
+import argparse
+import subprocess
+import sys
+from statistics import median
+from typing import Dict, Tuple
+
+import harness
+
+STATEMENTS = {
+    "services": "import contxt.services",
+    "iot_service": "from contxt.services import IotService",
+    # a graph service, loaded on access
+    "base_service": "from contxt.services import BaseService",
+}
+
+
+def import_times(statement: str) -> Tuple[float, Dict[str, int]]:
+    """Runs `statement` in a fresh interpreter with `-X importtime`, returning the seconds it took
+    and the cumulative import time (in us) of each module `importtime` reported"""
+    timed = f"import time\nstart = time.perf_counter()\n{statement}\nprint(time.perf_counter() - start)"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", timed], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative)
+    return float(proc.stdout), times
+
+
+def measure(statement: str) -> Dict[str, float]:
+    seconds, times = import_times(statement)
+    return {
+        # includes the contxt package, imported first
+        "contxt_services_ms": times["contxt.services"] / 1000,
+        # NOTE: importtime does not report modules loaded with importlib.import_module, as the
+        # services are on access, so this also times the statement itself
+        "statement_ms": seconds * 1000,
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    for name, statement in STATEMENTS.items():
+        runs = [measure(statement) for _ in range(args.iterations)]
+        results[name] = {key: round(median(r[key] for r in runs), 2) for key in runs[0]}
+
+    return {
+        "statements": STATEMENTS,
+        "results_ms": results,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--iterations", type=int, default=10, help="Fresh interpreters per statement")
+
+
+def main(argv=None):
+    harness.main(__doc__, add_arguments, run, argv)
+
+
+if __name__ == "__main__":
+    main()
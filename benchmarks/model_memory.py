@@ -0,0 +1,148 @@
+"""Benchmark of the memory held by high-cardinality models (i.e. `MetricValue`), slotted or not.
+
+Parses `--records` synthetic API records per model with `from_api_many`, both into the `slotted`
+model and into an equivalent plain dataclass (as the models were before), reporting the bytes
+allocated per object (via `tracemalloc`, including parsed values such as datetimes), the shallow
+size of the object itself and the milliseconds taken to parse them all, as JSON. Example:
+
+    python benchmarks/model_memory.py --records 100000 --output results.json
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Callable, Dict, List
+
+import harness
+
+from contxt.models import ApiObject
+from contxt.models.assets import AttributeValue, MetricValue
+from contxt.models.events import TriggeredEvent
+from contxt.models.iot import Field
+
+TIMESTAMP = "2021-01-01T00:00:00.000Z"
+
+
+def unslotted(cls: type) -> type:
+    """Returns a plain dataclass (with a `__dict__` per instance) equivalent to the model `cls`"""
+    namespace = {"__annotations__": {}, "__module__": cls.__module__, "_api_fields": cls._api_fields}
+    for f in fields(cls):
+        namespace["__annotations__"][f.name] = f.type
+        if f.default is not MISSING:
+            namespace[f.name] = f.default
+        elif f.default_factory is not MISSING:  # type: ignore
+            namespace[f.name] = field(default_factory=f.default_factory)  # type: ignore
+    return dataclass(type(cls.__name__, (ApiObject,), namespace))
+
+
+def metric_value(i: int) -> dict:
+    return {
+        "id": f"metric-value-{i}",
+        "asset_id": f"asset-{i % 100}",
+        "asset_metric_id": "metric",
+        "effective_start_date": TIMESTAMP,
+        "effective_end_date": TIMESTAMP,
+        "notes": "",
+        "value": i * 0.5,
+        "created_at": TIMESTAMP,
+        "updated_at": TIMESTAMP,
+    }
+
+
+def attribute_value(i: int) -> dict:
+    return {
+        "id": f"attribute-value-{i}",
+        "asset_id": f"asset-{i % 100}",
+        "asset_attribute_id": "attribute",
+        "notes": "",
+        "value": str(i),
+        "effective_date": "2021-01-01",
+        "created_at": TIMESTAMP,
+        "updated_at": TIMESTAMP,
+    }
+
+
+def field_(i: int) -> dict:
+    return {
+        "id": i,
+        "label": f"Field {i}",
+        "output_id": 7,
+        "field_descriptor": f"field_{i}",
+        "field_human_name": f"Field {i}",
+        "units": "kWh",
+        "value_type": "numeric",
+        "feed_key": "feed",
+        "created_at": TIMESTAMP,
+        "updated_at": TIMESTAMP,
+    }
+
+
+def triggered_event(i: int) -> dict:
+    return {
+        "id": f"triggered-event-{i}",
+        "event_id": "event",
+        "owner_id": "owner",
+        "is_public": True,
+        "data": "{}",
+        "trigger_start_at": TIMESTAMP,
+        "trigger_end_at": TIMESTAMP,
+        "created_at": TIMESTAMP,
+        "updated_at": TIMESTAMP,
+        "deleted_at": TIMESTAMP,
+    }
+
+
+def measure(cls: type, records: List[dict]) -> Dict[str, float]:
+    start = time.perf_counter()
+    cls.from_api_many(records)
+    elapsed = time.perf_counter() - start
+    # traced separately, since tracing slows down allocations
+    tracemalloc.start()
+    objects = cls.from_api_many(records)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    obj = objects[0]
+    shallow = sys.getsizeof(obj) + (sys.getsizeof(obj.__dict__) if hasattr(obj, "__dict__") else 0)
+    return {
+        "bytes_per_object": round(allocated / len(objects), 1),
+        "shallow_bytes_per_object": shallow,
+        "parse_ms": round(elapsed * 1000, 2),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    models: Dict[type, Callable[[int], dict]] = {
+        MetricValue: metric_value,
+        AttributeValue: attribute_value,
+        Field: field_,
+        TriggeredEvent: triggered_event,
+    }
+    for cls, record in models.items():
+        records = [record(i) for i in range(args.records)]
+        results[cls.__name__] = {
+            "dict": measure(unslotted(cls), records),
+            "slotted": measure(cls, records),
+        }
+        results[cls.__name__]["saved_bytes_per_object"] = round(
+            results[cls.__name__]["dict"]["bytes_per_object"]
+            - results[cls.__name__]["slotted"]["bytes_per_object"],
+            1,
+        )
+
+    return {
+        "results": results,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--records", type=int, default=20000, help="Records to parse per model")
+
+
+def main(argv=None):
+    harness.main(__doc__, add_arguments, run, argv)
+
+
+if __name__ == "__main__":
+    main()
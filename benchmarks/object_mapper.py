@@ -0,0 +1,168 @@
+"""Benchmark of `ObjectMapper` decoding of API responses (pages of records, and IoT batches).
+
+Times decoding synthetic responses with the compiled decoders of `ObjectMapper` (strict, lenient
+and shallow) against the previous recursive implementation (kept here as `ReferenceObjectMapper`),
+reporting the mean milliseconds per response as JSON. Example:
+
+    python benchmarks/object_mapper.py --records 1000 --output results.json
+"""
+import argparse
+import inspect
+import time
+from enum import Enum
+from typing import Any, Callable, Type, TypeVar, Union
+
+import harness
+
+from contxt.models.iot import BatchResponses
+from contxt.services.pagination import Page, TimeSeriesPage
+from contxt.utils.object_mapper import ObjectMapper
+
+T = TypeVar("T")
+_PRIMITIVES = (bool, int, float, str, type(None))
+
+
+class Null:
+    """Null marker"""
+
+
+class ReferenceObjectMapper:
+    """`ObjectMapper.tree_to_object` before decoders were compiled, as the baseline"""
+
+    @staticmethod
+    def tree_to_object(tree: object, annotation: Type[T]) -> T:
+        """Loads JSON-like structure `tree` into an instance of `annotation`"""
+
+        def failure_msg():
+            return f"Failed to parse '{annotation}' from tree: {tree}"
+
+        if tree is None or annotation == Any:
+            return tree  # type: ignore
+        # detecting generic types
+        # note: this check is hacky, don't have a better way to detect generics
+        elif type(annotation).__name__ == "_GenericAlias":
+            origin = getattr(annotation, "__origin__")
+            args = getattr(annotation, "__args__")
+            if origin is list:
+                assert isinstance(tree, list), failure_msg()
+                assert len(args) == 1
+                generic_param = args[0]
+                return [ReferenceObjectMapper.tree_to_object(item, generic_param) for item in tree]
+            elif origin is dict:
+                assert isinstance(tree, dict), failure_msg()
+                assert len(args) == 2
+                key_ann, value_ann = args
+                load = ReferenceObjectMapper.tree_to_object
+                return {load(k, key_ann): load(v, value_ann) for k, v in tree.items()}  # type: ignore
+            elif origin is Union:
+                assert any(t for t in args if isinstance(tree, t)), failure_msg()
+                return tree  # type: ignore
+        elif annotation in _PRIMITIVES:
+            try:
+                conv = annotation(tree)  # type: ignore
+                assert conv == tree
+                return conv
+            except Exception as e:
+                raise AssertionError(failure_msg(), e)
+        elif inspect.isclass(annotation):
+            if isinstance(tree, annotation):
+                return tree
+            elif issubclass(annotation, Enum):
+                # try to map by enum entry name
+                by_name = getattr(annotation, str(tree), None)
+                if by_name:
+                    return by_name
+                # try to map by enum entry value
+                assert isinstance(
+                    tree, _PRIMITIVES
+                ), "Only primitives are supported as Enum values. " + (failure_msg())
+                return annotation(tree)  # type: ignore
+            elif isinstance(tree, dict):
+                # parse as regular class
+                args = {}
+                # get signature of constructor
+                for param in inspect.signature(annotation).parameters.values():
+                    raw = tree.get(param.name, Null)
+                    if raw is Null:
+                        assert param.default is not inspect.Parameter.empty, (
+                            f"Missing value for required parameter; "
+                            f"type: {annotation}, param: {param}, tree: {tree}. {failure_msg()}"
+                        )
+                    else:
+                        args[param.name] = ReferenceObjectMapper.tree_to_object(raw, param.annotation)
+                if len(tree) > len(args):
+                    # there seem to be some extraneous keys
+                    extraneous_keys = [k for k in tree.keys() if k not in args]
+                    raise AssertionError(
+                        f"Unexpected keys were found while parsing {annotation}. "
+                        f"Extraneous keys: {extraneous_keys}, tree: {tree}"
+                    )
+
+                # instantiate the annotation class
+                return annotation(**args)  # type: ignore
+
+        raise NotImplementedError(failure_msg())
+
+
+def page(records: int) -> dict:
+    return {
+        "_metadata": {"totalRecords": records * 10, "offset": 0},
+        "records": [
+            {"id": str(i), "slug": f"record-{i}", "value": i * 0.5, "tags": ["a", "b"], "meta": {"n": i}}
+            for i in range(records)
+        ],
+    }
+
+
+def time_series_page(records: int) -> dict:
+    return {
+        "meta": {"count": records, "has_more": True, "next_page_url": "/next", "next_record_time": 0},
+        "records": [{"event_time": "2021-01-01T00:00:00Z", "value": str(i)} for i in range(records)],
+    }
+
+
+def batch(records: int) -> dict:
+    response = {"body": time_series_page(10), "headers": {"Content-Type": "json"}, "statusCode": 200}
+    return {f"request-{i}": response for i in range(records // 10)}
+
+
+def time_ms(decode: Callable[[], Any], iterations: int) -> float:
+    decode()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode()
+    return round((time.perf_counter() - start) * 1000 / iterations, 4)
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    for name, annotation, tree in [
+        ("page", Page, page(args.records)),
+        ("time_series_page", TimeSeriesPage, time_series_page(args.records)),
+        ("batch", BatchResponses, batch(args.records)),
+    ]:
+        mappers = {
+            "reference": lambda: ReferenceObjectMapper.tree_to_object(tree, annotation),
+            "compiled": lambda: ObjectMapper.tree_to_object(tree, annotation),
+            "compiled_lenient": lambda: ObjectMapper.tree_to_object(tree, annotation, strict=False),
+            "compiled_shallow": lambda: ObjectMapper.tree_to_object(tree, annotation, shallow=True),
+        }
+        results[name] = {mapper: time_ms(decode, args.iterations) for mapper, decode in mappers.items()}
+        results[name]["speedup"] = round(results[name]["reference"] / results[name]["compiled"], 2)
+
+    return {
+        "results_ms": results,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--records", type=int, default=1000, help="Records per response")
+    parser.add_argument("--iterations", type=int, default=50, help="Decodes to time per mapper")
+
+
+def main(argv=None):
+    harness.main(__doc__, add_arguments, run, argv)
+
+
+if __name__ == "__main__":
+    main()
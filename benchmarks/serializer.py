@@ -0,0 +1,160 @@
+"""Benchmark of `Serializer.to_dict` on lists of models, as exported by the CLI.
+
+Times serializing `--records` synthetic models (slotted and plain) with the compiled encoders of
+`Serializer.to_dict` against the previous recursive implementation (kept here as
+`ReferenceSerializer`), reporting the mean milliseconds per list as JSON. Example:
+
+    python benchmarks/serializer.py --records 10000 --output results.json
+"""
+import argparse
+import time
+from dataclasses import is_dataclass
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Callable, List
+
+import harness
+
+from contxt.models import Formatters
+from contxt.models.assets import MetricValue
+from contxt.models.events import Owner
+from contxt.models.iot import Field, FieldGrouping, FieldValueType
+from contxt.utils import object_vars
+from contxt.utils.serializer import Serializer
+
+NOW = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+
+class ReferenceSerializer:
+    """`Serializer.to_dict` before encoders were compiled, as the baseline"""
+
+    @staticmethod
+    def to_dict(obj: Any, cls_key: str = None, key_filter: Callable = None):
+        def default_filter(key: str) -> bool:
+            return not key.startswith("_")
+
+        key_filter = key_filter or default_filter
+
+        if hasattr(obj, "to_dict"):
+            return obj.to_dict()
+        if isinstance(obj, dict):
+            return {k: ReferenceSerializer.to_dict(v, cls_key=cls_key) for k, v in obj.items()}
+        elif isinstance(obj, datetime):
+            return Formatters.datetime(obj)
+        elif isinstance(obj, date):
+            return Formatters.date(obj)
+        elif isinstance(obj, Enum):
+            return obj.value
+        elif hasattr(obj, "_ast"):
+            return ReferenceSerializer.to_dict(obj._ast())
+        elif hasattr(obj, "__dict__") or is_dataclass(obj):
+            d = {
+                k: ReferenceSerializer.to_dict(v, cls_key)
+                for k, v in object_vars(obj).items()
+                if not callable(v) and key_filter(k)
+            }
+            if cls_key is not None and hasattr(obj, "__class__"):
+                d[cls_key] = obj.__class__.__name__
+            return d
+        elif hasattr(obj, "__iter__") and not isinstance(obj, str):
+            return [ReferenceSerializer.to_dict(v, cls_key) for v in obj]
+        else:
+            return obj
+
+
+def field(i: int) -> Field:
+    return Field(
+        id=i,
+        label=f"Field {i}",
+        field_descriptor=f"field_{i}",
+        units="kWh",
+        output_id="7",
+        value_type=FieldValueType.NUMERIC,
+        field_grouping_field={"id": i, "tags": ["a", "b"]},
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def metric_value(i: int) -> MetricValue:
+    return MetricValue(
+        asset_id=f"asset-{i}",
+        asset_metric_id="metric",
+        effective_start_date=NOW,
+        effective_end_date=NOW,
+        notes="",
+        value=str(i),
+        created_at=NOW,
+        updated_at=NOW,
+    )
+
+
+def field_grouping(i: int) -> FieldGrouping:
+    return FieldGrouping(
+        id=str(i),
+        label=f"Grouping {i}",
+        slug=f"grouping-{i}",
+        description="",
+        facility_id=1,
+        is_public=True,
+        owner_id="owner",
+        field_category_id="category",
+        created_at=NOW,
+        updated_at=NOW,
+        owner=Owner(
+            id="owner",
+            first_name="First",
+            last_name="Last",
+            email="owner@example.com",
+            is_machine_user=False,
+            created_at=NOW,
+            updated_at=NOW,
+        ),
+        fields=[field(i * 10 + j) for j in range(3)],
+    )
+
+
+def time_ms(serialize: Callable[[], Any], iterations: int) -> float:
+    serialize()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serialize()
+    return round((time.perf_counter() - start) * 1000 / iterations, 4)
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    for name, records in [
+        ("fields", [field(i) for i in range(args.records)]),
+        ("metric_values", [metric_value(i) for i in range(args.records)]),
+        ("field_groupings", [field_grouping(i) for i in range(args.records // 3)]),
+    ]:
+        objects: List[Any] = records
+        serializers = {
+            "reference": lambda: ReferenceSerializer.to_dict(objects),
+            "compiled": lambda: Serializer.to_dict(objects),
+        }
+        assert serializers["reference"]() == serializers["compiled"]()
+        results[name] = {
+            serializer: time_ms(s, args.iterations) for serializer, s in serializers.items()
+        }
+        results[name]["speedup"] = round(results[name]["reference"] / results[name]["compiled"], 2)
+
+    return {
+        "results_ms": results,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--records", type=int, default=10000, help="Models per list")
+    parser.add_argument(
+        "--iterations", type=int, default=10, help="Serializations to time per serializer"
+    )
+
+
+def main(argv=None):
+    harness.main(__doc__, add_arguments, run, argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Load benchmark of the control simulator (`ControlService` + `Simulator`).
+
+Drives a fleet of synthetic control events through a local fake of the foundry-graph GraphQL
+API (served from a separate process), and reports the scheduler's loop lag, transition lag
+percentiles, request rate and CPU time per component as JSON. Runs are reproducible for a
+given `--seed`, up to timing noise.
+
+Requires the foundry-graph schema to be generated (run `contxt init`). The simulator's logs go
+to stderr, but shard processes log to stdout, so use `--output` with `--shards`. Example:
+
+    python benchmarks/simulator_load.py --components 500 --duration 60 --output results.json
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from functools import partial
+from statistics import mean
+from typing import Dict, List
+from urllib.request import urlopen
+
+import harness
+import pytz
+from sgqlc.endpoint.http import HTTPEndpoint
+
+from contxt.services.control.control import ControlService
+from contxt.utils.controlsim.fake import FakeControlApi, FakeControlService
+from contxt.utils.controlsim.models import (
+    DefinitionConfig,
+    SimulatedStateConfig,
+    SimulatedStateRunMode,
+    SimulationConfigs,
+)
+from contxt.utils.controlsim.sharded import ShardedSimulator
+from contxt.utils.controlsim.simulator import Simulator
+
+DEFINITION = "benchmark-curtailment"
+TRANSITIONS = {DEFINITION: {"pending": {"start": "active"}, "active": {"finish": "completed"}}}
+
+
+class LocalControlService(ControlService):
+    """`ControlService` for an unauthenticated local endpoint"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.endpoint = HTTPEndpoint(url)
+
+
+def simulation_config(delay: int) -> SimulationConfigs:
+    return SimulationConfigs(
+        simulationConfigs=[
+            DefinitionConfig(
+                definitionSlug=DEFINITION,
+                appliesTo="all",
+                simulatedStateConfigs={
+                    "pending": SimulatedStateConfig(
+                        controllable=True, delay=delay, workMessage=None, onSuccess="start", onFail=None
+                    ),
+                    "active": SimulatedStateConfig(
+                        controllable=True,
+                        delay=None,
+                        workMessage=None,
+                        onSuccess="finish",
+                        onFail=None,
+                        mode=SimulatedStateRunMode.runUntilEndTime,
+                    ),
+                },
+            )
+        ]
+    )
+
+
+def serve(args: argparse.Namespace, start: datetime, urls) -> None:
+    """Serves the fake API with the benchmark's fleet of events, until terminated"""
+    rng = random.Random(args.seed)
+    control = FakeControlService(TRANSITIONS, final_states=["completed"])
+    for i in range(args.components):
+        length = rng.uniform(args.event_length / 2, args.event_length)
+        control.add_event(
+            f"component-{i}", DEFINITION, "pending", start, start + timedelta(seconds=length)
+        )
+    api = FakeControlApi(control, latency=args.latency / 1000)
+    urls.put(api.start())
+    while True:
+        time.sleep(3600)
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def at(q: float) -> float:
+        return round(values[min(int(q * len(values)), len(values) - 1)], 6)
+
+    return {
+        "mean": round(mean(values), 6),
+        "p50": at(0.5),
+        "p90": at(0.9),
+        "p99": at(0.99),
+        "max": round(values[-1], 6),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    start = datetime.now(tz=pytz.UTC)
+    context = multiprocessing.get_context("spawn")
+    urls = context.Queue()
+    server = context.Process(target=serve, args=(args, start, urls), daemon=True)
+    server.start()
+    url = urls.get(timeout=60)
+
+    loop_lag: List[float] = []
+    config = simulation_config(args.delay)
+    if args.shards:
+        simulator = ShardedSimulator(
+            [DEFINITION],
+            simulation_config=config,
+            shards=args.shards,
+            control_service=LocalControlService(url),
+            control_service_factory=partial(LocalControlService, url),
+            transition_workers=args.workers,
+        )
+    else:
+        simulator = Simulator(
+            [DEFINITION],
+            simulation_config=config,
+            control_service=LocalControlService(url),
+            transition_workers=args.workers,
+        )
+        # record how late each scheduled call (fetch or transition) was picked up
+        scheduler = simulator.scheduler
+        pop_due = scheduler.pop_due
+
+        def timed_pop_due(now=None):
+            calls = pop_due(now)
+            picked_up = scheduler.clock()
+            loop_lag.extend(picked_up - call.deadline for call in calls)
+            return calls
+
+        scheduler.pop_due = timed_pop_due
+
+    wall0, cpu0 = time.monotonic(), time.process_time()
+    # keep stdout for the results
+    with redirect_stdout(sys.stderr):
+        simulator.run(until=start + timedelta(seconds=args.duration))
+    wall, cpu = time.monotonic() - wall0, time.process_time() - cpu0
+
+    with urlopen(url) as response:
+        requests = json.loads(response.read())
+    server.terminate()
+
+    metrics = simulator.transition_metrics
+    return {
+        "results": {
+            "wall_seconds": round(wall, 3),
+            "loop_lag_seconds": percentiles(loop_lag),
+            "transitions": metrics.count,
+            "transition_lag_seconds": percentiles(list(metrics.lateness)),
+            "transition_duration_seconds": percentiles(list(metrics.durations)),
+            "requests": requests,
+            "requests_per_second": round(sum(requests.values()) / wall, 3),
+            # CPU of this (the coordinator's) process only, when sharded
+            "cpu_seconds": round(cpu, 3),
+            "cpu_seconds_per_component": round(cpu / args.components, 6),
+        },
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--components", type=int, default=100, help="Number of simulated components")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run the simulation for")
+    parser.add_argument("--delay", type=int, default=5, help="Seconds before each event starts control")
+    parser.add_argument("--event-length", type=float, default=45, help="Max seconds of each event")
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Transition worker threads (0 for inline)"
+    )
+    parser.add_argument(
+        "--shards", type=int, default=0, help="Simulator processes (0 for a single simulator)"
+    )
+    parser.add_argument("--latency", type=float, default=20, help="Added latency of the fake API, in ms")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic fleet")
+
+
+def main(argv=None):
+    harness.main(__doc__, add_arguments, run, argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 try:
-    from pkg_resources import get_distribution  # implicit dependency on setuptools
+    # NOTE: importlib.metadata is much cheaper to import than pkg_resources, which
+    # otherwise dominates the import time of short-lived CLI invocations
+    from importlib.metadata import version
 
-    __version__ = get_distribution("contxt-sdk").version
+    __version__ = version("contxt-sdk")
 except Exception:
     __version__ = "unknown"
@@ -1,11 +1,14 @@
 import json
+import time
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Union
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Union
 
 from jwt import PyJWTError, algorithms, decode, get_unverified_header
 
 from ..services.api import AuthService
 from ..utils import make_logger
+from ..utils.cache import TTLCache
 
 logger = make_logger(__name__)
 
@@ -14,21 +17,116 @@ class InvalidTokenError(Exception):
     """Invalid JWT"""
 
 
+class JwksCache:
+    """Public keys of the JSON Web Key Set from `fetch_jwks`, by key id, refetched every `ttl`
+    seconds. A key id that is not in the set triggers a refetch (as keys were likely rotated), at
+    most once every `min_refetch_interval` seconds, so unknown key ids cannot flood the auth
+    provider with requests."""
+
+    def __init__(
+        self,
+        fetch_jwks: Callable[[], Dict],
+        ttl: float = 3600.0,
+        min_refetch_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.fetch_jwks = fetch_jwks
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.clock = clock
+        self.fetch_count = 0
+        self._keys: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._lock = Lock()
+
+    def __getitem__(self, kid: str) -> Any:
+        key = self.get(kid)
+        if key is None:
+            raise KeyError(kid)
+        return key
+
+    def get(self, kid: str) -> Optional[Any]:
+        with self._lock:
+            now = self.clock()
+            if (
+                self._keys is None
+                or now >= self._fetched_at + self.ttl
+                or (kid not in self._keys and now >= self._fetched_at + self.min_refetch_interval)
+            ):
+                self._refetch(now)
+            return self._keys.get(kid)  # type: ignore
+
+    def _refetch(self, now: float) -> None:
+        try:
+            jwks = self.fetch_jwks()
+        except Exception as e:
+            if self._keys is None:
+                raise
+            logger.warning(f"Failed to refetch JWKS, keeping the current keys: {e}")
+        else:
+            # parse the keys once, instead of on every validation
+            self._keys = {
+                jwk["kid"]: algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk)) for jwk in jwks["keys"]
+            }
+            self.fetch_count += 1
+        self._fetched_at = now
+
+
+# shared by the validators of the process, by the url of the auth service
+_jwks_caches: Dict[str, JwksCache] = {}
+_jwks_caches_lock = Lock()
+
+
+def get_jwks_cache(auth_service: AuthService) -> JwksCache:
+    """Gets the process-wide `JwksCache` of `auth_service`"""
+    with _jwks_caches_lock:
+        if auth_service.base_url not in _jwks_caches:
+            _jwks_caches[auth_service.base_url] = JwksCache(auth_service.get_jwks)
+        return _jwks_caches[auth_service.base_url]
+
+
 @dataclass
 class TokenValidator:
+    """Validates JWTs signed with `public_key`, or one of the keys (by key id) of a `Dict` or
+    `JwksCache`. Up to `max_validated` validated tokens are cached until they expire, so
+    repeatedly validating the same token is cheap."""
+
     audience: str
     issuer: str
-    public_key: Union[str, Dict]
+    public_key: Union[str, Dict, JwksCache]
     algorithms: List[str] = field(default_factory=lambda: ["RS256"])
+    max_validated: int = 1024
+
+    def __post_init__(self) -> None:
+        self._validated = TTLCache(max_size=self.max_validated)
+        if isinstance(self.public_key, str) and len(self.algorithms) == 1:
+            # parse the key once, instead of on every validation
+            try:
+                algorithm = algorithms.get_default_algorithms()[self.algorithms[0]]
+                self.public_key = algorithm.prepare_key(self.public_key)
+            except Exception as e:
+                logger.debug(f"Not preparing the public key for {self.algorithms[0]}: {e}")
 
-    def _get_public_key(self, token: str) -> str:
-        if isinstance(self.public_key, dict):
+    def _get_public_key(self, token: str) -> Any:
+        if isinstance(self.public_key, (dict, JwksCache)):
             header = get_unverified_header(token)
             return self.public_key[header["kid"]]
         return self.public_key
 
     def validate(self, token: str, **kwargs) -> Dict[str, Any]:
-        """Validates `token`"""
+        """Validates `token`. Validations with extra `kwargs` for `jwt.decode` are not cached."""
+        if not kwargs:
+            claims = self._validated.get(token)
+            if claims is not None:
+                return dict(claims)
+
+        claims = self._decode(token, **kwargs)
+        expiration = claims.get("exp")
+        if not kwargs and expiration is not None and self.max_validated:
+            self._validated.set(token, claims, ttl=expiration - time.time())
+        return dict(claims)
+
+    def _decode(self, token: str, **kwargs) -> Dict[str, Any]:
         try:
             return decode(
                 jwt=token,
@@ -52,9 +150,6 @@ class ContxtTokenValidator(TokenValidator):
         super().__init__(
             audience=audience,
             issuer=api.base_url,
-            public_key={
-                jwk["kid"]: algorithms.RSAAlgorithm.from_jwk(json.dumps(jwk))
-                for jwk in api.get_jwks()["keys"]
-            },
+            public_key=get_jwks_cache(api),
             algorithms=["RS256"],
         )
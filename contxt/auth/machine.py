@@ -1,11 +1,15 @@
+from typing import Optional
+
+from auth0.v3.authentication import GetToken
+
+from contxt.services.auth import StoredTokenCache
+
 from ..services.api import AuthService
 from ..utils import make_logger
 from ..utils.config import ContxtEnvironmentConfig
 from . import Auth, Token, TokenProvider
-from contxt.services.auth import StoredTokenCache
-
-import requests
-from auth0.v3.authentication import GetToken
+from .refresh import REFRESH_MANAGER, TokenRefreshManager
+from .registry import provider_key
 
 logger = make_logger(__name__)
 
@@ -14,32 +18,38 @@ class PlainMachineTokenProvider(TokenProvider):
     """Plain-ole `TokenProvider` for a machine client, where `client_id` and
         `client_secret` serve as the identity provider WITHOUT using Contxt Auth Service
     """
-    def __init__(self, contxt_env: ContxtEnvironmentConfig) -> None:
+    def __init__(self, contxt_env: ContxtEnvironmentConfig,
+                 refresh_manager: TokenRefreshManager = REFRESH_MANAGER) -> None:
         super().__init__(contxt_env.apiEnvironment.clientId)
         self.contxt_env = contxt_env
         self.token_cache = StoredTokenCache()
+        self.refresh_manager = refresh_manager
 
     @TokenProvider.access_token.getter  # type: ignore
     def access_token(self) -> Token:
         """Gets a valid access token for audience `audience`"""
-        cached_token = self.token_cache.get_token(client_id=self.contxt_env.clientId,
-                                                  audience=self.contxt_env.apiEnvironment.clientId)
-
-        if cached_token:
-            return cached_token
-
-        if self.contxt_env.apiEnvironment.authRequired:
-            print(f'Getting token for {self.contxt_env.clientId}: {self.contxt_env.clientSecret} '
-                  f'against {self.contxt_env.apiEnvironment.clientId} at auth provider: '
-                  f'{self.contxt_env.apiEnvironment.authProvider}')
-            req = GetToken(self.contxt_env.apiEnvironment.authProvider)
-            token = req.client_credentials(client_id=self.contxt_env.clientId,
-                                           client_secret=self.contxt_env.clientSecret,
-                                           audience=self.contxt_env.apiEnvironment.clientId)
-            self.token_cache.set_token(client_id=self.contxt_env.clientId,
-                                       audience=self.contxt_env.apiEnvironment.clientId,
-                                       token=token['access_token'])
-            return token['access_token']
+        if not self.contxt_env.apiEnvironment.authRequired:
+            return None
+        # keyed like its provider, so clients that differ in secret or auth provider do not share
+        return self.refresh_manager.get_token(provider_key(self.contxt_env),
+                                              fetch=self._fetch_token, stored=self._stored_token)
+
+    def _stored_token(self, newer_than: Optional[float] = None) -> Optional[Token]:
+        return self.token_cache.get_token(
+            client_id=self.contxt_env.clientId, audience=self.audience, newer_than=newer_than
+        )
+
+    def _fetch_token(self) -> Token:
+        print(f'Getting token for {self.contxt_env.clientId} against {self.audience} at auth provider: '
+              f'{self.contxt_env.apiEnvironment.authProvider}')
+        req = GetToken(self.contxt_env.apiEnvironment.authProvider)
+        token = req.client_credentials(client_id=self.contxt_env.clientId,
+                                       client_secret=self.contxt_env.clientSecret,
+                                       audience=self.audience)
+        self.token_cache.set_token(client_id=self.contxt_env.clientId,
+                                   audience=self.audience,
+                                   token=token['access_token'])
+        return token['access_token']
 
 
 class MachineTokenProvider(TokenProvider):
@@ -0,0 +1,152 @@
+"""Background refresh of access tokens"""
+
+import random
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from threading import Lock, Timer
+from typing import Callable, Dict, Hashable, Optional
+
+from ..services.auth import CachedToken
+from ..utils import make_logger
+from . import Token
+
+logger = make_logger(__name__)
+
+
+# Returns the stored token, if any, unless it expires no later than the given time
+StoredToken = Callable[[Optional[float]], Optional[Token]]
+
+
+@dataclass
+class _Entry:
+    token: Optional[CachedToken] = None
+    stored: Optional[StoredToken] = None
+    # fetch shared by all callers waiting for a token
+    in_flight: Optional[Future] = None
+    timer: Optional[Timer] = None
+    # if the token was handed out since it was last refreshed
+    used: bool = False
+
+
+class TokenRefreshManager:
+    """Keeps access tokens fresh, by key (i.e. their token provider's). Once `refresh_fraction` of
+    a token's (remaining) lifetime has passed, it is renewed in the background, so callers get a
+    valid token without waiting on the auth provider. At most one fetch per key is ever in flight,
+    which concurrent callers share. Tokens that were not used since their last refresh are left to
+    lapse, instead of being kept alive forever.
+
+    Processes sharing a token store would all refresh a token at the same point of its lifetime, so
+    refreshes are moved earlier by a random fraction (up to `refresh_jitter`) of that delay, and
+    the store is read again before fetching: a token another process stored in the meantime is
+    used instead."""
+
+    # seconds before expiry at which a token is no longer handed out
+    expiry_leeway = 10
+
+    def __init__(
+        self,
+        refresh_fraction: float = 0.75,
+        min_refresh_interval: float = 10.0,
+        refresh_jitter: float = 0.1,
+    ):
+        if not 0 < refresh_fraction < 1:
+            raise ValueError(f"The refresh fraction must be between 0 and 1, got {refresh_fraction}")
+        if not 0 <= refresh_jitter < 1:
+            raise ValueError(f"The refresh jitter must be between 0 and 1, got {refresh_jitter}")
+        self.refresh_fraction = refresh_fraction
+        self.refresh_jitter = refresh_jitter
+        self.min_refresh_interval = min_refresh_interval
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._lock = Lock()
+
+    def get_token(
+        self, key: Hashable, fetch: Callable[[], Token], stored: Optional[StoredToken] = None
+    ) -> Token:
+        """Returns a valid token for `key`. If there is none yet (or it expired), it is taken from
+        `stored`, if valid, and otherwise from `fetch`, waiting on any fetch already in flight.
+        `stored(newer_than)` must return the stored token, unless it expires by `newer_than`."""
+        entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry.token is not None
+            and not entry.token.expiring(self.expiry_leeway)
+        ):
+            entry.used = True
+            return entry.token.token
+        return self._fetch(key, fetch, stored).result()
+
+    def reset(self):
+        """Forgets all tokens, and cancels their refreshes"""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.timer:
+                    entry.timer.cancel()
+            self._entries.clear()
+
+    def _fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Token],
+        stored: Optional[StoredToken],
+        newer_than: Optional[float] = None,
+    ) -> Future:
+        with self._lock:
+            entry = self._entries.setdefault(key, _Entry())
+            entry.stored = stored or entry.stored
+            future = entry.in_flight
+            if future is not None:
+                return future
+            future = entry.in_flight = Future()
+
+        try:
+            token = entry.stored(newer_than) if entry.stored else None
+            cached = CachedToken.from_token(token) if token else None
+            if (
+                cached is None
+                or cached.expiring(self.expiry_leeway)
+                or (newer_than is not None and (cached.expires_at or 0) <= newer_than)
+            ):
+                logger.debug(f"Fetching new access_token for {key}")
+                cached = CachedToken.from_token(fetch())
+        except Exception as e:
+            with self._lock:
+                entry.in_flight = None
+            future.set_exception(e)
+            return future
+
+        with self._lock:
+            entry.token = cached
+            entry.in_flight = None
+            entry.used = False
+            if cached.expires_at is not None:
+                delay = self.refresh_fraction * (cached.expires_at - time.time())
+                delay *= 1 - random.uniform(0, self.refresh_jitter)
+                self._schedule(key, entry, fetch, max(delay, self.min_refresh_interval))
+        future.set_result(cached.token)
+        return future
+
+    def _schedule(self, key: Hashable, entry: _Entry, fetch: Callable[[], Token], delay: float):
+        if entry.timer:
+            entry.timer.cancel()
+        entry.timer = Timer(delay, self._refresh, (key, fetch))
+        entry.timer.daemon = True
+        entry.timer.start()
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Token]):
+        entry = self._entries.get(key)
+        if entry is None or not entry.used:
+            return
+        # only fetch if no other process stored a newer token than the one being refreshed
+        newer_than = entry.token.expires_at if entry.token is not None else None
+        error = self._fetch(key, fetch, None, newer_than).exception()
+        if error is not None:
+            logger.warning(f"Failed to refresh access_token for {key}: {error}")
+            with self._lock:
+                # retry while the current token is still valid
+                if entry.token is not None and not entry.token.expiring(self.expiry_leeway):
+                    self._schedule(key, entry, fetch, self.min_refresh_interval)
+
+
+# shared by the token providers of the process
+REFRESH_MANAGER = TokenRefreshManager()
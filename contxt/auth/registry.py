@@ -0,0 +1,76 @@
+"""Process-wide registry of token providers"""
+
+from hashlib import sha256
+from threading import RLock
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from ..utils.config import ContxtEnvironmentConfig
+from . import TokenProvider
+
+if TYPE_CHECKING:
+    from .cli import CliAuth
+
+# (auth provider, client id, digest of the client secret, audience, if auth is required)
+ProviderKey = Tuple[str, Optional[str], Optional[str], str, bool]
+
+
+def provider_key(env_config: ContxtEnvironmentConfig) -> ProviderKey:
+    """Key of the token provider of `env_config`, also keying its token in the refresh manager"""
+    api_env = env_config.apiEnvironment
+    # the secret is only compared, so is not kept in the key itself
+    secret = env_config.clientSecret
+    secret_digest = sha256(secret.encode("utf8")).hexdigest() if secret is not None else None
+    return (
+        api_env.authProvider,
+        env_config.clientId,
+        secret_digest,
+        api_env.clientId,
+        api_env.authRequired,
+    )
+
+
+class TokenProviderRegistry:
+    """Token providers by (auth provider, client id, client secret, audience, auth required), so
+    that the API clients of a process that authenticate as the same client to the same audience
+    share a provider, and therefore its token. CLI users (i.e. configs without a client id) also
+    share a `CliAuth` per auth provider, and with it their identity."""
+
+    def __init__(self) -> None:
+        self._providers: Dict[ProviderKey, TokenProvider] = {}
+        self._cli_auths: Dict[str, "CliAuth"] = {}
+        self._lock = RLock()
+
+    def get_token_provider(self, env_config: ContxtEnvironmentConfig) -> TokenProvider:
+        """Gets the token provider of `env_config`, creating it on first use"""
+        key = provider_key(env_config)
+        provider = self._providers.get(key)
+        if provider is None:
+            with self._lock:
+                provider = self._providers.get(key)
+                if provider is None:
+                    provider = self._providers[key] = self._create_token_provider(env_config)
+        return provider
+
+    def clear(self) -> None:
+        with self._lock:
+            self._providers.clear()
+            self._cli_auths.clear()
+
+    def _create_token_provider(self, env_config: ContxtEnvironmentConfig) -> TokenProvider:
+        if env_config.clientId is None:
+            from .cli import CliAuth
+
+            auth_provider = env_config.apiEnvironment.authProvider
+            if auth_provider not in self._cli_auths:
+                self._cli_auths[auth_provider] = CliAuth(service_config=env_config)
+            return self._cli_auths[auth_provider].get_token_provider(
+                audience=env_config.apiEnvironment.clientId
+            )
+
+        from .machine import PlainMachineTokenProvider
+
+        return PlainMachineTokenProvider(env_config)
+
+
+# shared by the configured APIs of the process
+TOKEN_PROVIDERS = TokenProviderRegistry()
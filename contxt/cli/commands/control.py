@@ -1,11 +1,12 @@
-import click
-import sys
 import json
+import sys
+
+import click
 
-from contxt.schemas.foundry_graph.foundry_graph_schema import ComponentToControlInputRecordInput
 from contxt.services.control.control import ControlService
-from contxt.utils.serializer import Serializer
+from contxt.services.control.control import schema as control_schema
 from contxt.utils.contxt_environment import ContxtEnvironment
+from contxt.utils.serializer import Serializer
 
 
 def get_control_service():
@@ -226,8 +227,9 @@ def approve(proposal_id: str):
     component_inputs = []
     for component in proposal.event_proposals_controlled_components.nodes:
         component_inputs.append(
-            ComponentToControlInputRecordInput(controllable_component_id=component.controllable_component.id,
-                                               state_definition_slug=component.state_definition)
+            control_schema.ComponentToControlInputRecordInput(
+                controllable_component_id=component.controllable_component.id,
+                state_definition_slug=component.state_definition)
         )
 
     approval = get_control_service().approve_proposal(proposal_id=proposal_id, components=component_inputs)
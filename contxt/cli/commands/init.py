@@ -1,14 +1,19 @@
 from os import path
+
 import click
 
 import contxt.schemas as schemas
-from contxt.services.base_graph_service import BaseGraphService
+from contxt.services.base_graph_service import BaseGraphService, update_schemas
 from contxt.utils.contxt_environment import ContxtEnvironment
 
 
 @click.command()
 @click.option('--fresh-from-file', type=str, help='Overwrite/init from a specific environment file')
-def init(fresh_from_file: str):
+@click.option('--parallel/--serial', default=False,
+              help='Refresh schemas of all graph services concurrently')
+@click.option('--jobs', type=int, default=None, help='Max number of concurrent workers in parallel mode')
+@click.option('--force', is_flag=True, help='Regenerate schemas even if they are unchanged')
+def init(fresh_from_file: str, parallel: bool, jobs: int, force: bool):
     """Initialize all schemas"""
     if fresh_from_file:
         print(f'Loading fresh config from file: {fresh_from_file}')
@@ -18,6 +23,13 @@ def init(fresh_from_file: str):
     print('Updating schemas')
     config = ContxtEnvironment()
     schema_dir = path.dirname(schemas.__file__)
-    for env in config.config.get_graph_environments_for_current_context():
-        base_graph = BaseGraphService(env, load_schema=False)
-        base_graph.update_schema(service_name=env.service, base_file_path=schema_dir)
+    graph_services = [
+        BaseGraphService(env, load_schema=False)
+        for env in config.config.get_graph_environments_for_current_context()
+    ]
+    if parallel:
+        update_schemas(graph_services, base_file_path=schema_dir, force=force, max_workers=jobs)
+        return
+    for base_graph in graph_services:
+        base_graph.update_schema(service_name=base_graph.service_name, base_file_path=schema_dir,
+                                 force=force)
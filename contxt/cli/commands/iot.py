@@ -1,7 +1,7 @@
 import logging
-from collections import defaultdict
 from csv import DictReader, DictWriter
 from datetime import datetime
+from importlib.util import find_spec
 from pathlib import Path
 from typing import IO, Any, Dict, List, Optional, cast
 
@@ -14,6 +14,7 @@ from contxt.models.iot import Feed, Field, FieldGrouping, FieldValueType, Window
 from contxt.utils.serializer import Serializer
 
 NEW_FIELD_ATTRS = ["field_descriptor", "label", "value_type", "units", "grouping"]
+COLUMNAR_EXTS = (".parquet", ".feather", ".arrow")
 
 
 @click.group()
@@ -118,32 +119,59 @@ def delete(clients: Clients, output_id: int, field: str, interval: Window, time:
     help="Time interval",
 )
 @click.option(
-    "--output", type=ClickPath(dir_okay=False, writable=True), default="data.csv", help="Path for output"
+    "--output",
+    type=ClickPath(dir_okay=False, writable=True),
+    default="data.csv",
+    help="Path for output (.csv, .json, .parquet, or .feather)",
+)
+@click.option(
+    "--compression",
+    help="Compression of .parquet (i.e. snappy, zstd) or .feather (i.e. lz4, zstd) output",
 )
 @click.pass_obj
 def data_get(
-    clients: Clients, feed_id: str, start: datetime, end: datetime, interval: Window, output: Path
+    clients: Clients,
+    feed_id: str,
+    start: datetime,
+    end: datetime,
+    interval: Window,
+    output: Path,
+    compression: Optional[str],
 ) -> None:
     """Get field data"""
+    # Validate output before downloading anything
+    if output.suffix not in (".csv", ".json", *COLUMNAR_EXTS):
+        raise click.BadParameter(f"Unsupported filetype: '{output.suffix}'", param_hint="--output")
+    if output.suffix in COLUMNAR_EXTS and find_spec("pyarrow") is None:
+        raise click.ClickException(
+            f"{output.suffix} output requires pyarrow, install it via `pip install contxt-sdk[arrow]`"
+        )
+
     fields = clients.iot.get_fields_for_feed(feed_id)
     print(f"Fetching iot data for {len(fields)} tags from {start} to {end}")
+    rows = clients.iot.get_time_series_rows_for_fields(
+        fields, start_time=start, end_time=end, window=interval
+    )
 
-    data: Dict[datetime, Dict[str, Any]] = defaultdict(dict)
+    # Write typed columns to columnar formats
+    options: Dict[str, Any] = {}
+    if output.suffix in COLUMNAR_EXTS:
+        options["types"] = {
+            "timestamp": datetime,
+            **{f.field_human_name: float for f in fields if f.value_type == FieldValueType.NUMERIC},
+        }
+        if compression:
+            options["compression"] = compression
+
+    # Stream to file, as the data is downloaded
+    print(f"Writing data to {output}...")
     with click.progressbar(
-        fields,
+        rows,
         label="Downloading iot data",
-        item_show_func=lambda f: f"Field {f.field_human_name}" if f else "",
-    ) as fields_:
-        for field in fields_:
-            for (t, v) in clients.iot.get_time_series_for_field(
-                field=field, start_time=start, end_time=end, window=interval
-            ):
-                data[t][field.field_human_name] = v
-
-    # Output to csv
-    print(f"Writing data to {output}...")
-    flat_data = [{"timestamp": k, **v} for k, v in data.items()]
-    Serializer.to_csv(flat_data, output)
+        item_show_func=lambda row: f"{row['timestamp']}" if row else "",
+    ) as rows_:
+        columns = ["timestamp", *sorted({f.field_human_name for f in fields})]
+        Serializer.write_file(rows_, output, fieldnames=columns, **options)
 
 
 @fields.command()
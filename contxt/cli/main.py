@@ -2,7 +2,6 @@
 
 import logging
 import sys
-
 from pathlib import Path
 from typing import Optional
 
@@ -13,7 +12,7 @@ from contxt import __version__
 from contxt.cli.clients import Clients
 from contxt.cli.log import init as init_logger
 from contxt.services.base_graph_service import SchemaMissingException
-from contxt.utils.contxt_environment import ContxtEnvironment, ContxtConfigurationError
+from contxt.utils.contxt_environment import ContxtConfigurationError, ContxtEnvironment
 
 logger = logging.getLogger()
 COMMAND_DIR = Path(__file__).parent / "commands"
@@ -42,6 +41,9 @@ class Cli(click.MultiCommand):
             return self.main(*args, **kwargs)
         except RequestException as e:
             logger.error(f"{e} (response: {e.response.content})")
+        except SchemaMissingException as e:
+            # GraphQL schemas are loaded lazily, so a missing schema surfaces when a command runs
+            logger.error(str(e))
         except Exception as e:
             logger.error(f"An unexpected error occurred: {e}")
             raise
@@ -2,21 +2,25 @@
 
 from abc import ABC, abstractmethod
 from ast import literal_eval
-from copy import deepcopy
+from dataclasses import fields
 from datetime import date as _date
 from datetime import datetime as _datetime
+from datetime import timedelta, timezone
+from functools import partial
+from importlib import import_module
 from time import time_ns
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar, Union
+
 from dateutil.parser import isoparse
 from pytz import timezone as _timezone
-from datetime import timedelta, timezone
-from importlib import import_module
-from typing import Any, Callable, Dict, Optional, Tuple, Union
 
 from ..utils import make_logger
 from ..utils.serializer import Serializer
 
 logger = make_logger(__name__)
 
+T = TypeVar("T")
+
 
 class Parsers:
     """Parsers to deserialize JSON as Python"""
@@ -79,12 +83,22 @@ class Formatters:
 
     @staticmethod
     def datetime(dt: _datetime, strict: bool = True) -> str:
-        if dt.utcoffset() != timedelta() and strict:
-            # Require timezone to be UTC
-            raise AssertionError(f"Datetime must be UTC, not {dt.tzinfo}")
+        if dt.utcoffset() != timedelta():
+            if strict:
+                # Require timezone to be UTC
+                raise AssertionError(f"Datetime must be UTC, not {dt.tzinfo}")
+            dt = dt.astimezone(timezone.utc)
         # NOTE: almost exactly the same as isoformat(), but ensures
-        # microseconds are always represented
-        return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        # microseconds are always represented (and is faster than strftime)
+        return "%04d-%02d-%02dT%02d:%02d:%02d.%06dZ" % (
+            dt.year,
+            dt.month,
+            dt.day,
+            dt.hour,
+            dt.minute,
+            dt.second,
+            dt.microsecond,
+        )
 
     @staticmethod
     def normalize_label(text: str) -> str:
@@ -132,11 +146,68 @@ class ApiField:
         return self._data_type  # type: ignore
 
 
+_missing = object()
+
+
+def _compile_api_value_parser(field: ApiField) -> Callable[[Any], Any]:
+    """Same as `ApiObject.clean_api_value`, with the type of `field` resolved once"""
+    from_api = getattr(field.data_type, "from_api", None)
+    # Type is an ApiObject, apply from_api instead of init
+    convert = from_api if callable(from_api) else field.data_type
+
+    def clean(value: Any) -> Any:
+        if value is None:
+            return value
+        elif isinstance(value, (list, tuple)):
+            return [clean(v) for v in value]
+        return convert(value)
+
+    return clean
+
+
+def _compile_api_parser(cls: type) -> Callable[[Dict, Optional[Dict[str, str]]], Any]:
+    clean_api_value = getattr(cls.clean_api_value, "__func__", None)  # type: ignore
+    if clean_api_value is ApiObject.clean_api_value.__func__:  # type: ignore
+        compile_value_parser = _compile_api_value_parser
+    else:
+        # overridden by the subclass, so called for each value instead
+        def compile_value_parser(field: ApiField) -> Callable[[Any], Any]:
+            return partial(cls.clean_api_value, field)  # type: ignore
+
+    fields = [
+        (f.api_key, f.attr_key, f.optional, f.data_type is str, compile_value_parser(f))
+        for f in cls._api_fields  # type: ignore
+    ]
+
+    def parse(api_dict: Dict, strings: Optional[Dict[str, str]]) -> Any:
+        # Create clean dictionary to pass to init
+        clean_dict = {}
+        for api_key, attr_key, optional, is_string, clean in fields:
+            value = api_dict.get(api_key, _missing)
+            if value is _missing:
+                if not optional:
+                    raise KeyError(
+                        f"Required API field '{api_key}' is missing from" f" response: {api_dict}"
+                    )
+                value = None
+            value = clean(value)
+            if strings is not None and is_string and value.__class__ is str:
+                value = strings.setdefault(value, value)
+            clean_dict[attr_key] = value
+        # NOTE: unexpected keys are ignored
+        return cls(**clean_dict)
+
+    return parse
+
+
 class ApiObject(ABC):
     """An abstract base class for a response from an API. This class serves to
     take a raw response from an API and create a parsed Python object.
     """
 
+    # NOTE: subclasses still have a __dict__, unless they are `slotted`
+    __slots__ = ()
+
     def __str__(self) -> str:
         return Serializer.to_table(self)
 
@@ -166,20 +237,29 @@ class ApiObject(ABC):
 
     @classmethod
     def from_api(cls, api_dict: Dict) -> Any:
-        api_dict = deepcopy(api_dict)
-        # Create clean dictionary to pass to init
-        clean_dict = {}
-        for field in cls._api_fields:  # type: ignore
-            if field.api_key not in api_dict and not field.optional:
-                raise KeyError(
-                    f"Required API field '{field.api_key}' is missing from" f" response: {api_dict}"
-                )
-            clean_dict[field.attr_key] = cls.clean_api_value(
-                field=field, value=api_dict.pop(field.api_key, None)
-            )
-
-        # NOTE: unexpected keys: api_dict.keys()
-        return cls(**clean_dict)  # type: ignore
+        """Parses `api_dict`. Note the object may share nested values (i.e. of `dict` fields)
+        with `api_dict`, which is not copied."""
+        return cls._api_parser()(api_dict, None)
+
+    @classmethod
+    def from_api_many(cls, api_dicts: Iterable[Dict]) -> List[Any]:
+        """Parses each of `api_dicts`, sharing equal strings across the objects (i.e. units or
+        keys repeated on every record) to save memory. Models overriding `from_api` are parsed
+        with it instead."""
+        if cls.from_api.__func__ is not ApiObject.from_api.__func__:  # type: ignore
+            return [cls.from_api(api_dict) for api_dict in api_dicts]
+        parse = cls._api_parser()
+        strings: Dict[str, str] = {}
+        return [parse(api_dict, strings) for api_dict in api_dicts]
+
+    @classmethod
+    def _api_parser(cls) -> Callable[[Dict, Optional[Dict[str, str]]], Any]:
+        # compiled on first use (so that types named by string can be resolved), per class
+        parser = cls.__dict__.get("_compiled_api_parser")
+        if parser is None:
+            parser = _compile_api_parser(cls)
+            cls._compiled_api_parser = parser  # type: ignore
+        return parser
 
     @classmethod
     def clean_api_value(cls, field: ApiField, value: Any) -> Any:
@@ -200,13 +280,39 @@ class ApiObject(ABC):
     def post(self) -> Dict[str, Any]:
         """Gets data for a POST request"""
         # Transform api fields to dict
-        d = Serializer.to_dict(self, key_filter=lambda k: k in set(self.creatable_fields.keys()))
+        d = Serializer.to_dict(self, key_filter=self.creatable_fields.__contains__)
         # Swap attr_keys for api_keys
         return {self.creatable_fields[k].api_key: v for k, v in d.items()}
 
     def put(self) -> Dict[str, Any]:
         """Gets data for a PUT request"""
         # Transform api fields to dict
-        d = Serializer.to_dict(self, key_filter=lambda k: k in set(self.updatable_fields.keys()))
+        d = Serializer.to_dict(self, key_filter=self.updatable_fields.__contains__)
         # Swap attr_keys for api_keys
         return {self.updatable_fields[k].api_key: v for k, v in d.items()}
+
+
+def slotted(cls: Type[T]) -> Type[T]:
+    """Class decorator (applied above `@dataclass`) to store the fields of the dataclass `cls` in
+    `__slots__`, instead of a `__dict__` per instance. This saves memory for models held by the
+    thousands (i.e. metric values), though their instances can no longer take other attributes.
+    """
+    names = tuple(f.name for f in fields(cls))  # type: ignore
+    cls_dict = dict(cls.__dict__)
+    for name in (*names, "__dict__", "__weakref__"):
+        # NOTE: also drops the class attributes of field defaults, which __init__ already holds
+        cls_dict.pop(name, None)
+    cls_dict["__slots__"] = names
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)  # type: ignore
+
+    # Point the zero-argument super() of methods at the new class
+    for member in cls_dict.values():
+        for func in (member, *(getattr(member, a, None) for a in ("__func__", "fget", "fset", "fdel"))):
+            for cell in getattr(func, "__closure__", None) or ():
+                try:
+                    if cell.cell_contents is cls:
+                        cell.cell_contents = slotted_cls
+                except ValueError:
+                    # empty cell
+                    pass
+    return slotted_cls
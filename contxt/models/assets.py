@@ -3,7 +3,7 @@ from datetime import date, datetime, timedelta
 from typing import Any, ClassVar, Dict, List, Optional, Set
 
 from ..utils import dict_diff, make_logger
-from . import ApiField, ApiObject, Formatters, Parsers
+from . import ApiField, ApiObject, Formatters, Parsers, slotted
 
 logger = make_logger(__name__)
 
@@ -64,6 +64,7 @@ class Attribute(ApiObject):
         return Formatters.normalize_label(self.label)
 
 
+@slotted
 @dataclass
 class AttributeValue(ApiObject):
     _api_fields: ClassVar = (
@@ -129,6 +130,7 @@ class Metric(ApiObject):
         return Formatters.normalize_label(self.label)
 
 
+@slotted
 @dataclass
 class MetricValue(ApiObject):
     _api_fields: ClassVar = (
@@ -1,7 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
-
-from typing import Optional, List, Dict, AnyStr, Any
+from typing import Any, AnyStr, Dict, List, Optional
 
 from contxt.utils.serializer import Serializer
 
@@ -35,3 +34,33 @@ class Suggestion:
 
     def __str__(self):
         return Serializer.to_pretty_cli(self)
+
+
+@dataclass
+class EventTransition:
+    control_event_id: str
+    transition_event: str
+    message: Optional[str] = None
+
+
+@dataclass
+class ComponentSavings:
+    controllable_component_id: str
+    event_proposal_id: str
+    success_metric_id: str
+    projected_savings_amount: float
+
+
+@dataclass
+class ProposalApproval:
+    proposal_id: str
+    components: List[ControllableComponent]
+
+
+@dataclass
+class NewComponent:
+    label: str
+    slug: str
+    description: str
+    facility_id: int
+    controlled_by_edge_client_id: Optional[str] = None
@@ -3,7 +3,7 @@ from datetime import datetime
 from json import loads
 from typing import ClassVar, Optional
 
-from . import ApiField, ApiObject, Parsers
+from . import ApiField, ApiObject, Parsers, slotted
 
 
 @dataclass
@@ -109,6 +109,7 @@ class Event(ApiObject):
     deleted_at: Optional[datetime] = None
 
 
+@slotted
 @dataclass
 class TriggeredEvent(ApiObject):
     _api_fields: ClassVar = (
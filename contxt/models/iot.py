@@ -6,7 +6,7 @@ from typing import Any, ClassVar, Dict, List, Optional
 
 from requests import Request
 
-from . import ApiField, ApiObject, Parsers
+from . import ApiField, ApiObject, Parsers, slotted
 from .events import Owner
 
 
@@ -57,6 +57,7 @@ class FacilityMetricField:
     alias: Optional[str] = None
 
 
+@slotted
 @dataclass
 class Field(ApiObject):
     _api_fields: ClassVar = (
@@ -166,6 +167,7 @@ class UnprovisionedField(ApiObject):
     assumed_type: str
 
 
+@slotted
 @dataclass
 class Feed(ApiObject):
     _api_fields: ClassVar = (
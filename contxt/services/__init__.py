@@ -1,5 +1,7 @@
 """API clients"""
 
+from importlib import import_module
+
 from contxt.services.base_graph_service import SchemaMissingException
 
 # flake8: noqa
@@ -13,11 +15,25 @@ from .facilities import FacilitiesService
 from .health import HealthService
 from .iot import IotDataService, IotService
 from .ngest import NgestService
-from .sis import SisService
 from .rates import UtilityRatesService
-try:
-    from .control.control import ControlService
-    from .base.base import BaseService
-    from .nionic_iot import IotNionicHelper
-except SchemaMissingException:
-    pass
+from .sis import SisService
+
+# GraphQL services are imported on first access, so that only callers that use them pay
+# for their generated schemas (and heavier dependencies, such as pandas)
+_LAZY_SERVICES = {
+    "ControlService": ".control.control",
+    "BaseService": ".base.base",
+    "IotNionicHelper": ".nionic_iot",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_SERVICES:
+        service = getattr(import_module(_LAZY_SERVICES[name], __name__), name)
+        globals()[name] = service
+        return service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_SERVICES))
@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Dict, FrozenSet, Optional, Tuple, Union, List
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
 
 from auth0.v3.authentication import GetToken
 from requests import PreparedRequest, Response, Session
@@ -9,6 +9,7 @@ from requests.exceptions import HTTPError
 from urllib3.util.retry import Retry
 
 from ..auth import TokenProvider
+from ..auth.registry import TOKEN_PROVIDERS
 from ..services.auth import StoredTokenCache
 from ..utils import make_logger
 from ..utils.config import ContxtEnvironmentConfig
@@ -148,15 +149,7 @@ class ConfiguredLegacyApi(Api, ABC):
     """
 
     def __init__(self, env_config: ContxtEnvironmentConfig, override_token_provider: TokenProvider = None, **kwargs) -> None:
-        if override_token_provider:
-            token_provider = override_token_provider
-        elif env_config.clientId is None:
-            from ..auth.cli import CliAuth
-            cli_auth = CliAuth(service_config=env_config)
-            token_provider = cli_auth.get_token_provider(audience=env_config.apiEnvironment.clientId)
-        else:
-            from ..auth.machine import PlainMachineTokenProvider
-            token_provider = PlainMachineTokenProvider(env_config)
+        token_provider = override_token_provider or TOKEN_PROVIDERS.get_token_provider(env_config)
         super().__init__(base_url=env_config.apiEnvironment.baseUrl, token_provider=token_provider, **kwargs)
 
 
@@ -169,16 +162,7 @@ class ConfiguredGraphApi(Api, ABC):
     """
 
     def __init__(self, contxt_env: ContxtEnvironmentConfig, **kwargs) -> None:
-        if contxt_env.clientId is None:
-            from ..auth.cli import CliAuth
-
-            cli_auth = CliAuth(service_config=contxt_env)
-            token_provider = cli_auth.get_token_provider(audience=contxt_env.apiEnvironment.clientId)
-        else:
-            from ..auth.machine import PlainMachineTokenProvider
-
-            token_provider = PlainMachineTokenProvider(contxt_env)
-
+        token_provider = TOKEN_PROVIDERS.get_token_provider(contxt_env)
         super().__init__(base_url=contxt_env.apiEnvironment.baseUrl, token_provider=token_provider, **kwargs)
 
 
@@ -209,19 +193,28 @@ class AuthService(Api):
         )
 
     def get_oauth_token(self, client_id: str, client_secret: str, audience: str) -> str:
-        cached_token = self.token_cache.get_token(client_id=self.service_env.clientId,
-                                                  audience=self.service_env.apiEnvironment.clientId)
-        if cached_token is None:
-            logger.info('Token not found for client...fetching new one')
-            req = GetToken(self.service_env.apiEnvironment.authProvider)
-            token = req.client_credentials(client_id=self.service_env.clientId,
-                                           client_secret=self.service_env.clientSecret,
-                                           audience=self.service_env.apiEnvironment.clientId)
-            self.token_cache.set_token(client_id=self.service_env.clientId,
-                                       audience=self.service_env.apiEnvironment.clientId,
-                                       token=token['access_token'])
-
-            return token['access_token']
-        else:
-            logger.info('Using cached token')
-            return cached_token
+        from ..auth.refresh import REFRESH_MANAGER
+        from ..auth.registry import provider_key
+
+        # the token is that of the service environment's client, so is keyed like its provider
+        service_env = self.service_env
+        return REFRESH_MANAGER.get_token(
+            provider_key(service_env),
+            fetch=self._fetch_oauth_token,
+            stored=lambda newer_than: self.token_cache.get_token(
+                client_id=service_env.clientId,
+                audience=service_env.apiEnvironment.clientId,
+                newer_than=newer_than,
+            ),
+        )
+
+    def _fetch_oauth_token(self) -> str:
+        logger.info('Token not found for client...fetching new one')
+        req = GetToken(self.service_env.apiEnvironment.authProvider)
+        token = req.client_credentials(client_id=self.service_env.clientId,
+                                       client_secret=self.service_env.clientSecret,
+                                       audience=self.service_env.apiEnvironment.clientId)
+        self.token_cache.set_token(client_id=self.service_env.clientId,
+                                   audience=self.service_env.apiEnvironment.clientId,
+                                   token=token['access_token'])
+        return token['access_token']
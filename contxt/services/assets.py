@@ -10,10 +10,9 @@ from ..models.assets import (
     Metric,
     MetricValue,
 )
-from contxt.utils.config import ApiEnvironment
+from ..utils.config import ContxtEnvironmentConfig
 from .api import ConfiguredLegacyApi
 from .pagination import PagedRecords, PageOptions
-from ..utils.config import ContxtEnvironmentConfig
 
 
 class AssetsService(ConfiguredLegacyApi):
@@ -410,7 +409,7 @@ class AssetsService(ConfiguredLegacyApi):
         return [self.create_attribute_value(attribute_value) for attribute_value in attribute_values]
 
     def get_attribute_values(self, asset_id: str) -> List[AttributeValue]:
-        return [AttributeValue.from_api(rec) for rec in self.get(f"assets/{asset_id}/attributes/values")]
+        return AttributeValue.from_api_many(self.get(f"assets/{asset_id}/attributes/values"))
 
     def update_attribute_values(self, attribute_values: List[AttributeValue]) -> None:
         # TODO: batch update
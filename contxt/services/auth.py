@@ -1,10 +1,18 @@
-from typing import Dict, List
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from threading import RLock
+from typing import Callable, Dict, List, Optional, Tuple
 
-from ..utils.persistent_contxt_config import PersistentContxtConfig
 import jwt
-import logging
 
-from dataclasses import dataclass
+from ..utils.files import file_lock
+from ..utils.persistent_contxt_config import PersistentContxtConfig
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(format='[%(module)s %(levelname)s:%(asctime)s] %(message)s', level=logging.INFO)
@@ -55,20 +63,196 @@ class TokenConfig:
             client_config.audiences[audience] = token
 
 
+@dataclass(frozen=True)
+class CachedToken:
+    token: str
+    # the token's `exp` claim, if any
+    expires_at: Optional[float] = None
+
+    @classmethod
+    def from_token(cls, token: str) -> 'CachedToken':
+        return cls(token=token, expires_at=jwt.decode(token, verify=False).get('exp'))
+
+    def expiring(self, within: float = 0) -> bool:
+        return self.expires_at is not None and self.expires_at <= time.time() + within
+
+
+class TokenStore(ABC):
+    """Persistent store of tokens, by client id and audience, shared across processes"""
+
+    # identifies the store, i.e. its file
+    location: str
+
+    @abstractmethod
+    def read_tokens(self) -> Dict[Tuple[str, str], str]:
+        """Reads all tokens, by (client id, audience)"""
+
+    @abstractmethod
+    def write_token(self, client_id: str, audience: str, token: str):
+        """Stores `token`, keeping the other tokens as they are"""
+
+
+class YamlTokenStore(TokenStore, PersistentContxtConfig):
+    """Tokens in `~/.contxt/auth_tokens.yml`. Writes hold a file lock across reading, updating
+    and (atomically) replacing the file, so concurrent processes never lose or corrupt tokens."""
+
+    # only readable by the user, as it holds credentials
+    file_mode = 0o600
+
+    def __init__(self, filename: str = 'auth_tokens.yml'):
+        super().__init__(filename, TokenConfig, load=False)
+        self.location = self.filename
+
+    def read_tokens(self) -> Dict[Tuple[str, str], str]:
+        self.config = self.load_contxt_file(initialize_if_not_exists=True)
+        clients = self.config.tokens if self.config else []
+        return {
+            (client.clientId, audience): token
+            for client in clients
+            for audience, token in client.audiences.items()
+        }
+
+    def write_token(self, client_id: str, audience: str, token: str):
+        if self.use_default_path and not os.path.exists(self.base_path):
+            os.makedirs(self.base_path, exist_ok=True)
+        with file_lock(self.filename):
+            # merge with tokens stored since the file was last read
+            self.config = self.load_contxt_file(initialize_if_not_exists=True)
+            if self.config is None:
+                self.config = TokenConfig(tokens=[])
+            self.config.set_token_for_client(client_id, audience, token)
+            self.write_contxt_file()
+
+
+class SqliteTokenStore(TokenStore):
+    """Tokens in the SQLite database `~/.contxt/auth_tokens.db`, one row per client id and
+    audience, so storing a token only updates its own row"""
+
+    def __init__(self, filename: str = 'auth_tokens.db', use_default_path: bool = True):
+        if use_default_path:
+            base_path = os.path.join(str(Path.home()), '.contxt')
+            os.makedirs(base_path, exist_ok=True)
+            filename = os.path.join(base_path, filename)
+        self.location = filename
+        with self._connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS tokens (client_id TEXT NOT NULL, '
+                               'audience TEXT NOT NULL, token TEXT NOT NULL, '
+                               'PRIMARY KEY (client_id, audience))')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.location, timeout=30)
+
+    def read_tokens(self) -> Dict[Tuple[str, str], str]:
+        with closing(self._connect()) as connection:
+            return {(client_id, audience): token for client_id, audience, token
+                    in connection.execute('SELECT client_id, audience, token FROM tokens')}
+
+    def write_token(self, client_id: str, audience: str, token: str):
+        if token is None:
+            raise SetTokenException('Token cannot be null')
+        with closing(self._connect()) as connection, connection:
+            connection.execute('INSERT OR REPLACE INTO tokens (client_id, audience, token) '
+                               'VALUES (?, ?, ?)', (client_id, audience, token))
+
+
 class StoredTokenCache(PersistentContxtConfig):
+    """Tokens persisted to a `TokenStore` (by default, `default_store`), fronted by a
+    process-local cache of the tokens and their expiry that is shared by all instances. The store
+    is only read when a token is missing or expiring (as another process may have refreshed it),
+    and written on refresh.
 
-    def __init__(self):
-        super().__init__('auth_tokens.yml', TokenConfig)
+    For compatibility, the `PersistentContxtConfig` interface (i.e. `config` and
+    `write_contxt_file`) is still available with a `YamlTokenStore`, which it delegates to."""
 
-    def set_token(self, client_id: str, audience: str, token: str):
-        if self.config is None:
-            self.config = TokenConfig(tokens=[])
-        self.config.set_token_for_client(client_id, audience, token)
-        self.write_contxt_file()
+    # seconds before expiry at which a token is no longer handed out
+    expiry_leeway = 60
+
+    # the store of new caches; set to `SqliteTokenStore` to use it process-wide
+    default_store: Callable[[], TokenStore] = YamlTokenStore
+
+    # cached tokens of each store, by (client id, audience)
+    _memory: Dict[str, Dict[Tuple[str, str], CachedToken]] = {}
+    _memory_lock = RLock()
+
+    def __init__(self, store: Optional[TokenStore] = None):
+        # the file is read on demand, by the store
+        self.store = store or type(self).default_store()
+        with self._memory_lock:
+            self._tokens = self._memory.setdefault(self.store.location, {})
+
+    @property
+    def _file_store(self) -> YamlTokenStore:
+        if not isinstance(self.store, YamlTokenStore):
+            raise AttributeError(f'{type(self.store).__name__} is not a config file')
+        return self.store
+
+    @property
+    def use_default_path(self) -> bool:  # type: ignore
+        return self._file_store.use_default_path
 
-    def get_token(self, client_id: str, audience: str) -> str:
-        if self.config is not None:
-            tokens_for_client = self.config.tokens_for_client(client_id)
-            if tokens_for_client:
-                return tokens_for_client.get_token_for_audience(audience)
+    @property
+    def base_path(self) -> str:  # type: ignore
+        return self._file_store.base_path
 
+    @property
+    def filename(self) -> str:  # type: ignore
+        return self._file_store.filename
+
+    @property
+    def clazz(self):  # type: ignore
+        return self._file_store.clazz
+
+    @property
+    def config(self) -> Optional[TokenConfig]:  # type: ignore
+        store = self._file_store
+        if store.config is None:
+            store.config = store.load_contxt_file(initialize_if_not_exists=True)
+        return store.config
+
+    @config.setter
+    def config(self, config: Optional[TokenConfig]):
+        self._file_store.config = config
+
+    def load_contxt_file(self, initialize_if_not_exists: bool):
+        return self._file_store.load_contxt_file(initialize_if_not_exists)
+
+    def write_contxt_file(self):
+        store = self._file_store
+        with self._memory_lock, file_lock(store.filename):
+            store.write_contxt_file()
+            # tokens may have been changed or removed
+            self._tokens.clear()
+
+    def _valid_token(
+        self, client_id: str, audience: str, newer_than: Optional[float] = None
+    ) -> Optional[str]:
+        cached = self._tokens.get((client_id, audience))
+        if cached is None or cached.expiring(self.expiry_leeway):
+            return None
+        if newer_than is not None and (cached.expires_at or 0) <= newer_than:
+            return None
+        return cached.token
+
+    def _load_tokens(self):
+        for (client_id, audience), token in self.store.read_tokens().items():
+            try:
+                self._tokens[(client_id, audience)] = CachedToken.from_token(token)
+            except jwt.PyJWTError:
+                logger.info(f'Ignoring malformed token of {client_id} for {audience}')
+
+    def set_token(self, client_id: str, audience: str, token: str):
+        with self._memory_lock:
+            self.store.write_token(client_id, audience, token)
+            self._tokens[(client_id, audience)] = CachedToken.from_token(token)
+
+    def get_token(
+        self, client_id: str, audience: str, newer_than: Optional[float] = None
+    ) -> Optional[str]:
+        """Returns the valid token of `client_id` for `audience`, if any. With `newer_than`, only
+        a token expiring after that time is returned, reading the store if the cached one is not."""
+        token = self._valid_token(client_id, audience, newer_than)
+        if token is None:
+            with self._memory_lock:
+                self._load_tokens()
+                token = self._valid_token(client_id, audience, newer_than)
+        return token
@@ -1,15 +1,19 @@
-from sgqlc.operation import Operation
+from __future__ import annotations
 
-from contxt.services.base_graph_service import BaseGraphService, SchemaMissingException
+from typing import TYPE_CHECKING
 
-try:
-    from contxt.schemas.foundry_graph.foundry_graph_schema import foundry_graph as schema
-except ImportError:
-    raise SchemaMissingException('[ERROR] Schema is not generated for GraphQL -- run `contxt init` to '
-                                 'initialize then re-run the command')
+from sgqlc.operation import Operation
 
+from contxt.services.base_graph_service import BaseGraphService, LazySchema
 from contxt.utils.config import ContxtEnvironmentConfig
 
+if TYPE_CHECKING:
+    # the generated types, for annotations only
+    from contxt.schemas.foundry_graph import foundry_graph_schema as schema_types
+
+schema = LazySchema('contxt.schemas.foundry_graph.foundry_graph_schema', 'foundry_graph',
+                    prefer_trimmed=True)
+
 
 class BaseService(BaseGraphService):
 
@@ -139,7 +143,7 @@ class BaseService(BaseGraphService):
 
         return channels
 
-    def create_source_type(self, slug: str, name: str) -> schema.SourceType:
+    def create_source_type(self, slug: str, name: str) -> schema_types.SourceType:
         op = Operation(schema.Mutation)
 
         type_input = schema.CreateSourceTypeInput()
@@ -158,7 +162,7 @@ class BaseService(BaseGraphService):
 
         return (op + data).create_source_type.source_type
 
-    def create_source(self, slug: str, name: str, source_type_id: str) -> schema.Source:
+    def create_source(self, slug: str, name: str, source_type_id: str) -> schema_types.Source:
         op = Operation(schema.Mutation)
 
         source_input = schema.CreateSourceInput()
@@ -179,7 +183,8 @@ class BaseService(BaseGraphService):
 
         return (op + data).create_source.source
 
-    def create_source_channel(self, name: str, source_slug: str, description: str = None) -> schema.SourceChannel:
+    def create_source_channel(self, name: str, source_slug: str,
+                              description: str = None) -> schema_types.SourceChannel:
         op = Operation(schema.Mutation)
 
         channel_input = schema.CreateSourceChannelInput()
@@ -1,29 +1,128 @@
+import json
 import os.path
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from importlib import import_module
+from importlib.util import find_spec
 from os import path
-import json
-from typing import Optional
-from sgqlc.operation import Operation
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
 from sgqlc.endpoint.http import HTTPEndpoint
-from sgqlc.introspection import query as introspection_query, variables
-from sgqlc.codegen.schema import CodeGen, load_schema
-from importlib import import_module
+from sgqlc.introspection import query as introspection_query
+from sgqlc.introspection import variables
+from sgqlc.operation import Operation
 
 from contxt.services.api import ConfiguredGraphApi
+from contxt.services.schema_artifacts import (
+    discard_trimmed,
+    generate_schema_modules,
+    is_up_to_date,
+    resolve_schema_module,
+    text_digest,
+)
+from contxt.utils import make_logger
+from contxt.utils.cache import TTLCache
 from contxt.utils.config import ContxtEnvironmentConfig
 
+logger = make_logger(__name__)
+
+T = TypeVar("T")
+
 
 class SchemaMissingException(Exception):
     pass
 
 
+@dataclass
+class MutationResult:
+    """Result of one mutation of a batch, selected under `alias`"""
+    alias: str
+    data: Any = None
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+SCHEMA_MISSING_MESSAGE = '[ERROR] Schema is not generated for GraphQL -- run `contxt init` to ' \
+                         'initialize then re-run the command'
+
+
+class LazySchema:
+    """Proxy for a generated sgqlc schema module (or an attribute `attr` of it, such as
+    the `Schema` instance). The generated module is only imported on first attribute access,
+    so importing a service does not pay for executing thousands of type definitions.
+
+    If `prefer_trimmed` is set, the trimmed schema generated by `contxt init` is loaded
+    instead, as long as it is up-to-date. This is only safe for the SDK's own services,
+    since the trimmed schema only has the types they use. Should it still lack a type (i.e.
+    the services changed since `contxt init`), the full schema is loaded instead.
+    """
+
+    def __init__(
+        self, module_path: str, attr: Optional[str] = None, prefer_trimmed: bool = False
+    ) -> None:
+        self._module_path = module_path
+        self._attr = attr
+        self._prefer_trimmed = prefer_trimmed
+        self._trimmed = False
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            module_path = self._module_path
+            if self._prefer_trimmed:
+                module_path = resolve_schema_module(module_path)
+            self._trimmed = module_path != self._module_path
+            try:
+                module = import_module(module_path)
+            except ImportError:
+                raise SchemaMissingException(SCHEMA_MISSING_MESSAGE)
+            self._target = getattr(module, self._attr) if self._attr else module
+        return self._target
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._target is not None
+
+    def __getattr__(self, name):
+        target = self._load()
+        try:
+            return getattr(target, name)
+        except AttributeError:
+            if not self._trimmed:
+                raise
+        # the services use a type the trimmed schema was not generated with
+        logger.warning(
+            f'Trimmed schema for {self._module_path} has no {name}, loading the full schema. '
+            f'Run `contxt init` to refresh it'
+        )
+        discard_trimmed(self._module_path)
+        self._target = None
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f'<{self.__class__.__name__} {self._module_path} ({state})>'
+
+
 class BaseGraphService(ConfiguredGraphApi):
+    # Max number of aliased mutations packed in a single GraphQL document by `run_mutations`
+    max_mutations_per_request = 50
+    # Optional cache of query results (see `run_cached`), with the TTL of each cache tag
+    query_cache: Optional[TTLCache] = None
+    query_cache_ttls: Dict[str, float] = {}
 
-    def __init__(self, contxt_env: ContxtEnvironmentConfig, schema_path=None, load_schema=True):
+    def __init__(self, contxt_env: ContxtEnvironmentConfig, schema_path=None, load_schema=True,
+                 query_cache: Optional[TTLCache] = None):
         super().__init__(contxt_env)
         self.service_name = contxt_env.service
         self.url = contxt_env.apiEnvironment.baseUrl
         self.schema_name = self.service_name.replace("-", "_")
         self.endpoint = None
+        self.query_cache = query_cache
         if load_schema:
             self.schema = self._load_schema(schema_path)
 
@@ -32,17 +131,29 @@ class BaseGraphService(ConfiguredGraphApi):
             module_path = f'contxt.schemas.{self.schema_name}.{self.schema_name}_schema'
         else:
             module_path = f'{schema_path.replace("/",".")}.{self.schema_name}.{self.schema_name}_schema'
-        return import_module(module_path)
+        # fail early if the schema was never generated, but defer executing it until first use
+        try:
+            spec = find_spec(module_path)
+        except ImportError:
+            spec = None
+        if spec is None:
+            raise SchemaMissingException(SCHEMA_MISSING_MESSAGE)
+        return LazySchema(module_path)
 
     def _get_endpoint(self):
         if not self.endpoint:
             self.endpoint = HTTPEndpoint(self.url, {'Authorization': f'Bearer {self.token_provider.access_token}'})
         return self.endpoint
 
-    def update_schema(self, service_name=None, base_file_path=None):
-        print(f'Loading schema for {service_name} at {self.url}')
-        data = self._get_endpoint()(introspection_query, variables())
+    def fetch_schema(self) -> dict:
+        """Runs the introspection query against the service"""
+        return self._get_endpoint()(introspection_query, variables())
 
+    def write_schema(self, data: dict, service_name=None, base_file_path=None,
+                     force: bool = False) -> Optional[Tuple[str, str, str]]:
+        """Writes the introspection result `data` as a JSON dump. Returns the arguments for
+        `generate_schema_modules`, or `None` if the generated modules are already up-to-date
+        (unless `force` is set)"""
         service_name = service_name.replace('-','_')
         schema_name = service_name if service_name else self.service_name
 
@@ -55,17 +166,28 @@ class BaseGraphService(ConfiguredGraphApi):
             os.makedirs(schema_dir)
 
         json_schema_filepath = path.abspath(path.join(schema_dir, f"{schema_name}_schema.json"))
-        with open(json_schema_filepath, 'w', encoding='utf8') as f:
+        python_schema_filepath = path.abspath(path.join(schema_dir, f'{schema_name}_schema.py'))
+
+        dump = json.dumps(data, sort_keys=True, indent=2, default=str, ensure_ascii=False)
+        if not force and is_up_to_date(python_schema_filepath, text_digest(dump)):
+            print(f'Schema for {service_name} is unchanged, skipping')
+            return None
+
+        # written as is (i.e. without translating newlines), so the file's digest is that of the dump
+        with open(json_schema_filepath, 'w', encoding='utf8', newline='') as f:
             print(f'Writing schema to {json_schema_filepath}')
-            json.dump(data, f, sort_keys=True, indent=2, default=str, ensure_ascii=False)
+            f.write(dump)
 
-        python_schema_filepath = path.abspath(path.join(schema_dir, f'{schema_name}_schema.py'))
-        print('Generating code for schema')
-        with open(json_schema_filepath, 'r') as json_file:
-            schema = load_schema(json_file)
-            with open(python_schema_filepath, 'w') as schema_file:
-                gen = CodeGen(schema_name, schema, schema_file.write, docstrings=True)
-                gen.write()
+        return schema_name, json_schema_filepath, python_schema_filepath
+
+    def update_schema(self, service_name=None, base_file_path=None, force: bool = False):
+        print(f'Loading schema for {service_name} at {self.url}')
+        data = self.fetch_schema()
+
+        codegen_args = self.write_schema(data, service_name, base_file_path, force=force)
+        if codegen_args:
+            print('Generating code for schema')
+            generate_schema_modules(*codegen_args)
             print('Schema and types updated!')
 
     def run(self, op: Operation):
@@ -78,6 +200,73 @@ class BaseGraphService(ConfiguredGraphApi):
 
         return data
 
+    def run_cached(self, op: Operation, tag: str, raise_errors: bool = False):
+        """Runs query `op` through the `query_cache`, if one is set. Results are keyed on the
+        service and operation text (which includes its variables), and cached for the TTL of
+        `tag` in `query_cache_ttls`. Responses with errors are never cached."""
+        if self.query_cache is None:
+            return self.run(op) if raise_errors else self._get_endpoint()(op)
+
+        key = (self.url, str(op))
+        data = self.query_cache.get(key)
+        if data is None:
+            data = self.run(op) if raise_errors else self._get_endpoint()(op)
+            if 'errors' not in data:
+                self.query_cache.set(
+                    key, data, ttl=self.query_cache_ttls.get(tag), tags=[(self.url, tag)]
+                )
+        return data
+
+    def invalidate_cached(self, *tags: str) -> None:
+        """Invalidates the cached query results of `tags`, after a mutation changed them"""
+        if self.query_cache is not None:
+            self.query_cache.invalidate(*((self.url, tag) for tag in tags))
+
+    def run_mutations(
+        self,
+        mutation_type,
+        items: Sequence[T],
+        add_mutation: Callable[[Operation, T, str], Any],
+        max_per_request: Optional[int] = None,
+    ) -> List[MutationResult]:
+        """Runs a mutation for each of `items`, packing up to `max_per_request` of them in a
+        single GraphQL document. `add_mutation(op, item, alias)` must select the item's mutation
+        on `op` under `alias`. Returns a result per item (in order), with the errors reported for
+        its alias instead of raising them."""
+        max_per_request = max_per_request or self.max_mutations_per_request
+        results = []
+        for start in range(0, len(items), max_per_request):
+            op = Operation(mutation_type)
+            aliases = []
+            for i, item in enumerate(items[start:start + max_per_request], start):
+                alias = f"m{i}"
+                add_mutation(op, item, alias)
+                aliases.append(alias)
+
+            data = self._get_endpoint()(op)
+            results.extend(self._mutation_results(op, data, aliases))
+        return results
+
+    @staticmethod
+    def _mutation_results(op: Operation, data: dict, aliases: List[str]) -> List[MutationResult]:
+        errors = defaultdict(list)
+        for error in data.get("errors") or []:
+            path = error.get("path") or []
+            if path and path[0] in aliases:
+                errors[path[0]].append(error)
+            else:
+                # not tied to a mutation (i.e. a validation or transport error), so all of them failed
+                for alias in aliases:
+                    errors[alias].append(error)
+
+        raw = data.get("data") or {}
+        parsed = op + data if raw else None
+        return [
+            # sgqlc would turn a failed (null) mutation into an empty object
+            MutationResult(alias, parsed[alias] if raw.get(alias) is not None else None, errors[alias])
+            for alias in aliases
+        ]
+
     def run_query(self, query: str, variables: Optional[dict] = None):
         data = self._get_endpoint()(query, variables)
 
@@ -86,3 +275,34 @@ class BaseGraphService(ConfiguredGraphApi):
             raise Exception(data['errors'][0]['message'])
 
         return data
+
+
+def update_schemas(graph_services: List[BaseGraphService], base_file_path=None, force: bool = False,
+                   max_workers: Optional[int] = None):
+    """Updates the schemas of `graph_services` concurrently. Introspection queries run on a
+    thread pool, and code generation (which is CPU bound) on a process pool. Services whose
+    introspection result is unchanged since the last run are skipped, unless `force` is set."""
+    # Resolve access tokens up-front, as a CLI login may need to prompt the user
+    for service in graph_services:
+        service._get_endpoint()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        print(f'Loading schemas for {", ".join(s.service_name for s in graph_services)}')
+        results = list(pool.map(lambda s: s.fetch_schema(), graph_services))
+
+    codegen_args = [
+        service.write_schema(data, service.service_name, base_file_path, force=force)
+        for service, data in zip(graph_services, results)
+    ]
+    codegen_args = [args for args in codegen_args if args]
+    if not codegen_args:
+        print('All schemas are up-to-date!')
+        return
+
+    print(f'Generating code for {len(codegen_args)} schema(s)')
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(generate_schema_modules, *args) for args in codegen_args]
+        for future in futures:
+            # re-raise any error from the worker process
+            future.result()
+    print('Schemas and types updated!')
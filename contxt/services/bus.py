@@ -2,8 +2,8 @@ from typing import Dict, List, Optional
 
 from ..auth import Auth
 from ..models.bus import Channel, ChannelStats
-from .api import ConfiguredLegacyApi
 from ..utils.config import ContxtEnvironmentConfig
+from .api import ConfiguredLegacyApi
 
 
 class MessageBusService(ConfiguredLegacyApi):
@@ -28,7 +28,7 @@ class MessageBusService(ConfiguredLegacyApi):
 
     def get_channels_for_service(self, service_id: str) -> List[Channel]:
         resp = self.get(self._channels_url(service_id))
-        return [Channel.from_api(rec) for rec in resp]
+        return Channel.from_api_many(resp)
 
     def get_schema_for_channel_and_service(
         self, schema_id: str, channel_id: str, service_id: str
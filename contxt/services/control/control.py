@@ -1,23 +1,34 @@
+from __future__ import annotations
+
 import json
 from datetime import datetime
-from typing import Any, AnyStr, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, AnyStr, Dict, List, Optional
 
 import pytz
 from sgqlc.operation import Operation
 
-from contxt.services.base_graph_service import BaseGraphService, SchemaMissingException
+from contxt.models.control import (
+    ComponentSavings,
+    ControllableComponent,
+    EventTransition,
+    NewComponent,
+    ProposalApproval,
+    Suggestion,
+)
+from contxt.services.base_graph_service import BaseGraphService, LazySchema, MutationResult
+from contxt.utils.cache import TTLCache
 from contxt.utils.config import ContxtEnvironmentConfig
 
-try:
-    import contxt.schemas.foundry_graph.foundry_graph_schema as schema
-    from contxt.schemas.foundry_graph.foundry_graph_schema import ComponentToControlInputRecordInput
-except ImportError:
-    raise SchemaMissingException(
-        "[ERROR] Schema is not generated for GraphQL -- run `contxt init` to "
-        "initialize then re-run the command"
-    )
+if TYPE_CHECKING:
+    # the generated types, for annotations only
+    from contxt.schemas.foundry_graph import foundry_graph_schema as schema_types
+
+schema = LazySchema("contxt.schemas.foundry_graph.foundry_graph_schema", prefer_trimmed=True)
 
-from contxt.models.control import Suggestion
+# Cached lookups that include event proposals, so are invalidated by proposal and event mutations
+PROPOSAL_CACHE_TAGS = ("controllables", "facility")
+# Cached lookups that include controllable components
+COMPONENT_CACHE_TAGS = ("controllables", "facility", "edge_node")
 
 
 def include_proposals_with_object(obj, include_only_active: bool = True, project_id: str = None):
@@ -34,12 +45,28 @@ def include_proposals_with_object(obj, include_only_active: bool = True, project
 
 
 class ControlService(BaseGraphService):
-    def __init__(self, contxt_env: ContxtEnvironmentConfig):
-        super().__init__(contxt_env)
+    # TTLs (in seconds) of the lookups cached when given a `query_cache`
+    query_cache_ttls = {
+        "definitions": 3600,
+        "organizations": 3600,
+        "projects": 3600,
+        "controllables": 60,
+        "edge_node": 60,
+        "facility": 60,
+    }
+
+    def __init__(
+        self,
+        contxt_env: ContxtEnvironmentConfig,
+        query_cache: Optional[TTLCache] = None,
+        query_cache_ttls: Optional[Dict[str, float]] = None,
+    ):
+        super().__init__(contxt_env, query_cache=query_cache)
+        self.query_cache_ttls = {**self.query_cache_ttls, **(query_cache_ttls or {})}
 
     def create_definition_from_json_file(
         self, json_file: str, slug: str, project_id: str, label: str, description: str
-    ) -> schema.StateDefinition:
+    ) -> schema_types.StateDefinition:
         print(f"Opening json file at {json_file}")
         with open(json_file, "r") as f:
             definition_data = json.load(f)
@@ -166,7 +193,7 @@ class ControlService(BaseGraphService):
 
     def get_latest_proposal_for_component(
         self, controllable_component_id: str, project_id: str = None
-    ) -> Optional[schema.EventProposal]:
+    ) -> Optional[schema_types.EventProposal]:
         component_with_proposals = self.get_proposals_for_component(
             controllable_component_id, limit=1, project_id=project_id
         )
@@ -176,7 +203,7 @@ class ControlService(BaseGraphService):
 
     def get_proposals_for_component(
         self, controllable_component_id: str, limit=None, project_id: str = None
-    ) -> schema.ControllableComponent:
+    ) -> schema_types.ControllableComponent:
         op = Operation(schema.Query)
 
         controllable_component = op.controllable_component(id=controllable_component_id)
@@ -289,9 +316,30 @@ class ControlService(BaseGraphService):
         if "errors" in data:
             raise Exception(data["errors"][0]["message"])
 
+        self.invalidate_cached(*PROPOSAL_CACHE_TAGS)
+
         event = (op + data).transition_control_event
         return event
 
+    def transition_events(
+        self, transitions: List[EventTransition], max_per_request: Optional[int] = None
+    ) -> List[MutationResult]:
+        """Transitions many control events, batching the mutations in as few requests as possible"""
+
+        def add_transition(op: Operation, transition: EventTransition, alias: str):
+            transition_input = schema.TransitionControlEventInput()
+            transition_input.control_event_id = transition.control_event_id
+            transition_input.transition_event = transition.transition_event
+            transition_input.message = transition.message
+
+            mutation = op.transition_control_event(input=transition_input, __alias__=alias)
+            mutation.control_event.id()
+            mutation.control_event.state_machine().current_state()
+
+        results = self.run_mutations(schema.Mutation, transitions, add_transition, max_per_request)
+        self.invalidate_cached(*PROPOSAL_CACHE_TAGS)
+        return results
+
     def get_definitions(self, definition_slug: str):
         op = Operation(schema.Query)
 
@@ -304,7 +352,7 @@ class ControlService(BaseGraphService):
         query.slug()
         query.definition()
 
-        data = self._get_endpoint()(op)
+        data = self.run_cached(op, "definitions")
 
         if definition_slug:
             definitions = (op + data).state_definition
@@ -315,7 +363,7 @@ class ControlService(BaseGraphService):
 
     def create_definition(
         self, json_obj, slug: str, project_id: str, description: str, label: str
-    ) -> schema.StateDefinition:
+    ) -> schema_types.StateDefinition:
         op = Operation(schema.Mutation)
 
         def_input = schema.StateDefinitionInput()
@@ -335,6 +383,7 @@ class ControlService(BaseGraphService):
         create.state_definition.description()
 
         data = self.run(op)
+        self.invalidate_cached("definitions")
 
         return (op + data).create_state_definition.state_definition
 
@@ -344,7 +393,7 @@ class ControlService(BaseGraphService):
         project_id: str,
         start_time: datetime,
         end_time: datetime,
-        components: List[schema.ControllableComponent],
+        components: List[schema_types.ControllableComponent],
     ):
 
         op = Operation(schema.Mutation)
@@ -366,20 +415,14 @@ class ControlService(BaseGraphService):
         if "errors" in data:
             print(data)
             raise Exception(data["errors"][0]["message"])
+        self.invalidate_cached(*PROPOSAL_CACHE_TAGS)
 
         event = (op + data).add_historic_event.event_proposal
         return event
 
-    def submit_suggestion(self, suggestion: Suggestion) -> schema.EventProposal:
+    def submit_suggestion(self, suggestion: Suggestion) -> schema_types.EventProposal:
 
-        inputs = []
-        for component in suggestion.components:
-            inputs.append(
-                ComponentToControlInputRecordInput(
-                    controllable_component_id=component.id,
-                    state_definition_slug=component.state_definition_slug,
-                )
-            )
+        inputs = self._component_inputs(suggestion.components)
 
         return self.propose_event(
             summary=suggestion.summary,
@@ -394,7 +437,9 @@ class ControlService(BaseGraphService):
             start_control_upon_approval=suggestion.start_control_upon_approval,
         )
 
-    def adjust_proposal_end(self, proposal_id: str, new_end_time: datetime) -> schema.EventProposal:
+    def adjust_proposal_end(
+        self, proposal_id: str, new_end_time: datetime
+    ) -> schema_types.EventProposal:
         op = Operation(schema.Mutation)
 
         adjustment_input = schema.AdjustProposalEndTimeInputRecordInput()
@@ -411,11 +456,14 @@ class ControlService(BaseGraphService):
         operation.event_proposal.end_time()
 
         data = self.run(op)
+        self.invalidate_cached(*PROPOSAL_CACHE_TAGS)
 
         proposal = (op + data).adjust_proposal_end_time.event_proposal
         return proposal
 
-    def update_metadata(self, proposal_id: str, metadata: Dict[AnyStr, Any]) -> schema.EventProposal:
+    def update_metadata(
+        self, proposal_id: str, metadata: Dict[AnyStr, Any]
+    ) -> schema_types.EventProposal:
         op = Operation(schema.Mutation)
 
         update_input = schema.UpdateProposalMetadataInput()
@@ -429,6 +477,7 @@ class ControlService(BaseGraphService):
         operation.event_proposal.end_time()
 
         data = self.run(op)
+        self.invalidate_cached(*PROPOSAL_CACHE_TAGS)
 
         proposal = (op + data).update_proposal_metadata.event_proposal
         return proposal
@@ -439,13 +488,13 @@ class ControlService(BaseGraphService):
         project_id: str,
         start_time: datetime,
         end_time: datetime,
-        components: List[ComponentToControlInputRecordInput],
+        components: List[schema_types.ComponentToControlInputRecordInput],
         summary: str,
         control_start_deadline_time: Optional[datetime] = None,
         approval_deadline_time: Optional[datetime] = None,
         metadata: Dict[AnyStr, Any] = None,
         start_control_upon_approval: Optional[bool] = None,
-    ) -> schema.EventProposal:
+    ) -> schema_types.EventProposal:
 
         op = Operation(schema.Mutation)
 
@@ -471,13 +520,14 @@ class ControlService(BaseGraphService):
 
         propose.event_proposal.id()
         data = self.run(op)
+        self.invalidate_cached(*PROPOSAL_CACHE_TAGS)
 
         event = (op + data).propose_event.event_proposal
         return event
 
     def approve_proposal(
-        self, proposal_id: str, components: List[ComponentToControlInputRecordInput]
-    ) -> schema.EventProposal:
+        self, proposal_id: str, components: List[schema_types.ComponentToControlInputRecordInput]
+    ) -> schema_types.EventProposal:
 
         op = Operation(schema.Mutation)
 
@@ -494,14 +544,50 @@ class ControlService(BaseGraphService):
         approve.event_proposal.start_time()
         approve.event_proposal.end_time()
         data = self.run(op)
+        self.invalidate_cached(*PROPOSAL_CACHE_TAGS)
 
         event = (op + data).approve_proposal.event_proposal
         return event
 
+    def approve_proposals(
+        self, approvals: List[ProposalApproval], max_per_request: Optional[int] = None
+    ) -> List[MutationResult]:
+        """Approves many proposals, batching the mutations in as few requests as possible"""
+
+        def add_approval(op: Operation, approval: ProposalApproval, alias: str):
+            approved_proposal = schema.EventApprovalInputRecordInput()
+            approved_proposal.id = approval.proposal_id
+
+            approval_input = schema.ApproveProposalInput(
+                approved_proposal=approved_proposal,
+                approved_components=self._component_inputs(approval.components),
+            )
+
+            approve = op.approve_proposal(input=approval_input, __alias__=alias)
+            approve.event_proposal.id()
+            approve.event_proposal.start_time()
+            approve.event_proposal.end_time()
+
+        results = self.run_mutations(schema.Mutation, approvals, add_approval, max_per_request)
+        self.invalidate_cached(*PROPOSAL_CACHE_TAGS)
+        return results
+
+    @staticmethod
+    def _component_inputs(
+        components: List[ControllableComponent],
+    ) -> List[schema_types.ComponentToControlInputRecordInput]:
+        return [
+            schema.ComponentToControlInputRecordInput(
+                controllable_component_id=component.id,
+                state_definition_slug=component.state_definition_slug,
+            )
+            for component in components
+        ]
+
     def add_savings_for_component_control_event(
         self,
-        component: schema.ControllableComponent,
-        event_proposal: schema.EventProposal,
+        component: schema_types.ControllableComponent,
+        event_proposal: schema_types.EventProposal,
         success_metric_id: str,
         projected_savings_amount: float,
     ):
@@ -529,6 +615,27 @@ class ControlService(BaseGraphService):
         metric = (op + data).create_event_proposal_metric
         return metric
 
+    def add_savings_for_component_control_events(
+        self, savings: List[ComponentSavings], max_per_request: Optional[int] = None
+    ) -> List[MutationResult]:
+        """Adds projected savings for many components, batching the mutations in as few requests
+        as possible"""
+
+        def add_metric(op: Operation, component_savings: ComponentSavings, alias: str):
+            metric = schema.EventProposalMetricInput()
+            metric.event_proposal_id = component_savings.event_proposal_id
+            metric.controllable_component_id = component_savings.controllable_component_id
+            metric.project_success_metric_id = component_savings.success_metric_id
+            metric.projected_impact_amount = component_savings.projected_savings_amount
+
+            new_metric = op.create_event_proposal_metric(
+                input=schema.CreateEventProposalMetricInput(event_proposal_metric=metric),
+                __alias__=alias,
+            )
+            new_metric.event_proposal_metric.project_success_metric_id()
+
+        return self.run_mutations(schema.Mutation, savings, add_metric, max_per_request)
+
     def add_actual_savings_for_component_control_event(
         self, success_metric_id: str, actual_savings_amount: float, metadata: str
     ):
@@ -577,11 +684,14 @@ class ControlService(BaseGraphService):
         if "errors" in data:
             print(data)
             raise Exception(data["errors"][0]["message"])
+        self.invalidate_cached("facility")
 
         facility = (op + data).create_facility
         return facility
 
-    def set_controllable_as_schedulable(self, controllable_id: str) -> schema.ControllableComponent:
+    def set_controllable_as_schedulable(
+        self, controllable_id: str
+    ) -> schema_types.ControllableComponent:
         op = Operation(schema.Mutation)
 
         update = schema.UpdateControllableComponentInput()
@@ -598,13 +708,14 @@ class ControlService(BaseGraphService):
         if "errors" in data:
             print(data)
             raise Exception(data["errors"][0]["message"])
+        self.invalidate_cached(*COMPONENT_CACHE_TAGS)
 
         component = (op + data).update_controllable_component
         return component
 
     def get_controllable_by_slug(
         self, facility_id: int, component_slug: str
-    ) -> Optional[schema.ControllableComponent]:
+    ) -> Optional[schema_types.ControllableComponent]:
         components = self.get_controllables_for_facility(
             facility_id=facility_id, component_slug=component_slug, include_events=False
         )
@@ -640,7 +751,7 @@ class ControlService(BaseGraphService):
         components.nodes.label()
         components.nodes.is_schedulable()
 
-        data = self._get_endpoint()(op)
+        data = self.run_cached(op, "controllables")
 
         components = (op + data).controllable_components
 
@@ -699,7 +810,7 @@ class ControlService(BaseGraphService):
         projects.nodes().name()
         projects.nodes().description()
 
-        data = self._get_endpoint()(op)
+        data = self.run_cached(op, "projects")
 
         projects = (op + data).projects
 
@@ -786,7 +897,7 @@ class ControlService(BaseGraphService):
         components.slug()
         components.label()
 
-        data = self.run(op)
+        data = self.run_cached(op, "edge_node", raise_errors=True)
 
         edge_node = (op + data).edge_node
         return edge_node
@@ -810,7 +921,7 @@ class ControlService(BaseGraphService):
         if include_events:
             include_proposals_with_object(facility)
 
-        data = self._get_endpoint()(op)
+        data = self.run_cached(op, "facility")
 
         facility = (op + data).facility
 
@@ -824,7 +935,7 @@ class ControlService(BaseGraphService):
         orgs.id()
         orgs.name()
 
-        data = self._get_endpoint()(op)
+        data = self.run_cached(op, "organizations")
 
         orgs = (op + data).organizations
 
@@ -874,6 +985,30 @@ class ControlService(BaseGraphService):
                                       'description': description,
                                       'facilityId': facility_id,
                                       'controllingEdgeNode': controlled_by_edge_client_id})
+        self.invalidate_cached(*COMPONENT_CACHE_TAGS)
 
         return data['createControllableComponent']['controllableComponent']['id']
 
+    def create_components(
+        self, components: List[NewComponent], max_per_request: Optional[int] = None
+    ) -> List[MutationResult]:
+        """Creates many components, batching the mutations in as few requests as possible. The
+        `data` of each successful result has the new component's id."""
+
+        def add_component(op: Operation, component: NewComponent, alias: str):
+            component_input = schema.ControllableComponentInput()
+            component_input.controlled_by_edge_node_client_id = component.controlled_by_edge_client_id
+            component_input.label = component.label
+            component_input.slug = component.slug
+            component_input.description = component.description
+            component_input.facility_id = component.facility_id
+
+            create = op.create_controllable_component(
+                input=schema.CreateControllableComponentInput(controllable_component=component_input),
+                __alias__=alias,
+            )
+            create.controllable_component.id()
+
+        results = self.run_mutations(schema.Mutation, components, add_component, max_per_request)
+        self.invalidate_cached(*COMPONENT_CACHE_TAGS)
+        return results
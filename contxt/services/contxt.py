@@ -12,8 +12,8 @@ from ..models.contxt import (
     Service,
     User,
 )
-from .api import ConfiguredLegacyApi
 from ..utils.config import ContxtEnvironmentConfig
+from .api import ConfiguredLegacyApi
 
 
 class ContxtService(ConfiguredLegacyApi):
@@ -24,7 +24,7 @@ class ContxtService(ConfiguredLegacyApi):
 
     def get_organizations(self) -> List[Organization]:
         resp = self.get("organizations")
-        return [Organization.from_api(rec) for rec in resp]
+        return Organization.from_api_many(resp)
 
     def get_organization_with_name(self, name: str) -> Optional[Organization]:
         for organization in self.get_organizations():
@@ -43,7 +43,7 @@ class ContxtService(ConfiguredLegacyApi):
 
     def get_users_for_organization(self, organization_id: str) -> List[User]:
         resp = self.get(f"organizations/{organization_id}/users")
-        return [User.from_api(rec) for rec in resp]
+        return User.from_api_many(resp)
 
     def get_config(self, configuration_id: str) -> Config:
         resp = self.get(f"configurations/{configuration_id}")
@@ -61,12 +61,12 @@ class ContxtService(ConfiguredLegacyApi):
     def get_config_values(self, config_id: str, environment_id: str) -> List[ConfigValue]:
         params = {"environment": environment_id}
         resp = self.get(f"configurations/{config_id}/values", params=params)
-        return [ConfigValue.from_api(rec) for rec in resp]
+        return ConfigValue.from_api_many(resp)
 
     def get_config_values_for_worker(self, worker_id: str, environment_id: str) -> List[ConfigValue]:
         params = {"environment": environment_id}
         resp = self.get(f"workers/{worker_id}/configurations/values", params=params)
-        return [ConfigValue.from_api(rec) for rec in resp]
+        return ConfigValue.from_api_many(resp)
 
     def start_worker_run(self, client_id: str) -> Dict:
         data = {"start_time": datetime.now()}
@@ -82,7 +82,7 @@ class ContxtService(ConfiguredLegacyApi):
 
     def get_projects(self) -> List[Project]:
         resp = self.get("stacks")
-        return [Project.from_api(rec) for rec in resp]
+        return Project.from_api_many(resp)
 
     def get_project(self, project_id) -> Project:
         resp = self.get(f"stacks/{project_id}")
@@ -91,14 +91,14 @@ class ContxtService(ConfiguredLegacyApi):
     def get_services(self, project_id: int = None) -> List[Service]:
         if project_id:
             resp = self.get(f"stacks/{project_id}")
-            return [Service.from_api(rec) for rec in resp["Services"]]
+            return Service.from_api_many(resp["Services"])
         else:
             resp = self.get("services")
-            return [Service.from_api(rec) for rec in resp]
+            return Service.from_api_many(resp)
 
     def get_edge_nodes(self, organization_id: str, project_id: int) -> List[EdgeNode]:
         resp = self.get(f"organizations/{organization_id}/stacks/{project_id}/edgenodes")
-        return [EdgeNode.from_api(rec) for rec in resp]
+        return EdgeNode.from_api_many(resp)
 
     def get_service(self, service_id: int) -> Service:
         resp = self.get(f"services/{service_id}")
@@ -15,7 +15,7 @@ class ContxtDeploymentService(ConfiguredLegacyApi):
         super().__init__(env_config=env_config, **kwargs)
 
     def get_clusters(self, organization_id: str) -> List[Cluster]:
-        return [Cluster.from_api(rec) for rec in self.get(f"{organization_id}/clusters")]
+        return Cluster.from_api_many(self.get(f"{organization_id}/clusters"))
 
     def get_cluster(self, organization_id: str, cluster_slug: str) -> Cluster:
         resp = self.get(f"{organization_id}/clusters/{cluster_slug}")
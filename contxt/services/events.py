@@ -2,9 +2,9 @@ from typing import Iterable, List, Optional
 
 from ..auth import Auth
 from ..models.events import Event, EventDefinition, EventType, TriggeredEvent
+from ..utils.config import ContxtEnvironmentConfig
 from .api import ConfiguredLegacyApi
 from .pagination import PagedRecords, PageOptions
-from ..utils.config import ContxtEnvironmentConfig
 
 
 class EventsService(ConfiguredLegacyApi):
@@ -59,7 +59,7 @@ class EventsService(ConfiguredLegacyApi):
 
     def get_events_for_client(self, client_id: str) -> List[Event]:
         resp = self.get(f"clients/{client_id}/events")
-        return [Event.from_api(rec) for rec in resp]
+        return Event.from_api_many(resp)
 
     def get_event_definition(self, event_id: str) -> EventDefinition:
         resp = self.get(f"events/{event_id}/definition")
@@ -91,4 +91,4 @@ class EventsService(ConfiguredLegacyApi):
 
     def get_triggered_events_for_field(self, field_id: str) -> List[TriggeredEvent]:
         resp = self.get(f"fields/{field_id}/triggered")
-        return [TriggeredEvent.from_api(rec) for rec in resp]
+        return TriggeredEvent.from_api_many(resp)
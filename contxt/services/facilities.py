@@ -18,7 +18,7 @@ class FacilitiesService(ConfiguredLegacyApi):
             else "facilities"
         )
         resp = self.get(uri)
-        return [Facility.from_api(rec) for rec in resp]
+        return Facility.from_api_many(resp)
 
     def get_facility_with_id(self, facility_id: int) -> Facility:
         resp = self.get(f"facilities/{facility_id}")
@@ -1,7 +1,10 @@
+import heapq
 from collections import defaultdict
 from copy import deepcopy
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from itertools import chain, groupby, islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
 from requests import Request
 
@@ -21,8 +24,8 @@ from ..models.iot import (
     Window,
 )
 from ..utils import is_datetime_aware, make_logger
-from ..utils.object_mapper import ObjectMapper
 from ..utils.config import ContxtEnvironmentConfig
+from ..utils.object_mapper import ObjectMapper
 from .api import ConfiguredLegacyApi
 from .pagination import DataPoint, PagedRecords, PagedTimeSeries, PageOptions
 
@@ -163,6 +166,23 @@ class IotService(ConfiguredLegacyApi):
             per_page=per_page,
         )
 
+    def get_time_series_rows_for_fields(
+        self,
+        fields: List[Field],
+        start_time: datetime = None,
+        window: Window = Window.RAW,
+        end_time: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Get rows of the time series data of each field in `fields`, as in
+        `{"timestamp": t, field_human_name: value, ...}`, streamed page by page"""
+        series = {
+            f.field_human_name: self.get_time_series_for_field(
+                field=f, start_time=start_time, window=window, end_time=end_time
+            )
+            for f in fields
+        }
+        return merge_time_series(series)  # type: ignore
+
     def get_time_series_for_fields(
         self,
         fields: List[Field],
@@ -242,18 +262,14 @@ class IotService(ConfiguredLegacyApi):
 
     def get_unprovisioned_fields_for_feed_id(self, feed_id: int) -> List[UnprovisionedField]:
         """Get unprovisioned fields for feed with id `feed_id`"""
-        return [
-            UnprovisionedField.from_api(rec) for rec in self.get(f"feeds/{feed_id}/fields/unprovisioned")
-        ]
+        return UnprovisionedField.from_api_many(self.get(f"feeds/{feed_id}/fields/unprovisioned"))
 
     def get_unprovisioned_fields_for_feed_key(self, feed_key: str) -> Optional[List[UnprovisionedField]]:
         """Get unprovisioned fields for feed with key `feed_key`"""
         feed = self.get_feed_with_key(key=feed_key)
         if not feed:
             return None
-        return [
-            UnprovisionedField.from_api(rec) for rec in self.get(f"feeds/{feed.id}/fields/unprovisioned")
-        ]
+        return UnprovisionedField.from_api_many(self.get(f"feeds/{feed.id}/fields/unprovisioned"))
 
     def get_field_grouping(self, id: str) -> FieldGrouping:
         """Get field grouping with id `id`"""
@@ -420,3 +436,21 @@ class IotDataService(ConfiguredLegacyApi):
         if epoch:
             return datetime.fromtimestamp(epoch, tz=timezone.utc)
         return None
+
+
+def merge_time_series(series: Mapping[str, Iterable[DataPoint]]) -> Iterator[Dict[str, Any]]:
+    """Merges time series (each sorted by time) into rows of their values at each time, as in
+    `{"timestamp": t, name: value, ...}`, holding only the current point of each series"""
+    iterators = {name: iter(points) for name, points in series.items()}
+    # Peek at the first points, since series may be sorted in descending order
+    heads = {name: list(islice(points, 2)) for name, points in iterators.items()}
+    descending = any(len(head) == 2 and head[0][0] > head[1][0] for head in heads.values())
+
+    def tagged(name: str) -> Iterator[Tuple[datetime, str, Any]]:
+        return ((t, name, v) for t, v in chain(heads[name], iterators[name]))
+
+    merged = heapq.merge(*(tagged(name) for name in iterators), key=itemgetter(0), reverse=descending)
+    for t, points in groupby(merged, key=itemgetter(0)):
+        row = {"timestamp": t}
+        row.update((name, v) for _, name, v in points)
+        yield row
@@ -1,16 +1,10 @@
 from sgqlc.operation import Operation
 
-from contxt.services.base_graph_service import BaseGraphService, SchemaMissingException
-
-try:
-    from contxt.schemas.nionic.nionic_schema import nionic as schema
-    from contxt.schemas.nionic.nionic_schema import Facility
-except ImportError:
-    raise SchemaMissingException('[ERROR] Schema is not generated for GraphQL -- run `contxt init` to '
-                                 'initialize then re-run the command')
-
+from contxt.services.base_graph_service import BaseGraphService, LazySchema
 from contxt.utils.config import ContxtEnvironmentConfig
 
+schema = LazySchema('contxt.schemas.nionic.nionic_schema', 'nionic', prefer_trimmed=True)
+
 
 class NionicService(BaseGraphService):
 
@@ -1,26 +1,22 @@
+from __future__ import annotations
+
 from datetime import datetime, timedelta
-from dateutil import parser
-from typing import Any, Dict, Iterable, List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
 
 import pandas as pd
+from dateutil import parser
 from sgqlc.operation import Operation
 
-from ..models.iot import (
-    MetricField,
-    MetricWindow,
-    FacilityMetricField,
-    IOTRequest
-)
+from ..models.iot import FacilityMetricField, IOTRequest, MetricField, MetricWindow
 from ..utils import make_logger
 from ..utils.config import ContxtEnvironmentConfig
-from .base_graph_service import BaseGraphService, SchemaMissingException
+from .base_graph_service import BaseGraphService, LazySchema
+
+if TYPE_CHECKING:
+    # the generated types, for annotations only
+    from contxt.schemas.nionic import nionic_schema as schema_types
 
-try:
-    import contxt.schemas.nionic.nionic_schema as schema
-    from contxt.schemas.nionic.nionic_schema import MetricData
-except ImportError:
-    raise SchemaMissingException('[ERROR] Schema is not generated for GraphQL -- run `contxt init` to '
-                                 'initialize then re-run the command')
+schema = LazySchema('contxt.schemas.nionic.nionic_schema', prefer_trimmed=True)
 
 logger = make_logger(__name__)
 
@@ -47,7 +43,7 @@ class IotNionicHelper(BaseGraphService):
 
         return parsed_data, time_index
 
-    def get_latest_states(self, fields: List[MetricField]) -> Dict[str, schema.MetricData]:
+    def get_latest_states(self, fields: List[MetricField]) -> Dict[str, schema_types.MetricData]:
         op = Operation(schema.Query)
 
         field_aliases = []
@@ -163,9 +159,10 @@ class IotNionicHelper(BaseGraphService):
         return all_paged_data
 
     def get_iot_data(self, field: MetricField, start_time: datetime, end_time: datetime,
-                     window: MetricWindow = MetricWindow.MINUTELY, order_by=schema.MetricDataOrderBy.TIME_ASC,
-                     aggregation: schema.MetricDataAggregationMethod = 'AVG'
-                     ) -> schema.MetricData:
+                     window: MetricWindow = MetricWindow.MINUTELY, order_by=None,
+                     aggregation: schema_types.MetricDataAggregationMethod = 'AVG'
+                     ) -> schema_types.MetricData:
+        order_by = order_by or schema.MetricDataOrderBy.TIME_ASC
         op = Operation(schema.Query)
         if window is not MetricWindow.RAW:
             metric_data = op.metric_data(label=field.label, source_id=field.sourceId, window=window.value,
@@ -184,7 +181,8 @@ class IotNionicHelper(BaseGraphService):
 
         return (op + data).metric_data
 
-    def get_facility_metric_data(self, field: FacilityMetricField, start_time: datetime, end_time: datetime) -> schema.MetricData:
+    def get_facility_metric_data(self, field: FacilityMetricField, start_time: datetime,
+                                 end_time: datetime) -> schema_types.MetricData:
         op = Operation(schema.Query)
 
         metric_data = op.facility(id=field.facilityId).metric_data(label=field.label,
@@ -201,9 +199,9 @@ class IotNionicHelper(BaseGraphService):
         return (op + data).facility.metric_data
 
     def get_iot_data_series(self, field: MetricField, start_time: datetime, end_time: datetime,
-                               window: MetricWindow = MetricWindow.MINUTELY, order_by=schema.MetricDataOrderBy.TIME_ASC,
-                               aggregation: str = 'AVG'
-                               ) -> pd.Series:
+                            window: MetricWindow = MetricWindow.MINUTELY, order_by=None,
+                            aggregation: str = 'AVG'
+                            ) -> pd.Series:
 
         if aggregation not in schema.MetricDataAggregationMethod.__choices__:
             raise IOTRequestException(f'Aggregation method {aggregation} not a valid aggregation method')
@@ -3,7 +3,7 @@ from datetime import datetime
 from math import ceil
 from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar, Union
 
-from ..models import Parsers
+from ..models import ApiObject, Parsers
 from ..utils.object_mapper import ObjectMapper
 from .api import Api
 
@@ -86,7 +86,17 @@ class PagedRecords(Generic[T]):
         self.url = url
         self.params = params or {}
         self.options = options or PageOptions()
-        self.record_parser = record_parser or (lambda x: x)  # type: ignore
+        self.record_parser: Callable[[Record], T] = record_parser or (lambda x: x)  # type: ignore
+        # parse whole pages at once, when records are parsed by an ApiObject's from_api
+        parser_class = getattr(record_parser, "__self__", None)
+        if (
+            isinstance(parser_class, type)
+            and issubclass(parser_class, ApiObject)
+            and record_parser == parser_class.from_api
+        ):
+            self._records_parser: Callable[[List[Record]], List[T]] = parser_class.from_api_many
+        else:
+            self._records_parser = lambda records: [self.record_parser(rec) for rec in records]
 
         # Workaround for inconsistent pagination attributes
         self.is_v2 = is_v2
@@ -124,12 +134,13 @@ class PagedRecords(Generic[T]):
 
     def _get_page(self, index: int) -> Page:
         resp = self.api.get(uri=self.url, params={**self.params, **self.options.to_api(index)})
+        # NOTE: records are left as they are, since they are parsed by `record_parser` anyway
         if self.is_v2:
-            page = ObjectMapper.tree_to_object(resp, PageV2)
+            page = ObjectMapper.tree_to_object(resp, PageV2, shallow=True)
         else:
-            page = ObjectMapper.tree_to_object(resp, Page)
+            page = ObjectMapper.tree_to_object(resp, Page, shallow=True)
         # NOTE: this post processing is not ideal, but works for now
-        page.records = [self.record_parser(rec) for rec in page.records]  # type: ignore
+        page.records = self._records_parser(page.records)  # type: ignore
         return page
 
     def get_page(self, index: int, force: bool = False) -> Page:
@@ -206,7 +217,7 @@ class PagedTimeSeries:
 
     def _get_page(self, url: str, params: Optional[Dict] = None) -> TimeSeriesPage:
         resp = self.api.get(url, params=params)
-        page = ObjectMapper.tree_to_object(resp, TimeSeriesPage)
+        page = ObjectMapper.tree_to_object(resp, TimeSeriesPage, shallow=True)
         # NOTE: this post processing is not ideal, but works for now
         page.records = [self._record_parser(rec) for rec in page.records]  # type: ignore
         return page
@@ -0,0 +1,313 @@
+"""Fast-loading artifacts for generated GraphQL schemas.
+
+Executing a full generated sgqlc schema defines every type of the GraphQL API, most of
+which the SDK never touches. `contxt init` therefore also generates a trimmed schema
+module, containing only the types reachable from the root fields (and types) the SDK's
+services use. A manifest records the content hash of the introspection dump it was built
+from and a content fingerprint of the SDK's source, which `contxt init` checks to skip
+regenerating unchanged schemas. So that loading a schema stays cheap, the trimmed module
+is only used while the dump's size, mtime and hash, and the SDK's version, match the manifest.
+"""
+import ast
+import json
+import os
+from hashlib import sha256
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from .. import __version__
+from ..utils import make_logger
+
+logger = make_logger(__name__)
+
+TRIMMED_SUFFIX = "_trimmed"
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Always keep GraphQL's builtin scalars, as directives and codegen rely on them
+BUILTIN_SCALARS = ("Boolean", "Float", "ID", "Int", "String")
+
+# Memoized module resolutions, so the manifest is read at most once per process
+_resolved_modules: Dict[str, str] = {}
+
+
+def file_digest(path: str) -> str:
+    """Returns the sha256 hex digest of the file at `path`"""
+    digest = sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def text_digest(text: str) -> str:
+    """Returns the sha256 hex digest of `text`, as if written to a file as utf8"""
+    return sha256(text.encode("utf8")).hexdigest()
+
+
+def _sdk_package_dir(package_dir: Optional[str] = None) -> Path:
+    return Path(package_dir or Path(__file__).parent.parent)
+
+
+def _sdk_sources(package_dir: Path) -> Iterator[Path]:
+    for path in package_dir.rglob("*.py"):
+        if "schemas" not in path.relative_to(package_dir).parts:
+            yield path
+
+
+def sdk_fingerprint(package_dir: Optional[str] = None) -> str:
+    """Returns a fingerprint of the content of the SDK's source files, used by `contxt init` to
+    detect trimmed schemas generated for a different version of the services"""
+    root = _sdk_package_dir(package_dir)
+    digest = sha256()
+    for path in sorted(_sdk_sources(root)):
+        digest.update(f"{path.relative_to(root).as_posix()}\0".encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def source_stat(json_schema_filepath: str) -> Dict[str, int]:
+    """Returns the size and mtime of the introspection dump, as recorded in the manifest"""
+    stat = os.stat(json_schema_filepath)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def manifest_path(python_schema_filepath: str) -> str:
+    return f"{os.path.splitext(python_schema_filepath)[0]}{MANIFEST_SUFFIX}"
+
+
+def trimmed_path(python_schema_filepath: str) -> str:
+    base, ext = os.path.splitext(python_schema_filepath)
+    return f"{base}{TRIMMED_SUFFIX}{ext}"
+
+
+def read_manifest(python_schema_filepath: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(manifest_path(python_schema_filepath), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_manifest(python_schema_filepath: str, manifest: Dict[str, Any]) -> None:
+    with open(manifest_path(python_schema_filepath), "w") as f:
+        json.dump(manifest, f, sort_keys=True, indent=2)
+
+
+def collect_schema_usage(package_dir: Optional[str] = None) -> Tuple[Set[str], Set[str]]:
+    """Statically scans the SDK's source for the GraphQL schema it uses. Returns the python
+    names of the fields selected directly on an `Operation` (i.e. root query and mutation
+    fields), and the names of types referenced directly on a schema (i.e. `schema.SomeInput`).
+    """
+    root_fields: Set[str] = set()
+    type_names: Set[str] = set()
+    for path in _sdk_sources(_sdk_package_dir(package_dir)):
+        try:
+            tree = ast.parse(path.read_text(encoding="utf8"))
+        except (SyntaxError, UnicodeDecodeError):
+            continue
+
+        schema_names = {"schema"}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom):
+                schema_names.update(a.asname or a.name for a in node.names if a.name == "schema")
+            elif isinstance(node, ast.Assign) and _is_call_to(node.value, "LazySchema"):
+                schema_names.update(t.id for t in node.targets if isinstance(t, ast.Name))
+
+        for func in ast.walk(tree):
+            if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            ops = {
+                t.id
+                for node in ast.walk(func)
+                if isinstance(node, ast.Assign) and _is_call_to(node.value, "Operation")
+                for t in node.targets
+                if isinstance(t, ast.Name)
+            }
+            # also operations passed to helpers, i.e. `def add_mutation(op: Operation, ...)`
+            ops.update(a.arg for a in func.args.args if _is_name(a.annotation, "Operation"))
+            for node in ast.walk(func):
+                if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+                    if node.value.id in ops:
+                        root_fields.add(node.attr)
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+                if node.value.id in schema_names:
+                    type_names.add(node.attr)
+    return root_fields, type_names
+
+
+def _is_call_to(node: ast.AST, name: str) -> bool:
+    return isinstance(node, ast.Call) and _is_name(node.func, name)
+
+
+def _is_name(node: Optional[ast.AST], name: str) -> bool:
+    return (isinstance(node, ast.Name) and node.id == name) or (
+        isinstance(node, ast.Attribute) and node.attr == name
+    )
+
+
+def _named_type(ref: Dict[str, Any]) -> str:
+    while ref.get("ofType"):
+        ref = ref["ofType"]
+    return ref["name"]
+
+
+def trim_schema(
+    schema: Dict[str, Any], root_fields: Iterable[str], type_names: Iterable[str]
+) -> Dict[str, Any]:
+    """Trims an introspected `schema` to the types reachable from the query and mutation
+    fields whose python name is in `root_fields`, and from the types in `type_names`"""
+    from sgqlc.types import BaseItem
+
+    root_fields = set(root_fields)
+    types_by_name = {t["name"]: t for t in schema["types"]}
+    root_type_names = [
+        (schema.get(k) or {}).get("name") for k in ("queryType", "mutationType", "subscriptionType")
+    ]
+
+    # Keep only the used fields of the root operation types
+    roots: Dict[str, Dict[str, Any]] = {}
+    for name in root_type_names[:2]:
+        if name is not None and name in types_by_name:
+            t = types_by_name[name]
+            fields = [f for f in t["fields"] if BaseItem._to_python_name(f["name"]) in root_fields]
+            if fields:
+                roots[name] = {**t, "fields": fields}
+
+    # Walk the type graph from the roots. Note the implementations of an interface are not
+    # followed, otherwise `Node` would pull in every type of the schema.
+    pending = [*roots, *type_names, *BUILTIN_SCALARS]
+    pending.extend(_named_type(a["type"]) for d in schema.get("directives") or [] for a in d["args"])
+    keep: Set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name in keep or name not in types_by_name or name in root_type_names and name not in roots:
+            continue
+        keep.add(name)
+        t = roots.get(name) or types_by_name[name]
+        for f in t.get("fields") or []:
+            pending.append(_named_type(f["type"]))
+            pending.extend(_named_type(a["type"]) for a in f.get("args") or [])
+        pending.extend(_named_type(f["type"]) for f in t.get("inputFields") or [])
+        pending.extend(i["name"] for i in t.get("interfaces") or [])
+        if t["kind"] == "UNION":
+            pending.extend(p["name"] for p in t.get("possibleTypes") or [])
+
+    types = []
+    for t in schema["types"]:
+        name = t["name"]
+        if name.startswith("__"):
+            types.append(t)
+        elif name in keep:
+            t = roots.get(name, t)
+            if t.get("possibleTypes"):
+                t = {**t, "possibleTypes": [p for p in t["possibleTypes"] if p["name"] in keep]}
+            types.append(t)
+
+    trimmed = {**schema, "types": types}
+    for key, name in zip(("queryType", "mutationType", "subscriptionType"), root_type_names):
+        if name is not None and name not in keep:
+            trimmed[key] = None
+    return trimmed
+
+
+def generate_schema_modules(
+    schema_name: str, json_schema_filepath: str, python_schema_filepath: str
+) -> None:
+    """Generates the sgqlc schema module `python_schema_filepath` from the introspection dump
+    `json_schema_filepath`, along with its trimmed module and manifest"""
+    # codegen pulls in graphql-core, so only import it when generating schemas
+    from sgqlc.codegen.schema import CodeGen, load_schema
+
+    with open(json_schema_filepath, "r") as json_file:
+        schema = load_schema(json_file)
+    with open(python_schema_filepath, "w") as schema_file:
+        CodeGen(schema_name, schema, schema_file.write, docstrings=True).write()
+
+    root_fields, type_names = collect_schema_usage()
+    trimmed = trim_schema(schema, root_fields, type_names)
+    with open(trimmed_path(python_schema_filepath), "w") as schema_file:
+        CodeGen(schema_name, trimmed, schema_file.write, docstrings=False).write()
+    write_manifest(
+        python_schema_filepath,
+        {
+            "source_hash": file_digest(json_schema_filepath),
+            **source_stat(json_schema_filepath),
+            "sdk_fingerprint": sdk_fingerprint(),
+            "sdk_version": __version__,
+            "types": len(schema["types"]),
+            "trimmed_types": len(trimmed["types"]),
+        },
+    )
+    logger.info(
+        f"Trimmed schema {schema_name} from {len(schema['types'])} to {len(trimmed['types'])} types"
+    )
+
+
+def is_up_to_date(python_schema_filepath: str, source_hash: str) -> bool:
+    """Returns if the schema modules at `python_schema_filepath` were generated from an
+    introspection dump with hash `source_hash`, for the current SDK's services. This hashes
+    the SDK's source, so is only meant for `contxt init`."""
+    manifest = read_manifest(python_schema_filepath)
+    return (
+        manifest is not None
+        and manifest.get("source_hash") == source_hash
+        and manifest.get("sdk_fingerprint") == sdk_fingerprint()
+        and os.path.exists(python_schema_filepath)
+        and os.path.exists(trimmed_path(python_schema_filepath))
+    )
+
+
+def is_current(python_schema_filepath: str, json_schema_filepath: str) -> bool:
+    """Returns if the trimmed schema at `python_schema_filepath` was generated from the
+    introspection dump `json_schema_filepath` as it is now, by this version of the SDK. Unlike
+    `is_up_to_date`, this does not hash the SDK's source: the dump is only hashed once its size
+    and mtime match the manifest. Installs without a version (i.e. from a git checkout) may
+    have changed services, so their trimmed schemas are never current."""
+    if __version__ == "unknown":
+        return False
+    manifest = read_manifest(python_schema_filepath)
+    try:
+        stat = source_stat(json_schema_filepath)
+    except OSError:
+        return False
+    return (
+        manifest is not None
+        and all(manifest.get(k) == v for k, v in stat.items())
+        and manifest.get("sdk_version") == __version__
+        and os.path.exists(trimmed_path(python_schema_filepath))
+        and manifest.get("source_hash") == file_digest(json_schema_filepath)
+    )
+
+
+def discard_trimmed(module_path: str) -> None:
+    """Resolves `module_path` to the full schema from now on, i.e. once its trimmed schema
+    turned out to lack a type"""
+    _resolved_modules[module_path] = module_path
+
+
+def resolve_schema_module(module_path: str) -> str:
+    """Returns the module path of the up-to-date trimmed schema for `module_path`, if one
+    exists, otherwise `module_path` itself"""
+    if module_path in _resolved_modules:
+        return _resolved_modules[module_path]
+
+    resolved = module_path
+    try:
+        spec = find_spec(module_path)
+    except ImportError:
+        spec = None
+    if spec is not None and spec.origin:
+        json_schema_filepath = f"{os.path.splitext(spec.origin)[0]}.json"
+        if os.path.exists(json_schema_filepath) and read_manifest(spec.origin):
+            if is_current(spec.origin, json_schema_filepath):
+                resolved = f"{module_path}{TRIMMED_SUFFIX}"
+            else:
+                logger.warning(
+                    f"Trimmed schema for {module_path} is stale, run `contxt init` to refresh it"
+                )
+
+    _resolved_modules[module_path] = resolved
+    return resolved
@@ -7,7 +7,6 @@ from contxt.services.api import ConfiguredLegacyApi
 from contxt.utils import make_logger
 from contxt.utils.config import ContxtEnvironmentConfig
 
-
 logger = make_logger(__name__)
 
 
@@ -25,7 +24,7 @@ class SisService(ConfiguredLegacyApi):
         self, facility_id: int, start: Optional[date] = None, end: Optional[date] = None
     ) -> List[UtilityStatement]:
         resp = self.get(f"facilities/{facility_id}/utilities/statements")
-        statements = [UtilityStatement.from_api(rec) for rec in resp]
+        statements = UtilityStatement.from_api_many(resp)
         if start or end:
             statements = [
                 s
@@ -37,11 +36,11 @@ class SisService(ConfiguredLegacyApi):
 
     def get_meters(self, facility_id: int) -> List[UtilityMeter]:
         resp = self.get(f"facilities/{facility_id}/utilities/meters")
-        return [UtilityMeter.from_api(rec) for rec in resp]
+        return UtilityMeter.from_api_many(resp)
 
     def get_accounts(self, facility_id: int) -> List[UtilityAccount]:
         resp = self.get(f"facilities/{facility_id}/utilities/accounts")
-        return [UtilityAccount.from_api(rec) for rec in resp]
+        return UtilityAccount.from_api_many(resp)
 
     def get_statement_data(self, statement_id: int):
         return self.get(f"utilities/statements/{statement_id}/tree")
@@ -1,10 +1,10 @@
 """General utilities"""
 
 from datetime import datetime
-from functools import partial, wraps
+from functools import lru_cache, partial, wraps
 from logging import Logger, getLogger
 from time import time
-from typing import Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
 
 def make_logger(name: str, level: Optional[str] = None) -> Logger:
@@ -37,6 +37,35 @@ def timed(func: Optional[Callable] = None, *, printer: Callable[[str], None] = p
     return wrapper
 
 
+_unset = object()
+
+
+@lru_cache(maxsize=None)
+def slot_names(cls: type) -> Tuple[str, ...]:
+    """Returns the names of the attributes held in the `__slots__` of `cls` and its bases"""
+    names: Dict[str, None] = {}
+    for c in reversed(cls.__mro__):
+        slots = c.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__"):
+                names[name] = None
+    return tuple(names)
+
+
+def object_vars(obj: Any) -> Dict[str, Any]:
+    """Like `vars(obj)`, but also including the (set) attributes held in `__slots__`"""
+    names = slot_names(type(obj))
+    if not names:
+        return vars(obj)
+    d = {}
+    for name in names:
+        value = getattr(obj, name, _unset)
+        if value is not _unset:
+            d[name] = value
+    d.update(getattr(obj, "__dict__", {}))
+    return d
+
+
 # FIXME: does not handle nested dictionaries
 def dict_diff(d1: Dict, d2: Dict) -> Dict:
     """Compute the set difference `d1` - `d2`"""
@@ -0,0 +1,115 @@
+"""In-memory caches"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Set
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires_at: float
+    tags: frozenset
+
+
+class TTLCache:
+    """Thread-safe cache whose entries expire `default_ttl` seconds after being set (unless
+    given their own ttl). Entries can be tagged, to invalidate related entries together. Once
+    `max_size` entries are cached, the least recently set entry is evicted."""
+
+    _missing = object()
+
+    def __init__(
+        self,
+        default_ttl: float = 60.0,
+        max_size: Optional[int] = 1024,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._keys_by_tag: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self.clock():
+                self._remove(key)
+                self.stats.expirations += 1
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return default
+            self.stats.hits += 1
+            return entry.value
+
+    def set(
+        self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[Hashable] = ()
+    ) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry = self._entries[key] = _Entry(value, self.clock() + ttl, frozenset(tags))
+            for tag in entry.tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+            while self.max_size is not None and len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[], Any],
+        ttl: Optional[float] = None,
+        tags: Iterable[Hashable] = (),
+    ) -> Any:
+        """Returns the cached value for `key`, otherwise caches and returns `load()`"""
+        value = self.get(key, self._missing)
+        if value is self._missing:
+            value = load()
+            self.set(key, value, ttl=ttl, tags=tags)
+        return value
+
+    def invalidate(self, *tags: Hashable) -> int:
+        """Removes the entries with any of `tags`, returning how many were removed"""
+        with self._lock:
+            keys = set().union(*(self._keys_by_tag.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._remove(key)
+            self.stats.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._keys_by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
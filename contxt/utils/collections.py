@@ -1,5 +1,5 @@
 from collections import defaultdict
-from typing import Callable, Dict, Iterable, Iterator, List, TypeVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
 
 T = TypeVar("T")
 U = TypeVar("U")
@@ -28,3 +28,81 @@ def partition_by(iterable: Iterable[T], key: Callable[[T], U]) -> Dict[U, List[T
 
 def unique(lst: List) -> bool:
     return len(lst) == len(set(lst))
+
+
+class VersionedList(List[T]):
+    """List counting its changes in `version`, so indexes over it know when to rebuild"""
+
+    version = 0
+
+
+def _versioned(name: str) -> Callable:
+    method = getattr(list, name)
+
+    def mutate(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    mutate.__name__ = name
+    return mutate
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(VersionedList, _name, _versioned(_name))
+
+
+class Indexed:
+    """Mixin for dataclasses to look up items of their lists through indexes (i.e. by slug),
+    built on first use. Lists assigned to attributes are wrapped in a `VersionedList`, so indexes
+    are rebuilt whenever their list is changed or replaced. Call `invalidate_indexes` after
+    changing the keys of items in place."""
+
+    def _index(self, name: str, items: Optional[List[T]], key: Callable[[T], U]) -> Dict[U, T]:
+        """Index of `items` by `key`, keeping the first item of each key (like a linear scan)"""
+        return self._get_index(name, items, key, many=False)
+
+    def _multi_index(
+        self, name: str, items: Optional[List[T]], key: Callable[[T], U]
+    ) -> Dict[U, List[T]]:
+        """Index of `items` by `key`, keeping all the items of each key, in order"""
+        return self._get_index(name, items, key, many=True)
+
+    def _get_index(self, name: str, items: Optional[List[T]], key: Callable[[T], U], many: bool) -> Dict:
+        items = items or []
+        indexes = self.__dict__.setdefault("_indexes", {})
+        # lists that were not assigned as attributes are not versioned, so only their length is known
+        signature = (id(items), getattr(items, "version", None), len(items))
+        cached = indexes.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        index: Dict = {}
+        for item in items:
+            if many:
+                index.setdefault(key(item), []).append(item)
+            else:
+                index.setdefault(key(item), item)
+        indexes[name] = (signature, index)
+        return index
+
+    def invalidate_indexes(self) -> None:
+        self.__dict__.pop("_indexes", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self.__dict__.pop("_indexes", None)
+        if type(value) is list:
+            value = VersionedList(value)
+        super().__setattr__(name, value)
@@ -1,21 +1,35 @@
+import hashlib
+import logging
+import os
+import pickle
+from dataclasses import MISSING, dataclass, field, fields, is_dataclass
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, get_args, get_type_hints
+
+import numpy as np
 import pytz
 import yaml
-from datetime import datetime
-from yaml import load, SafeLoader, YAMLError, safe_dump
+from marshmallow import EXCLUDE, Schema
 from marshmallow_dataclass import class_schema
-from marshmallow import EXCLUDE, INCLUDE
-import numpy as np
-import logging
-
-from dataclasses import dataclass, field
-from enum import Enum
-from typing import Optional, ForwardRef, List, Dict, Any
+from yaml import YAMLError, load, safe_dump
 
 from contxt.models.iot import MetricField
+from contxt.utils.collections import Indexed
+from contxt.utils.files import atomic_write
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(format='[%(module)s %(levelname)s:%(asctime)s] %(message)s', level=logging.INFO)
 
+# the C implementations of the YAML loaders (from libyaml) are much faster, when available
+YamlLoader = getattr(yaml, 'CLoader', yaml.Loader)
+YamlSafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# bump when the format of the binary config caches changes
+CONFIG_CACHE_VERSION = 1
+
 
 class ProjectConfigException(Exception):
     pass
@@ -152,15 +166,13 @@ class RateFetchConfig:
 
 
 @dataclass
-class RateConfig:
+class RateConfig(Indexed):
     quantileStates: Optional[QuantileStateConfig]
     bucketedStates: Optional[BucketedStateConfig]
     fetchInfo: List[RateFetchConfig]
 
-    def get_feed_for_type(self, type: str) -> RateFetchConfig:
-        for fetchConfig in self.fetchInfo:
-            if fetchConfig.type == type:
-                return fetchConfig
+    def get_feed_for_type(self, type: str) -> Optional[RateFetchConfig]:
+        return self._index('fetchInfo_by_type', self.fetchInfo, lambda f: f.type).get(type)
 
 
 @dataclass
@@ -192,34 +204,26 @@ class CurtailmentConfig:
 
 
 @dataclass
-class RefrigerationConfig:
+class RefrigerationConfig(Indexed):
     feedKey: str
     blastCells: Optional[List[BlastCellConfig]]
     evaporators: Optional[List[EvaporatorConfig]]
     compressors: Optional[List[CompressorConfig]]
     curtailment: Optional[CurtailmentConfig]
 
-    def get_blast_cell_with_slug(self, slug: str) -> BlastCellConfig:
-        for cell in self.blastCells:
-            if cell.slug == slug:
-                return cell
+    def get_blast_cell_with_slug(self, slug: str) -> Optional[BlastCellConfig]:
+        return self._index('blastCells_by_slug', self.blastCells, lambda c: c.slug).get(slug)
 
-    def get_evaporator_with_slug(self, slug: str) -> EvaporatorConfig:
-        for evap in self.evaporators:
-            if evap.slug == slug:
-                return evap
+    def get_evaporator_with_slug(self, slug: str) -> Optional[EvaporatorConfig]:
+        return self._index('evaporators_by_slug', self.evaporators, lambda e: e.slug).get(slug)
 
     def get_evaporators_for_facility_attribute(self, attribute_key: str, attribute_value: str) -> List[EvaporatorConfig]:
-        evap_configs = []
-        for evap in self.evaporators:
-            if evap.facilityAttributes.get(attribute_key) == attribute_value:
-                evap_configs.append(evap)
-        return evap_configs
+        index = self._multi_index(f'evaporators_by_facility_attribute:{attribute_key}', self.evaporators,
+                                  lambda e: e.facilityAttributes.get(attribute_key))
+        return list(index.get(attribute_value, []))
 
-    def get_compressor_with_slug(self, slug: str) -> CompressorConfig:
-        for comp in self.compressors:
-            if comp.slug == slug:
-                return comp
+    def get_compressor_with_slug(self, slug: str) -> Optional[CompressorConfig]:
+        return self._index('compressors_by_slug', self.compressors, lambda c: c.slug).get(slug)
 
 
 @dataclass
@@ -229,7 +233,7 @@ class Location:
 
 
 @dataclass
-class FacilityConfig:
+class FacilityConfig(Indexed):
     name: str
     slug: str
     id: int
@@ -245,19 +249,14 @@ class FacilityConfig:
     mainServices: Optional[List[ComponentConfig]] = field(default_factory=list)
 
     def get_suggestions_project_by_id(self, project_id: str):
-        for suggestion in self.suggestions:
-            if suggestion.projectId == project_id:
-                return suggestion
+        suggestions = self._index('suggestions_by_project_id', self.suggestions, lambda s: s.projectId)
+        return suggestions.get(project_id)
 
     def get_facility_component_with_slug(self, slug: str):
-        for component in self.components:
-            if component.slug == slug:
-                return component
+        return self._index('components_by_slug', self.components, lambda c: c.slug).get(slug)
 
     def get_report_with_type(self, type: str):
-        for report in self.reports:
-            if report.type == type:
-                return report
+        return self._index('reports_by_type', self.reports, lambda r: r.type).get(type)
 
     @property
     def current_facility_time(self) -> datetime:
@@ -272,24 +271,19 @@ class ReportLoadConfig:
 
 
 @dataclass
-class Config:
+class Config(Indexed):
     facilityConfigs: List[FacilityConfig]
     reportConfigs: Optional[List[ReportLoadConfig]] = field(default_factory=list)
 
-    def get_config_by_facility_id(self, facility_id: int) -> FacilityConfig:
-        for facility in self.facilityConfigs:
-            if facility.id == facility_id:
-                return facility
+    def get_config_by_facility_id(self, facility_id: int) -> Optional[FacilityConfig]:
+        return self._index('facilityConfigs_by_id', self.facilityConfigs,
+                           lambda f: f.id).get(facility_id)
 
-    def get_config_by_facility_slug(self, slug: str) -> FacilityConfig:
-        for facility in self.facilityConfigs:
-            if facility.slug == slug:
-                return facility
+    def get_config_by_facility_slug(self, slug: str) -> Optional[FacilityConfig]:
+        return self._index('facilityConfigs_by_slug', self.facilityConfigs, lambda f: f.slug).get(slug)
 
-    def get_report_config_by_type(self, type: str) -> ReportLoadConfig:
-        for report_load_config in self.reportConfigs:
-            if report_load_config.type == type:
-                return report_load_config
+    def get_report_config_by_type(self, type: str) -> Optional[ReportLoadConfig]:
+        return self._index('reportConfigs_by_type', self.reportConfigs, lambda r: r.type).get(type)
 
 
 @dataclass
@@ -341,7 +335,7 @@ class CurrentContext:
 
 
 @dataclass
-class CustomEnvironmentConfig:
+class CustomEnvironmentConfig(Indexed):
     defaults: Dict[str, Optional[str]]
     currentContext: Dict[str, CurrentContext]
     serviceConfigs: List[ContxtEnvironmentConfig]
@@ -361,24 +355,22 @@ class CustomEnvironmentConfig:
                 print(f'No context found for {service}.')
         return current_context_services
 
+    def _service_configs_by_environment(self) -> Dict[tuple, ContxtEnvironmentConfig]:
+        return self._index('serviceConfigs_by_environment', self.serviceConfigs,
+                           lambda c: (c.service, c.environment))
+
     def get_graph_environments(self) -> List[ContxtEnvironmentConfig]:
-        graph_configs = []
-        for conf in self.serviceConfigs:
-            if conf.isGraph:
-                graph_configs.append(conf)
-        return graph_configs
+        graph_configs = self._multi_index('serviceConfigs_by_graph', self.serviceConfigs,
+                                          lambda c: c.isGraph)
+        return list(graph_configs.get(True, []))
 
     def get_configs_for_service(self, service_name: str) -> List[ContxtEnvironmentConfig]:
-        configs = []
-        for service_config in self.serviceConfigs:
-            if service_config.service == service_name:
-                configs.append(service_config)
-        return configs
+        configs = self._multi_index('serviceConfigs_by_service', self.serviceConfigs,
+                                    lambda c: c.service)
+        return list(configs.get(service_name, []))
 
     def get_config_for_service_environment(self, service_name: str, environment_name: str):
-        for service_config in self.serviceConfigs:
-            if service_config.service == service_name and service_config.environment == environment_name:
-                return service_config
+        return self._service_configs_by_environment().get((service_name, environment_name))
 
     def get_service_for_current_context(self, service_name: str) -> ContxtEnvironmentConfig:
         current_env = self.currentContext.get(service_name)
@@ -386,71 +378,176 @@ class CustomEnvironmentConfig:
         if not current_env:
             raise ContextException(f'Current context not specified for {service_name}')
 
-        for service_config in self.serviceConfigs:
-            if service_config.service == service_name and service_config.environment == current_env.environment:
-                return service_config
+        service_config = self._service_configs_by_environment().get(
+            (service_name, current_env.environment))
+        if service_config:
+            return service_config
 
         raise ContextException(f'Environment not found for {service_name} with environment {current_env}')
 
     def get_cli_environment_for_auth_provider(self, auth_provider: str) -> ContxtCliEnvironmentConfig:
-        for cli_config in self.cliConfigs:
-            if cli_config.forAuthProvider == auth_provider:
-                return cli_config
+        cli_configs = self._index('cliConfigs_by_auth_provider', self.cliConfigs,
+                                  lambda c: c.forAuthProvider)
+        cli_config = cli_configs.get(auth_provider)
+        if cli_config:
+            return cli_config
 
         raise ContextException(f'CLI environment for auth provider {auth_provider} is not specified in config')
 
 
+@lru_cache(maxsize=None)
+def config_schema(config_class) -> Schema:
+    """Gets the marshmallow schema of `config_class`, built once per class and then reused"""
+    return class_schema(config_class)()
+
+
 def load_config_from_file(file='./../config.yml') -> Config:
     logger.debug(f'Loading config from file: {file}')
     with open(file, 'r') as stream:
         try:
-            config_yaml = load(stream, Loader=yaml.Loader)
+            config_yaml = load(stream, Loader=YamlLoader)
         except YAMLError as e:
             logger.error(e)
             raise
 
-    config_schema = class_schema(Config)
+    return config_schema(Config).load(config_yaml)
 
-    result = config_schema().load(config_yaml)
-    return result
 
-
-def write_config_class_to_file(file: str, obj, config_class):
+def write_config_class_to_file(file: str, obj, config_class, file_mode: Optional[int] = None):
     logger.info(f'Writing config to file: {file}')
-    with open(file, 'w') as stream:
+    with atomic_write(file, file_mode=file_mode) as stream:
         try:
-            config_schema = class_schema(config_class)()
+            schema = config_schema(config_class)
             if isinstance(obj, list):
-                result = [config_schema.dump(o) for o in obj]
+                result = [schema.dump(o) for o in obj]
             else:
-                result = config_schema.dump(obj)
+                result = schema.dump(obj)
             safe_dump(result, stream)
         except YAMLError as e:
             logger.error(e)
             raise
 
 
-def load_config_class_from_file(file: str, config_class):
+def load_config_class_from_file(file: str, config_class, cache: bool = False):
+    """Loads `config_class` from the YAML `file`. With `cache`, the loaded config is also
+    pickled under `config_cache_dir()`, and loaded from there while the file is unchanged."""
     logger.debug(f'Loading config from file: {file}')
-    with open(file, 'r') as stream:
-        try:
-            config_yaml = load(stream, Loader=yaml.SafeLoader)
-        except YAMLError as e:
-            logger.error(e)
-            raise
+    if cache:
+        return _load_cached_config_class(file, config_class)
+    with open(file, 'rb') as stream:
+        return _load_config_class_from_yaml(stream.read(), config_class)
+
+
+def _load_config_class_from_yaml(content: bytes, config_class):
+    try:
+        config_yaml = load(content, Loader=YamlSafeLoader)
+    except YAMLError as e:
+        logger.error(e)
+        raise
 
     # file is blank -- carry on
     if not config_yaml:
         return None
 
-    config_schema = class_schema(config_class)
+    return config_schema(config_class).load(config_yaml)
+
+
+def config_cache_dir() -> str:
+    """Directory of the binary config caches, owned by the SDK rather than by wherever the config
+    files are, as the caches are pickles"""
+    return os.path.join(str(Path.home()), '.contxt', 'cache')
+
 
-    result = config_schema().load(config_yaml)
-    return result
+def _trusted_cache_dir(directory: str) -> bool:
+    """Whether only the current user could have written the caches in `directory`"""
+    stat = os.stat(directory)
+    if not hasattr(os, 'getuid'):
+        return True
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+@lru_cache(maxsize=None)
+def config_class_fingerprint(config_class) -> str:
+    """Hashes the fields of `config_class` and of the dataclasses and enums they use, so cached
+    configs are not loaded into a changed class"""
+    parts, seen, pending = [], set(), [config_class]
+    while pending:
+        cls = pending.pop()
+        if cls in seen:
+            continue
+        seen.add(cls)
+        if isinstance(cls, type) and issubclass(cls, Enum):
+            parts.append(f'{cls.__module__}.{cls.__qualname__}{[(m.name, m.value) for m in cls]}')
+        elif is_dataclass(cls):
+            try:
+                hints = get_type_hints(cls)
+            except Exception:
+                hints = {}
+            parts.append(f'{cls.__module__}.{cls.__qualname__}')
+            for f in fields(cls):
+                type_ = hints.get(f.name, f.type)
+                default = f.default
+                if default is MISSING:
+                    default = getattr(f.default_factory, '__qualname__', None)
+                parts.append(f'{f.name}: {type_!r} = {default!r} {sorted(f.metadata)}')
+                pending.extend(_types_in(type_))
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+
+def _types_in(type_) -> List[Any]:
+    return [type_, *(t for arg in get_args(type_) for t in _types_in(arg))]
+
+
+def _load_cached_config_class(file: str, config_class):
+    directory = config_cache_dir()
+    path = os.path.abspath(file)
+    cache_file = os.path.join(directory, f'{hashlib.sha256(path.encode()).hexdigest()}.pickle')
+    key = (CONFIG_CACHE_VERSION, path, f'{config_class.__module__}.{config_class.__qualname__}',
+           config_class_fingerprint(config_class))
+    stat = os.stat(file)
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = None
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not _trusted_cache_dir(directory):
+            logger.debug(f'Not caching configs in {directory}, as others can write to it')
+            with open(file, 'rb') as stream:
+                return _load_config_class_from_yaml(stream.read(), config_class)
+        with open(cache_file, 'rb') as stream:
+            cached = pickle.load(stream)
+        if cached['key'] != key:
+            cached = None
+        elif cached['stat'] == stat_key:
+            return cached['config']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.debug(f'Ignoring unreadable config cache {cache_file}: {e}')
+        cached = None
+
+    with open(file, 'rb') as stream:
+        content = stream.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if cached is not None and cached['digest'] == digest:
+        # only touched since cached
+        config = cached['config']
+    else:
+        config = _load_config_class_from_yaml(content, config_class)
+
+    try:
+        with atomic_write(cache_file, 'wb', file_mode=0o600) as stream:
+            pickle.dump(
+                {'key': key, 'stat': stat_key, 'digest': digest, 'config': config},
+                stream,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+    except Exception as e:
+        logger.debug(f'Failed to write config cache {cache_file}: {e}')
+    return config
 
 
 def load_config_class_from_object(object: Dict[Any, Any], config_class, exclude_unknowns: bool = False):
-    config_schema = class_schema(config_class)
     if exclude_unknowns:
-        return config_schema().load(object, unknown=EXCLUDE)
-    return config_schema().load(object)
+        return config_schema(config_class).load(object, unknown=EXCLUDE)
+    return config_schema(config_class).load(object)
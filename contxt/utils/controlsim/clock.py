@@ -0,0 +1,73 @@
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from queue import Empty, Queue
+from typing import Any, Optional
+
+import pytz
+
+
+class Clock(ABC):
+    """Source of time for the simulator. `now` is the wall-clock time (timezone-aware, in
+    UTC), while `monotonic` is used to schedule work."""
+
+    # if time passes on its own, as opposed to only when waiting
+    realtime = True
+
+    @abstractmethod
+    def now(self) -> datetime:
+        """Gets the current time"""
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        """Gets the seconds elapsed since an arbitrary point, never going backwards"""
+
+    @abstractmethod
+    def wait(self, queue: Queue, timeout: Optional[float] = None) -> Any:
+        """Returns the next item of `queue`, waiting up to `timeout` seconds for one (or
+        indefinitely, if `None`). Raises `Empty` on timeout."""
+
+
+class SystemClock(Clock):
+    def now(self) -> datetime:
+        return datetime.now(tz=pytz.UTC)
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def wait(self, queue: Queue, timeout: Optional[float] = None) -> Any:
+        return queue.get(timeout=timeout)
+
+
+class VirtualClock(Clock):
+    """Clock that only moves forward when waited on, by jumping straight to the end of the
+    wait. Simulations can therefore fast-forward through hours of scheduled work in seconds."""
+
+    realtime = False
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.start = start or datetime.now(tz=pytz.UTC)
+        self.elapsed = 0.0
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            self.elapsed += seconds
+
+    def wait(self, queue: Queue, timeout: Optional[float] = None) -> Any:
+        try:
+            return queue.get_nowait()
+        except Empty:
+            if timeout is None:
+                # nothing would ever be put on the queue
+                raise
+            self.advance(timeout)
+            raise
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,291 @@
+import json
+import re
+import time
+from collections import Counter
+from copy import deepcopy
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from multiprocessing.managers import BaseManager
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from contxt.utils.controlsim.clock import SYSTEM_CLOCK, Clock
+from contxt.utils.controlsim.models import (
+    ControlEventSnapshot,
+    EdgeControlEventSnapshot,
+    EdgeControlEventsSnapshot,
+    StateMachineSnapshot,
+    TransitionSnapshot,
+)
+
+# Transitions of each state definition, as {definition slug: {state: {transition event: next state}}}
+StateTransitions = Dict[str, Dict[str, Dict[str, str]]]
+
+
+@dataclass
+class TransitionRecord:
+    time: datetime
+    component_slug: str
+    transition_event: str
+    previous_state: str
+    current_state: str
+
+
+@dataclass
+class FakeControlService:
+    """In-memory stand-in for the `ControlService` queries and mutations used by the
+    simulator. Control events follow the state machines of `transitions`, and stop being
+    reported to the edge once they reach one of `final_states`."""
+
+    transitions: StateTransitions
+    final_states: Iterable[str] = ()
+    clock: Clock = SYSTEM_CLOCK
+    fetch_count: int = 0
+    transition_log: List[TransitionRecord] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.final_states = set(self.final_states)
+        self._events: Dict[str, EdgeControlEventSnapshot] = {}
+        self._ids = count(1)
+        self._lock = Lock()
+
+    def add_event(
+        self,
+        component_slug: str,
+        state_definition: str,
+        current_state: str,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> str:
+        with self._lock:
+            event_id = str(next(self._ids))
+            self._events[event_id] = EdgeControlEventSnapshot(
+                componentslug=component_slug,
+                controlevent=ControlEventSnapshot(
+                    id=event_id,
+                    start_time=start_time.isoformat(),
+                    end_time=end_time.isoformat(),
+                    state_machine=StateMachineSnapshot(state_definition, current_state),
+                ),
+            )
+            return event_id
+
+    def get_event(self, control_event_id: str) -> Optional[EdgeControlEventSnapshot]:
+        with self._lock:
+            return deepcopy(self._events.get(control_event_id))
+
+    def get_transition_log(self) -> List[TransitionRecord]:
+        with self._lock:
+            return list(self.transition_log)
+
+    def set_state(self, control_event_id: str, state: str):
+        """Moves a control event to `state`, as external input would"""
+        with self._lock:
+            self._events[control_event_id].controlevent.state_machine.current_state = state
+
+    def get_edge_control_events(self) -> EdgeControlEventsSnapshot:
+        with self._lock:
+            self.fetch_count += 1
+            return EdgeControlEventsSnapshot(
+                nodes=[
+                    deepcopy(event)
+                    for event in self._events.values()
+                    if event.controlevent.state_machine.current_state not in self.final_states
+                ]
+            )
+
+    def transition_event(
+        self, control_event_id: str, transition_event: str, message: str = None
+    ) -> TransitionSnapshot:
+        with self._lock:
+            event = self._events[control_event_id]
+            state_machine = event.controlevent.state_machine
+            next_state = (
+                self.transitions.get(state_machine.state_definition, {})
+                .get(state_machine.current_state, {})
+                .get(transition_event)
+            )
+            if next_state is None:
+                raise Exception(
+                    f"Invalid transition {transition_event} from state {state_machine.current_state}"
+                )
+
+            self.transition_log.append(
+                TransitionRecord(
+                    self.clock.now(),
+                    event.componentslug,
+                    transition_event,
+                    state_machine.current_state,
+                    next_state,
+                )
+            )
+            state_machine.current_state = next_state
+            return TransitionSnapshot(control_event=deepcopy(event.controlevent))
+
+
+class FakeControlServiceManager(BaseManager):
+    """Serves `FakeControlService`s from a separate process, for the processes of a
+    `ShardedSimulator` to share one"""
+
+
+FakeControlServiceManager.register("FakeControlService", FakeControlService)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def constant_factory(value: Any) -> Callable[[], Any]:
+    """Returns a picklable factory of `value`, i.e. of a `FakeControlService` proxy for the
+    `control_service_factory` of a `ShardedSimulator`"""
+    return partial(_identity, value)
+
+
+# Root fields of the GraphQL operations served by `FakeControlApi`, with their (optional) alias
+_TRANSITION_PATTERN = re.compile(
+    r"(?:(\w+)\s*:\s*)?transitionControlEvent\s*\(\s*input\s*:\s*(\{.*?\}|\$\w+)\s*\)", re.S
+)
+_EDGE_CONTROL_EVENTS_PATTERN = re.compile(r"(?:(\w+)\s*:\s*)?edgeControlEvents\b")
+_STRING_ARG_PATTERN = r'{}\s*:\s*("(?:[^"\\]|\\.)*"|\$\w+)'
+
+
+class FakeControlApi:
+    """Local HTTP stand-in for the foundry-graph GraphQL API, backed by a `FakeControlService`.
+    It only serves the operations of the simulator, i.e. `edgeControlEvents` queries and
+    (possibly aliased) `transitionControlEvent` mutations, and counts the requests per
+    operation. Every request is delayed by `latency` seconds, to emulate the network."""
+
+    def __init__(self, control_service: FakeControlService, latency: float = 0.0):
+        self.control_service = control_service
+        self.latency = latency
+        self.requests: Counter = Counter()
+        self._lock = Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serves the API on a background thread, returning its url"""
+        api = self
+
+        class Handler(_FakeControlApiHandler):
+            pass
+
+        Handler.api = api
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, name="fake-control-api", daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.requests)
+
+    def execute(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        variables = variables or {}
+        if self.latency:
+            time.sleep(self.latency)
+
+        data: Dict[str, Any] = {}
+        errors: List[Dict[str, Any]] = []
+        for match in _EDGE_CONTROL_EVENTS_PATTERN.finditer(query):
+            self._count("edgeControlEvents")
+            events = self.control_service.get_edge_control_events()
+            data[match.group(1) or "edgeControlEvents"] = {
+                "nodes": [_edge_control_event_json(n) for n in events.nodes]
+            }
+
+        for match in _TRANSITION_PATTERN.finditer(query):
+            self._count("transitionControlEvent")
+            alias = match.group(1) or "transitionControlEvent"
+            try:
+                transition_input = _input_arg(match.group(2), variables)
+                transition = self.control_service.transition_event(
+                    control_event_id=transition_input["controlEventId"],
+                    transition_event=transition_input["transitionEvent"],
+                    message=transition_input.get("message"),
+                )
+                data[alias] = {"controlEvent": _control_event_json(transition.control_event)}
+            except Exception as e:
+                data[alias] = None
+                errors.append({"message": str(e), "path": [alias]})
+
+        if not data:
+            self._count("unsupported")
+            return {
+                "data": None,
+                "errors": [{"message": "Operation not supported by the fake control API"}],
+            }
+
+        response: Dict[str, Any] = {"data": data}
+        if errors:
+            response["errors"] = errors
+        return response
+
+    def _count(self, operation: str):
+        with self._lock:
+            self.requests[operation] += 1
+
+
+class _FakeControlApiHandler(BaseHTTPRequestHandler):
+    api: FakeControlApi
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self._respond(self.api.execute(body.get("query", ""), body.get("variables")))
+
+    def do_GET(self):
+        self._respond(self.api.stats())
+
+    def _respond(self, payload):
+        content = json.dumps(payload).encode("utf8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _input_arg(literal: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    if literal.startswith("$"):
+        return variables[literal[1:]]
+    values = {}
+    for name in ("controlEventId", "transitionEvent", "message"):
+        match = re.search(_STRING_ARG_PATTERN.format(name), literal)
+        if match:
+            value = match.group(1)
+            values[name] = variables.get(value[1:]) if value.startswith("$") else json.loads(value)
+    return values
+
+
+def _control_event_json(event: ControlEventSnapshot) -> Dict[str, Any]:
+    return {
+        "id": event.id,
+        "startTime": event.start_time,
+        "endTime": event.end_time,
+        "stateMachine": {
+            "stateDefinition": event.state_machine.state_definition,
+            "currentState": event.state_machine.current_state,
+        },
+    }
+
+
+def _edge_control_event_json(node: EdgeControlEventSnapshot) -> Dict[str, Any]:
+    control_event = _control_event_json(node.controlevent)
+    control_event["controllableComponent"] = {"facilityId": None, "slug": node.componentslug}
+    return {"componentslug": node.componentslug, "controlevent": control_event}
@@ -1,11 +1,11 @@
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, List, Dict
+from typing import Dict, List, Optional
 
 
 class SimulatedStateRunMode(Enum):
-    runUntilEndTime = 'run-until-end-time'
-    timeDelay = 'time-delay'
+    runUntilEndTime = "run-until-end-time"
+    timeDelay = "time-delay"
 
 
 @dataclass
@@ -36,3 +36,50 @@ class SimulationConfigs:
         for sim in self.simulationConfigs:
             if sim.definitionSlug == slug:
                 return sim
+
+
+@dataclass
+class StateMachineSnapshot:
+    state_definition: str
+    current_state: str
+
+
+@dataclass
+class ControlEventSnapshot:
+    id: str
+    start_time: str
+    end_time: str
+    state_machine: StateMachineSnapshot
+
+
+@dataclass
+class EdgeControlEventSnapshot:
+    """Plain (picklable) copy of an edge control event, with the fields used by the simulator"""
+
+    componentslug: str
+    controlevent: ControlEventSnapshot
+
+    @staticmethod
+    def from_api(node) -> "EdgeControlEventSnapshot":
+        event = node.controlevent
+        return EdgeControlEventSnapshot(
+            componentslug=node.componentslug,
+            controlevent=ControlEventSnapshot(
+                id=event.id,
+                start_time=event.start_time,
+                end_time=event.end_time,
+                state_machine=StateMachineSnapshot(
+                    event.state_machine.state_definition, event.state_machine.current_state
+                ),
+            ),
+        )
+
+
+@dataclass
+class EdgeControlEventsSnapshot:
+    nodes: List[EdgeControlEventSnapshot]
+
+
+@dataclass
+class TransitionSnapshot:
+    control_event: ControlEventSnapshot
@@ -0,0 +1,66 @@
+import heapq
+import itertools
+from time import monotonic
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+
+class ScheduledCall(NamedTuple):
+    key: Hashable
+    deadline: float
+    callback: Callable[[], None]
+
+
+class Scheduler:
+    """Min-heap of callbacks to run at a deadline, on a monotonic `clock`. Each callback is
+    scheduled under a key, and scheduling a key again replaces its pending callback."""
+
+    def __init__(self, clock: Callable[[], float] = monotonic):
+        self.clock = clock
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._pending: Dict[Hashable, Tuple[int, ScheduledCall]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._pending
+
+    def schedule(self, key: Hashable, deadline: float, callback: Callable[[], None]) -> None:
+        seq = next(self._counter)
+        self._pending[key] = (seq, ScheduledCall(key, deadline, callback))
+        heapq.heappush(self._heap, (deadline, seq, key))
+
+    def schedule_in(self, key: Hashable, delay: float, callback: Callable[[], None]) -> None:
+        self.schedule(key, self.clock() + delay, callback)
+
+    def cancel(self, key: Hashable) -> bool:
+        # the heap entry is discarded lazily, once it reaches the top of the heap
+        return self._pending.pop(key, None) is not None
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        pending = self._pending.get(key)
+        return pending[1].deadline if pending else None
+
+    def next_deadline(self) -> Optional[float]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[ScheduledCall]:
+        """Removes and returns the calls due by `now`, in order of their deadline"""
+        now = self.clock() if now is None else now
+        due = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, key = heapq.heappop(self._heap)
+            due.append(self._pending.pop(key)[1])
+            self._discard_stale()
+        return due
+
+    def _discard_stale(self) -> None:
+        while self._heap:
+            _, seq, key = self._heap[0]
+            pending = self._pending.get(key)
+            if pending is not None and pending[0] == seq:
+                return
+            heapq.heappop(self._heap)
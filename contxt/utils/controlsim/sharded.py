@@ -0,0 +1,305 @@
+import multiprocessing
+import os
+import time
+import traceback
+from bisect import bisect
+from collections import Counter
+from copy import deepcopy
+from datetime import datetime
+from hashlib import md5
+from queue import Empty
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pytz
+
+from contxt.utils.config import load_config_class_from_file
+from contxt.utils.controlsim.models import (
+    EdgeControlEventSnapshot,
+    EdgeControlEventsSnapshot,
+    SimulationConfigs,
+)
+from contxt.utils.controlsim.simulator import (
+    FrameworkState,
+    Simulator,
+    SimulatorException,
+    get_control_service,
+)
+from contxt.utils.controlsim.workers import TransitionMetrics
+
+
+class HashRing:
+    """Consistent hash ring (on md5) of `shards` shards, each placed at `replicas` points. Adding
+    or removing a shard only moves the keys of that shard."""
+
+    def __init__(self, shards: int, replicas: int = 100):
+        if shards < 1:
+            raise ValueError(f"At least one shard is required, got {shards}")
+        self.shards = shards
+        points = sorted(
+            (self._hash(f"{shard}:{replica}"), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._hashes = [h for h, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(md5(key.encode("utf8")).digest()[:8], "big")
+
+    def shard(self, key: str) -> int:
+        return self._shards[bisect(self._hashes, self._hash(key)) % len(self._hashes)]
+
+
+class SnapshotControlService:
+    """Control service of a shard. Serves the control events last fetched by the coordinator,
+    while running transitions against the API itself. Since a snapshot may predate a transition
+    of this shard, the transitioned state is reported until a newer snapshot comes in."""
+
+    def __init__(self, control_service, on_transition: Callable[[], None] = lambda: None):
+        self.control_service = control_service
+        self.on_transition = on_transition
+        self._snapshot = EdgeControlEventsSnapshot(nodes=[])
+        self._fetched_at = 0.0
+        # state of each control event after its latest transition, and when it completed
+        self._transitioned: Dict[str, Tuple[str, float]] = {}
+        self._lock = Lock()
+
+    def update(self, snapshot: EdgeControlEventsSnapshot, fetched_at: float):
+        with self._lock:
+            self._snapshot = snapshot
+            self._fetched_at = fetched_at
+            self._transitioned = {k: v for k, v in self._transitioned.items() if v[1] > fetched_at}
+
+    def get_edge_control_events(self) -> EdgeControlEventsSnapshot:
+        with self._lock:
+            snapshot = deepcopy(self._snapshot)
+            transitioned = dict(self._transitioned)
+        for node in snapshot.nodes:
+            if node.controlevent.id in transitioned:
+                node.controlevent.state_machine.current_state = transitioned[node.controlevent.id][0]
+        return snapshot
+
+    def transition_event(self, control_event_id: str, transition_event: str, message: str = None):
+        transition = self.control_service.transition_event(
+            control_event_id=control_event_id, transition_event=transition_event, message=message
+        )
+        with self._lock:
+            self._transitioned[control_event_id] = (
+                transition.control_event.state_machine.current_state,
+                time.time(),
+            )
+        self.on_transition()
+        return transition
+
+
+def _forward_hook(outbox, shard: int, name: str):
+    def hook(*args):
+        outbox.put(("hook", shard, name, args))
+
+    return hook
+
+
+def _run_shard(
+    shard: int,
+    definitions: List[str],
+    simulation_config: SimulationConfigs,
+    control_service_factory: Callable,
+    hook_names: List[str],
+    components_to_simulate: List[str],
+    simulator_kwargs: dict,
+    inbox,
+    outbox,
+):
+    control = SnapshotControlService(
+        control_service_factory(), on_transition=lambda: outbox.put(("resync", shard))
+    )
+    simulator = Simulator(
+        definitions,
+        simulation_config=simulation_config,
+        control_service=control,
+        event_hooks={name: _forward_hook(outbox, shard, name) for name in hook_names},
+        components_to_simulate=components_to_simulate,
+        **simulator_kwargs,
+    )
+
+    def receive():
+        while True:
+            message = inbox.get()
+            if message[0] == "events":
+                control.update(*message[1:])
+                simulator.request_fetch()
+            elif message[0] == "stop":
+                simulator.stop()
+                return
+
+    Thread(target=receive, daemon=True).start()
+    try:
+        simulator.run()
+    finally:
+        metrics = simulator.transition_metrics
+        outbox.put(("done", shard, metrics.count, list(metrics.lateness), list(metrics.durations)))
+
+
+class ShardedSimulator:
+    """Runs a `Simulator` per shard, in `shards` processes, for fleets of components too large
+    for a single simulator. Components are partitioned by a consistent hash of their slug. This
+    coordinator does the single fetch of control events, fans them out to the shards and runs
+    the event hooks, so hooks can keep state in this process.
+
+    Each shard runs transitions with its own control service, from `control_service_factory`,
+    which must be picklable (i.e. a module-level function)."""
+
+    def __init__(
+        self,
+        definitions: List[str],
+        simulator_config_filename: str = None,
+        event_hooks: dict[str, classmethod] = None,
+        components_to_simulate: List[str] = None,
+        shards: Optional[int] = None,
+        fetch_interval: float = 5.0,
+        min_fetch_interval: float = 1.0,
+        simulation_config: Optional[SimulationConfigs] = None,
+        control_service=None,
+        control_service_factory: Callable = get_control_service,
+        **simulator_kwargs,
+    ):
+        if simulation_config is None:
+            if not simulator_config_filename:
+                raise SimulatorException("Either a simulation config or its filename is required")
+            simulation_config = load_config_class_from_file(simulator_config_filename, SimulationConfigs)
+        self.definitions = definitions
+        self.simulation_config = simulation_config
+        self.event_hooks = event_hooks if event_hooks is not None else {}
+        self.components_to_simulate = components_to_simulate or []
+        self.ring = HashRing(shards or os.cpu_count() or 1)
+        self.fetch_interval = fetch_interval
+        self.min_fetch_interval = min_fetch_interval
+        self.control_service = control_service or control_service_factory()
+        self.control_service_factory = control_service_factory
+        self.simulator_kwargs = simulator_kwargs
+        self.transition_metrics = TransitionMetrics()
+        self.transitions_by_shard: Counter = Counter()
+        self.hook_invocations: Counter = Counter()
+        self.fetch_count = 0
+        # latest fetched control events, by id, passed to hooks
+        self._control_events = {}
+
+    def run(self, until: Optional[datetime] = None):
+        """Runs the shards until interrupted, or until `until`"""
+        print(f"Running {self.ring.shards} shards")
+        context = multiprocessing.get_context("spawn")
+        outbox = context.Queue()
+        inboxes = [context.Queue() for _ in range(self.ring.shards)]
+        components = [[] for _ in range(self.ring.shards)]
+        for slug in self.components_to_simulate:
+            components[self.ring.shard(slug)].append(slug)
+
+        processes = [
+            context.Process(
+                target=_run_shard,
+                name=f"simulator-shard-{shard}",
+                daemon=True,
+                args=(
+                    shard,
+                    self.definitions,
+                    self.simulation_config,
+                    self.control_service_factory,
+                    list(self.event_hooks),
+                    components[shard],
+                    self.simulator_kwargs,
+                    inboxes[shard],
+                    outbox,
+                ),
+            )
+            for shard in range(self.ring.shards)
+        ]
+        for process in processes:
+            process.start()
+
+        deadline = (
+            None
+            if until is None
+            else time.monotonic() + (until - datetime.now(tz=pytz.UTC)).total_seconds()
+        )
+        next_fetch = last_fetch = time.monotonic()
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                now = time.monotonic()
+                if now >= next_fetch:
+                    last_fetch = now
+                    next_fetch = now + self.fetch_interval
+                    self._fan_out(inboxes)
+                timeout = next_fetch if deadline is None else min(next_fetch, deadline)
+                try:
+                    message = outbox.get(timeout=max(timeout - time.monotonic(), 0))
+                except Empty:
+                    continue
+                if message[0] == "resync":
+                    next_fetch = min(next_fetch, last_fetch + self.min_fetch_interval)
+                else:
+                    self._handle(message)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print("Stopping shards")
+            for inbox in inboxes:
+                inbox.put(("stop",))
+            done = 0
+            while done < len(processes):
+                try:
+                    message = outbox.get(timeout=1)
+                except Empty:
+                    if not any(process.is_alive() for process in processes):
+                        break
+                    continue
+                if message[0] == "done":
+                    done += 1
+                if message[0] != "resync":
+                    self._handle(message)
+            for process in processes:
+                process.join()
+        print(f"Transition metrics: {self.transition_metrics.summary()}")
+
+    def _fan_out(self, inboxes):
+        fetched_at = time.time()
+        try:
+            events = self.control_service.get_edge_control_events()
+        except Exception as e:
+            print(traceback.format_exc())
+            print(f"Handled exception {e}")
+            return
+        self.fetch_count += 1
+
+        self._control_events = {node.controlevent.id: node.controlevent for node in events.nodes}
+        shard_nodes = [[] for _ in inboxes]
+        for node in events.nodes:
+            shard_nodes[self.ring.shard(node.componentslug)].append(
+                EdgeControlEventSnapshot.from_api(node)
+            )
+        for inbox, nodes in zip(inboxes, shard_nodes):
+            inbox.put(("events", EdgeControlEventsSnapshot(nodes=nodes), fetched_at))
+
+    def _handle(self, message):
+        kind, shard = message[:2]
+        if kind == "hook":
+            name, args = message[2:]
+            self.hook_invocations[name] += 1
+            if name != "_idle_tick":
+                # hooks are called with the framework state and control event
+                framework_state: FrameworkState = args[0]
+                args = (
+                    framework_state,
+                    self._control_events.get(framework_state.control_event_id, args[1]),
+                )
+            try:
+                self.event_hooks[name](*args)
+            except Exception as e:
+                print(traceback.format_exc())
+                print(f"Handled exception {e}")
+        elif kind == "done":
+            count, lateness, durations = message[2:]
+            self.transitions_by_shard[shard] += count
+            for late, duration in zip(lateness, durations):
+                self.transition_metrics.record(late, duration)
@@ -1,18 +1,27 @@
-from typing import List, Dict, Optional
 import traceback
-import pytz
-from dateutil import parser
-import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import partial
+from queue import Empty, Queue
+from typing import Dict, List, Optional
 
-from contxt.utils.config import load_config_class_from_file, ContxtEnvironmentConfig
-from contxt.utils.contxt_environment import ContxtEnvironment
-from contxt.services.control.control import ControlService
-from dataclasses import dataclass
+from dateutil import parser
 
-from contxt.utils.controlsim.models import SimulationConfigs, DefinitionConfig, SimulatedStateRunMode
+from contxt.services.control.control import ControlService
+from contxt.utils.config import ContxtEnvironmentConfig, load_config_class_from_file
+from contxt.utils.controlsim.clock import SYSTEM_CLOCK, Clock
+from contxt.utils.controlsim.models import DefinitionConfig, SimulatedStateRunMode, SimulationConfigs
+from contxt.utils.controlsim.scheduler import Scheduler
+from contxt.utils.controlsim.workers import KeyedExecutor, TransitionMetrics
+from contxt.utils.contxt_environment import ContxtEnvironment
 
 LEAD_BUFFER_TIME_MINUTES = 3
+DEFAULT_TRANSITION_WORKERS = 4
+
+# Scheduler keys of the simulator's periodic fetch and hooks, and of each component's next transition
+FETCH_KEY = '_fetch'
+HOOKS_KEY = '_hooks'
+TRANSITION_KEY = '_transition'
 
 
 class SimulatorException(Exception):
@@ -45,9 +54,11 @@ class GeneralControlEventSimulator:
                  config: DefinitionConfig,
                  control: ControlService,
                  component_slug: str,
-                 event_hooks: dict[str, classmethod]
+                 event_hooks: dict[str, classmethod],
+                 clock: Clock = SYSTEM_CLOCK,
                  ):
         self.control_event = control_event
+        self.clock = clock
         self.end_time : datetime = parser.parse(self.control_event.end_time)
         self.config = config
         self.control = control
@@ -57,7 +68,7 @@ class GeneralControlEventSimulator:
         self.next_transition_time: Optional[datetime] = None
         self.current_state: str = None
 
-    def check(self, framework_state: FrameworkState):
+    def check(self, framework_state: FrameworkState, run_hooks: bool = True):
         # grab our current (initial state)
         self.current_state = framework_state.state
 
@@ -86,7 +97,7 @@ class GeneralControlEventSimulator:
             print(f'[{self.my_component}] -- current state is {self.current_state}')
             print('Waiting on external input -- not controllable by our system')
 
-        elif self.next_transition_time is not None and datetime.now(tz=pytz.UTC) > self.next_transition_time:
+        elif self.next_transition_time is not None and self.clock.now() > self.next_transition_time:
             self.transition(framework_state)
         else:
             # if a transition time has not been set for the next transition, let's set it
@@ -94,7 +105,7 @@ class GeneralControlEventSimulator:
                 # if we're using a generic time delay
                 if state_config.delay:
                     seconds_delay = state_config.delay
-                    self.next_transition_time = datetime.now(tz=pytz.UTC) + timedelta(seconds=seconds_delay)
+                    self.next_transition_time = self.clock.now() + timedelta(seconds=seconds_delay)
                 # if we're running until the end
                 elif state_config.mode == SimulatedStateRunMode.runUntilEndTime:
                     self.next_transition_time = self.end_time
@@ -104,6 +115,16 @@ class GeneralControlEventSimulator:
                 print(f'[{self.my_component}] -- Setting timer to send {state_config.onSuccess} at '
                       f'{self.next_transition_time}')
 
+        if run_hooks:
+            self.run_hooks(framework_state)
+
+    def run_hooks(self, framework_state: FrameworkState):
+        """Calls the hook registered for the current state, unless its config is missing or it is
+        waiting on the framework's state to sync (as `check` does)"""
+        state_config = self.config.get_state_config(self.current_state)
+        if not state_config or (not state_config.controllable and framework_state.is_stale):
+            return
+
         # call any hooks we may have registered
         if self.current_state in self.event_hooks:
             func = self.event_hooks.get(self.current_state)
@@ -125,101 +146,309 @@ class GeneralControlEventSimulator:
 
 
 class Simulator:
+    """Simulates control events of the edge node. Transitions are scheduled at their deadline,
+    while control events are fetched on an adaptive cadence: every `active_fetch_interval`
+    seconds while waiting on external input, `min_fetch_interval` seconds after a transition
+    (to sync the framework's state), and up to every `idle_fetch_interval` seconds otherwise.
+    Independently of fetches, the event hooks of the current states (and the `_idle_tick` hook
+    of components without an event) are called every `hook_interval` seconds.
+
+    Transitions run on `transition_workers` threads (or inline, if 0). Transitions of a
+    component always run in order, on the same thread.
+
+    The simulation config (or its file), control service and clock can be injected, i.e. to
+    fast-forward through a simulation with a `VirtualClock` and `FakeControlService`. Unless
+    `transition_workers` is given, transitions run inline on a virtual clock, for the
+    simulation to be deterministic."""
 
     def __init__(self,
                  definitions: List[str],
-                 simulator_config_filename: str,
+                 simulator_config_filename: str = None,
                  event_hooks: dict[str, classmethod] = None,
-                 components_to_simulate: List[str] = None
+                 components_to_simulate: List[str] = None,
+                 min_fetch_interval: float = 1.0,
+                 active_fetch_interval: float = 5.0,
+                 idle_fetch_interval: float = 30.0,
+                 hook_interval: float = 5.0,
+                 transition_workers: Optional[int] = None,
+                 simulation_config: Optional[SimulationConfigs] = None,
+                 control_service: Optional[ControlService] = None,
+                 clock: Clock = SYSTEM_CLOCK,
                  ):
-        self.simulation_config: SimulationConfigs = load_config_class_from_file(simulator_config_filename, SimulationConfigs)
-        self.control_service = get_control_service()
+        if simulation_config is None:
+            if not simulator_config_filename:
+                raise SimulatorException('Either a simulation config or its filename is required')
+            simulation_config = load_config_class_from_file(simulator_config_filename, SimulationConfigs)
+        self.simulation_config: SimulationConfigs = simulation_config
+        self.control_service = control_service or get_control_service()
+        self.clock = clock
         self.definitions = definitions
-        self.event_hooks = event_hooks if not None else {}
+        self.event_hooks = event_hooks if event_hooks is not None else {}
         self.framework_reported_current_states : Dict[str, FrameworkState] = {}
         self.events_to_monitor: dict[str, GeneralControlEventSimulator] = {}
         self.components_to_simulate = components_to_simulate
-
-    # Thread for querying the controls api every 5 seconds and keeping our worker threads up to date
-    def run(self):
+        self.min_fetch_interval = min_fetch_interval
+        self.active_fetch_interval = active_fetch_interval
+        self.idle_fetch_interval = idle_fetch_interval
+        self.hook_interval = hook_interval
+        self.scheduler = Scheduler(clock=clock.monotonic)
+        # transition time currently scheduled for each component
+        self._scheduled_transitions: Dict[str, datetime] = {}
+        # times at which control events that have not started yet should be picked up
+        self._upcoming_starts: List[datetime] = []
+        if transition_workers is None:
+            transition_workers = DEFAULT_TRANSITION_WORKERS if clock.realtime else 0
+        self.transition_workers = transition_workers
+        self.transition_metrics = TransitionMetrics()
+        self._transition_executor: Optional[KeyedExecutor] = None
+        # transitions running on a worker, by component
+        self._in_flight: Dict[str, GeneralControlEventSimulator] = {}
+        # calls to run on the scheduler's thread, i.e. handling transitions completed on a worker
+        self._calls: Queue = Queue()
+        self._stopped = False
+
+    def run(self, until: Optional[datetime] = None):
+        """Runs the simulator until interrupted, or until the clock reaches `until`"""
         print('Running')
-        while True:
-            # sleep for 5 seconds before fetching more
-            time.sleep(5)
+        if self.transition_workers:
+            self._transition_executor = KeyedExecutor(self.transition_workers,
+                                                      thread_name_prefix='transition')
+        self._stopped = False
+        self.scheduler.schedule_in(FETCH_KEY, 0, self.fetch)
+        self.scheduler.schedule_in(HOOKS_KEY, 0, self.run_hooks)
+        try:
+            while not self._stopped and (until is None or self.clock.now() < until):
+                try:
+                    timeout = None if until is None else (until - self.clock.now()).total_seconds()
+                    self.run_pending(timeout)
+                except KeyboardInterrupt:
+                    break
+        finally:
+            if self._transition_executor:
+                self._transition_executor.shutdown()
+                self._transition_executor = None
+        print('Stopping simulator')
+        print(f'Transition metrics: {self.transition_metrics.summary()}')
+
+    def run_pending(self, timeout: Optional[float] = None):
+        """Waits (up to `timeout` seconds) for the next scheduled call(s) or calls from other
+        threads, and runs them"""
+        next_deadline = self.scheduler.next_deadline()
+        delay = None if next_deadline is None else max(next_deadline - self.scheduler.clock(), 0)
+        if timeout is not None:
+            delay = max(timeout, 0) if delay is None else min(delay, max(timeout, 0))
+        try:
+            self.clock.wait(self._calls, timeout=delay)()
+            while True:
+                self._calls.get_nowait()()
+        except Empty:
+            pass
+
+        for call in self.scheduler.pop_due():
             try:
-                print('Fetching control events')
-                events = self.control_service.get_edge_control_events()
-
-                active_framework_events = []
-                # iterate over the events and persist framework state to global config
-                for event in events.nodes:
-                    active_framework_events.append(event.controlevent.id)
-
-                    # if there is not a thread already for this, let's create one
-                    if event.componentslug not in self.events_to_monitor:
-                        print(f'{event.componentslug}')
-                        print(f'  {event.controlevent.state_machine.state_definition}')
-                        print(f'  {event.controlevent.state_machine.current_state}')
-                        definition_config = self.simulation_config.get_definition_config_for_slug(event.controlevent.state_machine.state_definition)
-                        if not definition_config:
-                            print(f'Definition config not found for '
-                                  f'{event.controlevent.state_machine.state_definition}')
-                            continue
-
-                        print(event.controlevent.start_time)
-                        start_time = parser.parse(event.controlevent.start_time)
-                        print(start_time, datetime.now(tz=pytz.UTC))
-                        if start_time - timedelta(minutes=LEAD_BUFFER_TIME_MINUTES) > datetime.now(tz=pytz.UTC):
-                            print(f'Have not reached start time yet...')
-                            continue
-                        self.framework_reported_current_states[event.componentslug] = \
-                            FrameworkState(is_stale=False,
-                                           control_event_id=event.controlevent.id,
-                                           end_time=parser.parse(event.controlevent.end_time),
-                                           state=event.controlevent.state_machine.current_state)
-                        self.events_to_monitor[event.componentslug] = \
-                            GeneralControlEventSimulator(config=definition_config,
-                                                         control=self.control_service,
-                                                         component_slug=event.componentslug,
-                                                         control_event=event.controlevent,
-                                                         event_hooks=self.event_hooks)
-                    else:
-                        current_framework_state = self.framework_reported_current_states[event.componentslug]
-                        if current_framework_state.control_event_id != event.controlevent.id:
-                            print('Different control event ID detected. Resetting for next cycle')
-                            del self.events_to_monitor[event.componentslug]
-                            continue
-                        self.framework_reported_current_states[event.componentslug] = \
-                            FrameworkState(is_stale=False,
-                                           control_event_id=event.controlevent.id,
-                                           end_time=parser.parse(event.controlevent.end_time),
-                                           state=event.controlevent.state_machine.current_state)
-
-                events_to_delete = []
-                # run through all our events and let them check for things that need to be done
-                for component, event in self.events_to_monitor.items():
-                    # the API is no longer tracking this item so we need to kill it
-                    if event.control_event.id not in active_framework_events:
-                        events_to_delete.append(component)
-                    else:
-                        # otherwise all good -- let's check it
-                        event.check(self.framework_reported_current_states[component])
-
-                # delete the events we don't need anymore
-                for component in events_to_delete:
-                    del self.events_to_monitor[component]
-
-                if self.components_to_simulate:
-                    for slug in self.components_to_simulate:
-                        if slug not in self.events_to_monitor:
-                            tick_func = self.event_hooks.get('_idle_tick')
-                            if tick_func:
-                                # call the hook for the tick
-                                tick_func(slug)
-
+                call.callback()
             except KeyboardInterrupt:
-                break
+                raise
             except Exception as e:
                 print(traceback.format_exc())
                 print(f'Handled exception {e}')
-        print('Stopping simulator')
+
+    def call_soon(self, callback):
+        """Runs `callback` on the scheduler's thread. Safe to call from any thread."""
+        self._calls.put(callback)
+
+    def request_fetch(self):
+        """Fetches control events as soon as possible. Safe to call from any thread."""
+        self.call_soon(partial(self._schedule_fetch, 0))
+
+    def stop(self):
+        """Stops a running simulator. Safe to call from any thread."""
+        self.call_soon(partial(setattr, self, '_stopped', True))
+
+    def fetch(self):
+        try:
+            self._sync_events()
+        finally:
+            self._schedule_fetch(self._fetch_interval())
+
+    def run_hooks(self):
+        try:
+            for component, event in self.events_to_monitor.items():
+                # the event's state is changing on a worker
+                if component not in self._in_flight:
+                    event.run_hooks(self.framework_reported_current_states[component])
+
+            if self.components_to_simulate:
+                for slug in self.components_to_simulate:
+                    if slug not in self.events_to_monitor:
+                        tick_func = self.event_hooks.get('_idle_tick')
+                        if tick_func:
+                            # call the hook for the tick
+                            tick_func(slug)
+        finally:
+            self.scheduler.schedule_in(HOOKS_KEY, self.hook_interval, self.run_hooks)
+
+    def _sync_events(self):
+        print('Fetching control events')
+        events = self.control_service.get_edge_control_events()
+
+        self._upcoming_starts = []
+        active_framework_events = []
+        # iterate over the events and persist framework state to global config
+        for event in events.nodes:
+            active_framework_events.append(event.controlevent.id)
+
+            # if we are not monitoring this yet, let's start
+            if event.componentslug not in self.events_to_monitor:
+                print(f'{event.componentslug}')
+                print(f'  {event.controlevent.state_machine.state_definition}')
+                print(f'  {event.controlevent.state_machine.current_state}')
+                definition_config = self.simulation_config.get_definition_config_for_slug(
+                    event.controlevent.state_machine.state_definition)
+                if not definition_config:
+                    print(f'Definition config not found for '
+                          f'{event.controlevent.state_machine.state_definition}')
+                    continue
+
+                print(event.controlevent.start_time)
+                start_time = parser.parse(event.controlevent.start_time)
+                print(start_time, self.clock.now())
+                lead_time = start_time - timedelta(minutes=LEAD_BUFFER_TIME_MINUTES)
+                if lead_time > self.clock.now():
+                    print('Have not reached start time yet...')
+                    self._upcoming_starts.append(lead_time)
+                    continue
+                self.framework_reported_current_states[event.componentslug] = \
+                    FrameworkState(is_stale=False,
+                                   control_event_id=event.controlevent.id,
+                                   end_time=parser.parse(event.controlevent.end_time),
+                                   state=event.controlevent.state_machine.current_state)
+                self.events_to_monitor[event.componentslug] = \
+                    GeneralControlEventSimulator(config=definition_config,
+                                                 control=self.control_service,
+                                                 component_slug=event.componentslug,
+                                                 control_event=event.controlevent,
+                                                 event_hooks=self.event_hooks,
+                                                 clock=self.clock)
+            else:
+                current_framework_state = self.framework_reported_current_states[event.componentslug]
+                if current_framework_state.control_event_id != event.controlevent.id:
+                    print('Different control event ID detected. Resetting for next cycle')
+                    self._stop_monitoring(event.componentslug)
+                    continue
+                self.framework_reported_current_states[event.componentslug] = \
+                    FrameworkState(is_stale=False,
+                                   control_event_id=event.controlevent.id,
+                                   end_time=parser.parse(event.controlevent.end_time),
+                                   state=event.controlevent.state_machine.current_state)
+
+        events_to_delete = []
+        # run through all our events and let them check for things that need to be done
+        for component, event in self.events_to_monitor.items():
+            # the API is no longer tracking this item so we need to kill it
+            if event.control_event.id not in active_framework_events:
+                events_to_delete.append(component)
+            elif component in self._in_flight:
+                continue
+            elif (event.next_transition_time is not None
+                  and self.clock.now() >= event.next_transition_time):
+                # fire due transitions as scheduled, rather than during the check
+                self.scheduler.cancel((TRANSITION_KEY, component))
+                self._fire_transition(component, event)
+            else:
+                # otherwise all good -- let's check it, and schedule its next transition. Hooks run
+                # on their own cadence, in `run_hooks`.
+                event.check(self.framework_reported_current_states[component], run_hooks=False)
+                self._schedule_transition(component, event)
+
+        # delete the events we don't need anymore
+        for component in events_to_delete:
+            self._stop_monitoring(component)
+
+    def _stop_monitoring(self, component: str):
+        del self.events_to_monitor[component]
+        self._in_flight.pop(component, None)
+        self._scheduled_transitions.pop(component, None)
+        self.scheduler.cancel((TRANSITION_KEY, component))
+
+    def _schedule_transition(self, component: str, event: GeneralControlEventSimulator):
+        transition_time = event.next_transition_time
+        if transition_time == self._scheduled_transitions.get(component):
+            return
+
+        key = (TRANSITION_KEY, component)
+        if transition_time is None:
+            del self._scheduled_transitions[component]
+            self.scheduler.cancel(key)
+            return
+
+        self._scheduled_transitions[component] = transition_time
+        delay = (transition_time - self.clock.now()).total_seconds()
+        self.scheduler.schedule_in(key, max(delay, 0), lambda: self._fire_transition(component, event))
+
+    def _fire_transition(self, component: str, event: GeneralControlEventSimulator):
+        self._scheduled_transitions.pop(component, None)
+        # the event may have stopped being monitored, or already be transitioning
+        if (self.events_to_monitor.get(component) is not event or event.next_transition_time is None
+                or component in self._in_flight):
+            return
+
+        framework_state = self.framework_reported_current_states[component]
+        if self._transition_executor is None:
+            try:
+                self._run_transition(event, framework_state)
+            finally:
+                self._schedule_fetch(self.min_fetch_interval)
+            return
+
+        self._in_flight[component] = event
+        self._transition_executor.submit(component, self._transition_on_worker, component, event,
+                                         framework_state)
+
+    def _transition_on_worker(self, component: str, event: GeneralControlEventSimulator,
+                              framework_state: FrameworkState):
+        error = None
+        try:
+            self._run_transition(event, framework_state)
+        except Exception as e:
+            error = e
+        # hand the result back to the scheduler's thread
+        self.call_soon(partial(self._on_transition_completed, component, event, error))
+
+    def _run_transition(self, event: GeneralControlEventSimulator, framework_state: FrameworkState):
+        started = self.clock.now()
+        lateness = (started - event.next_transition_time).total_seconds()
+        try:
+            event.transition(framework_state)
+        finally:
+            self.transition_metrics.record(lateness, (self.clock.now() - started).total_seconds())
+
+    def _on_transition_completed(self, component: str, event: GeneralControlEventSimulator,
+                                 error: Optional[Exception]):
+        if self._in_flight.get(component) is event:
+            del self._in_flight[component]
+        if error is not None:
+            print(''.join(traceback.format_exception(type(error), error, error.__traceback__)))
+            print(f'Handled exception {error}')
+        # sync the (now stale) framework state soon
+        self._schedule_fetch(self.min_fetch_interval)
+
+    def _schedule_fetch(self, delay: float):
+        deadline = self.scheduler.clock() + delay
+        current = self.scheduler.deadline(FETCH_KEY)
+        if current is None or deadline < current:
+            self.scheduler.schedule(FETCH_KEY, deadline, self.fetch)
+
+    def _fetch_interval(self) -> float:
+        if any(self.framework_reported_current_states[c].is_stale for c in self.events_to_monitor):
+            return self.min_fetch_interval
+
+        interval = self.idle_fetch_interval
+        # only events without a pending transition can change from external input
+        if any(event.next_transition_time is None for event in self.events_to_monitor.values()):
+            interval = self.active_fetch_interval
+
+        now = self.clock.now()
+        for start in self._upcoming_starts:
+            interval = min(interval, (start - now).total_seconds())
+        return max(interval, self.min_fetch_interval)
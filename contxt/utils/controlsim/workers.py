@@ -0,0 +1,74 @@
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from statistics import mean
+from threading import Lock
+from typing import Callable, Deque, Dict, List
+
+
+class KeyedExecutor:
+    """Runs calls on `workers` single-threaded executors, picking the executor from a stable
+    hash of each call's key. Calls with the same key therefore run in order, while calls with
+    different keys (mostly) run in parallel."""
+
+    def __init__(self, workers: int, thread_name_prefix: str = "worker"):
+        if workers < 1:
+            raise ValueError(f"At least one worker is required, got {workers}")
+        self._executors: List[ThreadPoolExecutor] = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{thread_name_prefix}-{i}")
+            for i in range(workers)
+        ]
+
+    def shard(self, key: str) -> int:
+        return zlib.crc32(key.encode("utf8")) % len(self._executors)
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> Future:
+        return self._executors[self.shard(key)].submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        for executor in self._executors:
+            executor.shutdown(wait=wait)
+
+
+@dataclass
+class TransitionMetrics:
+    """Thread-safe record of how late transitions fired relative to their scheduled
+    `next_transition_time`, and how long the transitions took (both in seconds). Only the
+    latest `max_samples` are kept for the summary."""
+
+    max_samples: int = 10000
+    count: int = 0
+    lateness: Deque[float] = field(init=False)
+    durations: Deque[float] = field(init=False)
+
+    def __post_init__(self):
+        self.lateness = deque(maxlen=self.max_samples)
+        self.durations = deque(maxlen=self.max_samples)
+        self._lock = Lock()
+
+    def record(self, lateness: float, duration: float):
+        with self._lock:
+            self.count += 1
+            self.lateness.append(lateness)
+            self.durations.append(duration)
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            lateness = sorted(self.lateness)
+            durations = list(self.durations)
+            count = self.count
+        if not lateness:
+            return {"count": count}
+        return {
+            "count": count,
+            "lateness_mean": mean(lateness),
+            "lateness_p50": _percentile(lateness, 0.5),
+            "lateness_p95": _percentile(lateness, 0.95),
+            "lateness_max": lateness[-1],
+            "duration_mean": mean(durations),
+        }
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
@@ -2,8 +2,8 @@ import os
 import sys
 from typing import List, Optional
 
-from .persistent_contxt_config import PersistentContxtConfig, ContxtConfigurationError
-from .config import CustomEnvironmentConfig, ContxtEnvironmentConfig, ContxtCliEnvironmentConfig
+from .config import ContxtCliEnvironmentConfig, ContxtEnvironmentConfig, CustomEnvironmentConfig
+from .persistent_contxt_config import ContxtConfigurationError, PersistentContxtConfig
 
 
 class EnvironmentConfigurationException(Exception):
@@ -15,6 +15,7 @@ class ContxtEnvironmentInitializationError(Exception):
 
 
 class ContxtEnvironment(PersistentContxtConfig):
+    binary_cache = True
 
     # default location is ~/.contxt/defaults.yml unless otherwise specified in arguments
     def __init__(self, filename: Optional[str] = None):
@@ -25,7 +26,6 @@ class ContxtEnvironment(PersistentContxtConfig):
             super().__init__(env_filename, CustomEnvironmentConfig, use_default_path=False, initialize_if_not_exists=False)
         else:
             super().__init__('defaults.yml', CustomEnvironmentConfig, initialize_if_not_exists=False)
-        self.config: CustomEnvironmentConfig = self.load_contxt_file(initialize_if_not_exists=True)
 
     def __str__(self):
         return str(self.config)
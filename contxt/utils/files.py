@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+if sys.platform.startswith("win"):
+    import msvcrt
+
+    def _lock(f: IO):
+        # blocks (retrying for about 10 seconds) until the first byte is locked
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock(f: IO):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock(f: IO):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(f: IO):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """Holds an exclusive lock on `path`, across processes, via the sidecar file `{path}.lock`"""
+    with open(f"{path}.lock", "a+") as f:
+        _lock(f)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+def _umask() -> int:
+    # the umask can only be read by setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# permissions of new files, as `open` would create them
+DEFAULT_FILE_MODE = 0o666 & ~_umask()
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", file_mode: Optional[int] = None) -> Iterator[IO]:
+    """Opens a temporary file to write, which then replaces `path` in one step, so readers never
+    see a partially written file. The file is left untouched if writing fails. The file keeps its
+    permissions, while a new file gets `file_mode` (by default, those `open` would give it)."""
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode)
+        else:
+            os.chmod(tmp_path, DEFAULT_FILE_MODE if file_mode is None else file_mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -1,6 +1,21 @@
 import inspect
 from enum import Enum
-from typing import Any, Type, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+from . import object_vars
 
 T = TypeVar("T")
 _PRIMITIVES = (bool, int, float, str, type(None))
@@ -10,84 +25,212 @@ class Null:
     """Null marker"""
 
 
+Decoder = Callable[[Any], Any]
+
+
+def _compile_list(annotation: Any, args: Tuple, strict: bool, shallow: bool) -> Decoder:
+    assert len(args) == 1
+    decode_item = ObjectMapper.compile(args[0], strict, shallow)
+
+    def decode(tree):
+        assert isinstance(tree, list), _failure_msg(annotation, tree)
+        return [decode_item(item) for item in tree]
+
+    return decode
+
+
+def _compile_dict(annotation: Any, args: Tuple, strict: bool, shallow: bool) -> Decoder:
+    assert len(args) == 2
+    decode_key = ObjectMapper.compile(args[0], strict, shallow)
+    decode_value = ObjectMapper.compile(args[1], strict, shallow)
+
+    def decode(tree):
+        assert isinstance(tree, dict), _failure_msg(annotation, tree)
+        return {decode_key(k): decode_value(v) for k, v in tree.items()}
+
+    return decode
+
+
+def _compile_union(annotation: Any, args: Tuple, strict: bool) -> Decoder:
+    def decode(tree):
+        assert any(t for t in args if isinstance(tree, t)), _failure_msg(annotation, tree)
+        return tree
+
+    return decode if strict else _identity
+
+
+def _compile_primitive(annotation: Any, strict: bool) -> Decoder:
+    def decode(tree):
+        try:
+            conv = annotation(tree)
+            assert conv == tree
+            return conv
+        except Exception as e:
+            raise AssertionError(_failure_msg(annotation, tree), e)
+
+    return decode if strict else _identity
+
+
+def _compile_enum(annotation: Any, strict: bool) -> Decoder:
+    def decode(tree):
+        if isinstance(tree, annotation):
+            return tree
+        # try to map by enum entry name
+        by_name = getattr(annotation, str(tree), None)
+        if by_name:
+            return by_name
+        # try to map by enum entry value
+        assert isinstance(tree, _PRIMITIVES), "Only primitives are supported as Enum values. " + (
+            _failure_msg(annotation, tree)
+        )
+        return annotation(tree)
+
+    return decode
+
+
+def _compile_class(annotation: Any, strict: bool, shallow: bool) -> Decoder:
+    # (name, has default, decoder) of each constructor parameter, compiled on first use, so that
+    # classes can refer to themselves
+    params: Optional[List[Tuple[str, bool, Decoder]]] = None
+
+    def decode(tree):
+        nonlocal params
+        if isinstance(tree, annotation):
+            return tree
+        elif not isinstance(tree, dict):
+            raise NotImplementedError(_failure_msg(annotation, tree))
+        if params is None:
+            try:
+                # resolves forward references, i.e. to the class itself
+                hints = get_type_hints(annotation)
+            except Exception:
+                hints = {}
+            params = [
+                (p.name, p.default is not p.empty, _compile_param(p, hints, strict, shallow))
+                for p in inspect.signature(annotation).parameters.values()
+            ]
+
+        # parse as regular class
+        args = {}
+        for name, has_default, decode_value in params:
+            raw = tree.get(name, Null)
+            if raw is Null:
+                assert has_default or not strict, (
+                    f"Missing value for required parameter; "
+                    f"type: {annotation}, param: {name}, tree: {tree}. {_failure_msg(annotation, tree)}"
+                )
+            else:
+                args[name] = decode_value(raw)
+        if strict and len(tree) > len(args):
+            # there seem to be some extraneous keys
+            extraneous_keys = [k for k in tree.keys() if k not in args]
+            raise AssertionError(
+                f"Unexpected keys were found while parsing {annotation}. "
+                f"Extraneous keys: {extraneous_keys}, tree: {tree}"
+            )
+
+        # instantiate the annotation class
+        return annotation(**args)
+
+    return decode
+
+
+def _compile_param(
+    param: inspect.Parameter, hints: Dict[str, Any], strict: bool, shallow: bool
+) -> Decoder:
+    return ObjectMapper.compile(hints.get(param.name, param.annotation), strict, shallow)
+
+
+def _compile_passthrough(annotation: Any, strict: bool) -> Decoder:
+    container = get_origin(annotation)
+
+    def decode(tree):
+        assert isinstance(tree, container), _failure_msg(annotation, tree)
+        return tree
+
+    return decode if strict and container is not None else _identity
+
+
+def _is_passthrough(annotation: Any) -> bool:
+    """Returns if `annotation` allows anything, i.e. `Any`, `Dict[str, Any]` or `List[Any]`"""
+    if annotation == Any:
+        return True
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is list:
+        return _is_passthrough(args[0])
+    elif origin is dict:
+        return args[0] in (str, Any) and _is_passthrough(args[1])
+    return False
+
+
+def _unsupported(annotation: Any) -> Decoder:
+    def decode(tree):
+        raise NotImplementedError(_failure_msg(annotation, tree))
+
+    return decode
+
+
+def _identity(tree: Any) -> Any:
+    return tree
+
+
+def _failure_msg(annotation: Any, tree: Any) -> str:
+    return f"Failed to parse '{annotation}' from tree: {tree}"
+
+
 class ObjectMapper:
+    # compiled decoders, by annotation, strictness and shallowness
+    _decoders: Dict[Tuple[Any, bool, bool], Decoder] = {}
+
+    @staticmethod
+    def compile(annotation: Type[T], strict: bool = True, shallow: bool = False) -> Callable[[Any], T]:
+        """Gets the decoder of JSON-like structures into instances of `annotation`, built once per
+        annotation. Strict decoders validate primitives and that objects have neither missing nor
+        extraneous keys, while others trust the structure to match `annotation`. Shallow decoders
+        return subtrees that allow anything (`Dict[str, Any]`, `List[Any]`) as they are, instead
+        of copying them."""
+        key = (annotation, strict, shallow)
+        decoder = ObjectMapper._decoders.get(key)
+        if decoder is None:
+            decoder = ObjectMapper._decoders[key] = ObjectMapper._compile(annotation, strict, shallow)
+        return decoder
+
     @staticmethod
-    def tree_to_object(tree: object, annotation: Type[T]) -> T:
-        """Loads JSON-like structure `tree` into an instance of `annotation`"""
-
-        def failure_msg():
-            return f"Failed to parse '{annotation}' from tree: {tree}"
-
-        if tree is None or annotation == Any:
-            return tree  # type: ignore
-        # detecting generic types
-        # note: this check is hacky, don't have a better way to detect generics
-        elif type(annotation).__name__ == "_GenericAlias":
-            origin = getattr(annotation, "__origin__")
-            args = getattr(annotation, "__args__")
-            if origin is list:
-                assert isinstance(tree, list), failure_msg()
-                assert len(args) == 1
-                generic_param = args[0]
-                return [
-                    ObjectMapper.tree_to_object(item, generic_param) for item in tree  # type: ignore
-                ]
-            elif origin is dict:
-                assert isinstance(tree, dict), failure_msg()
-                assert len(args) == 2
-                key_ann, value_ann = args
-                return {  # type: ignore
-                    ObjectMapper.tree_to_object(k, key_ann): ObjectMapper.tree_to_object(v, value_ann)
-                    for k, v in tree.items()
-                }
-            elif origin is Union:
-                assert any(t for t in args if isinstance(tree, t)), failure_msg()
-                return tree  # type: ignore
+    def _compile(annotation: Any, strict: bool, shallow: bool) -> Decoder:
+        if annotation == Any:
+            return _identity
+        origin, args = get_origin(annotation), get_args(annotation)
+        if shallow and _is_passthrough(annotation):
+            decode = _compile_passthrough(annotation, strict)
+        elif origin is list:
+            decode = _compile_list(annotation, args, strict, shallow)
+        elif origin is dict:
+            decode = _compile_dict(annotation, args, strict, shallow)
+        elif origin is Union:
+            decode = _compile_union(annotation, args, strict)
+        elif origin is not None:
+            decode = _unsupported(annotation)
         elif annotation in _PRIMITIVES:
-            try:
-                conv = annotation(tree)  # type: ignore
-                assert conv == tree
-                return conv
-            except Exception as e:
-                raise AssertionError(failure_msg(), e)
+            decode = _compile_primitive(annotation, strict)
+        elif inspect.isclass(annotation) and issubclass(annotation, Enum):
+            decode = _compile_enum(annotation, strict)
         elif inspect.isclass(annotation):
-            if isinstance(tree, annotation):
-                return tree
-            elif issubclass(annotation, Enum):
-                # try to map by enum entry name
-                by_name = getattr(annotation, str(tree), None)
-                if by_name:
-                    return by_name
-                # try to map by enum entry value
-                assert isinstance(
-                    tree, _PRIMITIVES
-                ), "Only primitives are supported as Enum values. " + (failure_msg())
-                return annotation(tree)  # type: ignore
-            elif isinstance(tree, dict):
-                # parse as regular class
-                args = {}
-                # get signature of constructor
-                for param in inspect.signature(annotation).parameters.values():
-                    raw = tree.get(param.name, Null)
-                    if raw is Null:
-                        assert param.default is not inspect.Parameter.empty, (
-                            f"Missing value for required parameter; "
-                            f"type: {annotation}, param: {param}, tree: {tree}. {failure_msg()}"
-                        )
-                    else:
-                        args[param.name] = ObjectMapper.tree_to_object(raw, param.annotation)
-                if len(tree) > len(args):
-                    # there seem to be some extraneous keys
-                    extraneous_keys = [k for k in tree.keys() if k not in args]
-                    raise AssertionError(
-                        f"Unexpected keys were found while parsing {annotation}. "
-                        f"Extraneous keys: {extraneous_keys}, tree: {tree}"
-                    )
-
-                # instantiate the annotation class
-                return annotation(**args)  # type: ignore
-
-        raise NotImplementedError(failure_msg())
+            decode = _compile_class(annotation, strict, shallow)
+        else:
+            decode = _unsupported(annotation)
+
+        def decode_or_none(tree):
+            return None if tree is None else decode(tree)
+
+        return decode_or_none
+
+    @staticmethod
+    def tree_to_object(
+        tree: object, annotation: Type[T], strict: bool = True, shallow: bool = False
+    ) -> T:
+        """Loads JSON-like structure `tree` into an instance of `annotation`. See `compile` for
+        `strict` and `shallow`."""
+        return ObjectMapper.compile(annotation, strict, shallow)(tree)
 
     load = tree_to_object
 
@@ -103,7 +246,7 @@ class ObjectMapper:
         elif inspect.isclass(obj):
             return obj.__name__
         else:
-            dic = obj if isinstance(obj, dict) else vars(obj)
+            dic = obj if isinstance(obj, dict) else object_vars(obj)
             return {
                 ObjectMapper.object_to_tree(k): ObjectMapper.object_to_tree(v) for k, v in dic.items()
             }
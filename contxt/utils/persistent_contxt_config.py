@@ -1,8 +1,9 @@
+import logging
 import os
 from pathlib import Path
-import logging
+from typing import Optional
 
-from .config import write_config_class_to_file, load_config_class_from_file
+from .config import load_config_class_from_file, write_config_class_to_file
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(format='[%(module)s %(levelname)s:%(asctime)s] %(message)s', level=logging.INFO)
@@ -13,8 +14,13 @@ class ContxtConfigurationError(Exception):
 
 
 class PersistentContxtConfig:
+    # if the loaded config is cached in binary form next to the file, for faster loads
+    binary_cache = False
+    # permissions of the file when it is created, if not those `open` would give it
+    file_mode: Optional[int] = None
 
-    def __init__(self, filename, clazz, use_default_path: bool = True, initialize_if_not_exists: bool = True):
+    def __init__(self, filename, clazz, use_default_path: bool = True,
+                 initialize_if_not_exists: bool = True, load: bool = True):
         self.use_default_path = use_default_path
         if self.use_default_path:
             self.base_path = os.path.join(str(Path.home()), '.contxt')
@@ -23,19 +29,20 @@ class PersistentContxtConfig:
             self.filename = filename
         logger.debug(f'Using config file {self.filename}')
         self.clazz = clazz
-        self.config = self.load_contxt_file(initialize_if_not_exists)
+        # subclasses may defer loading the file until its config is needed
+        self.config = self.load_contxt_file(initialize_if_not_exists) if load else None
 
     def _create_file(self):
         if not os.path.exists(self.base_path):
             os.mkdir(self.base_path)
         if not os.path.exists(self.filename):
-            Path(self.filename).touch()
+            Path(self.filename).touch(mode=0o666 if self.file_mode is None else self.file_mode)
 
     def write_contxt_file(self):
         if self.use_default_path and not os.path.exists(self.base_path):
             os.mkdir(self.base_path)
         logger.debug(f'Writing config to file {self.filename}')
-        write_config_class_to_file(self.filename, self.config, self.clazz)
+        write_config_class_to_file(self.filename, self.config, self.clazz, file_mode=self.file_mode)
 
     def load_contxt_file(self, initialize_if_not_exists: bool):
         if not initialize_if_not_exists and not os.path.exists(self.filename):
@@ -44,5 +51,5 @@ class PersistentContxtConfig:
             self._create_file()
 
         logger.debug(f'Loading config from file {self.filename}')
-        config = load_config_class_from_file(self.filename, self.clazz)
+        config = load_config_class_from_file(self.filename, self.clazz, cache=self.binary_cache)
         return config
@@ -1,12 +1,254 @@
 from csv import DictWriter
+from dataclasses import is_dataclass
 from datetime import date, datetime
 from enum import Enum
+from itertools import chain, islice
 from json import dump, dumps, loads
 from pathlib import Path
-from typing import Any, Callable, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
 
 from tabulate import tabulate
 
+from . import make_logger, object_vars, slot_names
+
+logger = make_logger(__name__)
+
+Encoder = Callable[[Any], Any]
+
+# compiled encoders, by cls_key and then type
+_ENCODERS: Dict[Optional[str], Dict[type, Encoder]] = {}
+_unset = object()
+
+
+def _default_filter(key: str) -> bool:
+    return not key.startswith("_")
+
+
+def _identity(obj: Any) -> Any:
+    return obj
+
+
+def _enum_value(obj: Enum) -> Any:
+    return obj.value
+
+
+def _encoder(obj: Any, cls_key: Optional[str]) -> Encoder:
+    """Returns the (cached) encoder of objects of the type of `obj`"""
+    encoders = _ENCODERS.get(cls_key)
+    if encoders is None:
+        encoders = _ENCODERS.setdefault(cls_key, {})
+    encoder = encoders.get(type(obj))
+    if encoder is None:
+        if hasattr(type(obj), "__getattr__") or isinstance(obj, type):
+            # attributes may be dynamic (or, for classes, differ by class), so check them per object
+            encoder = encoders[type(obj)] = lambda o: _compile(o, cls_key, _default_filter)(o)
+        else:
+            encoder = encoders[type(obj)] = _compile(obj, cls_key, _default_filter)
+    return encoder
+
+
+def _compile_value(cls_key: Optional[str]) -> Encoder:
+    encoders = _ENCODERS.setdefault(cls_key, {})
+
+    def encode(value: Any) -> Any:
+        encoder = encoders.get(type(value)) or _encoder(value, cls_key)
+        return value if encoder is _identity else encoder(value)
+
+    return encode
+
+
+def _compile_object(obj: Any, cls_key: Optional[str], key_filter: Callable[[str], bool]) -> Encoder:
+    encoders = _ENCODERS.setdefault(cls_key, {})
+    encode = _compile_value(cls_key)
+    cls_name = type(obj).__name__
+    names = slot_names(type(obj))
+
+    if hasattr(obj, "__dict__") and not names:
+
+        def encode_object(obj: Any) -> Dict:
+            d = {}
+            for k, v in obj.__dict__.items():
+                if callable(v) or not key_filter(k):
+                    continue
+                # NOTE: inlines `encode`, as this is the hot path of serializing models
+                encoder = encoders.get(type(v)) or _encoder(v, cls_key)
+                d[k] = v if encoder is _identity else encoder(v)
+            if cls_key is not None:
+                d[cls_key] = cls_name
+            return d
+
+    elif not hasattr(obj, "__dict__"):
+        # Slotted, so the attributes are known up front
+        names = tuple(name for name in names if key_filter(name))
+
+        def encode_object(obj: Any) -> Dict:
+            d = {}
+            for name in names:
+                v = getattr(obj, name, _unset)
+                if v is _unset or callable(v):
+                    continue
+                encoder = encoders.get(type(v)) or _encoder(v, cls_key)
+                d[name] = v if encoder is _identity else encoder(v)
+            if cls_key is not None:
+                d[cls_key] = cls_name
+            return d
+
+    else:
+
+        def encode_object(obj: Any) -> Dict:
+            d = {k: encode(v) for k, v in object_vars(obj).items() if not callable(v) and key_filter(k)}
+            if cls_key is not None:
+                d[cls_key] = cls_name
+            return d
+
+    return encode_object
+
+
+def _compile(obj: Any, cls_key: Optional[str], key_filter: Callable[[str], bool]) -> Encoder:
+    """Compiles the encoder of `obj` (and other objects of its type), following `Serializer.to_dict`"""
+    from contxt.models import Formatters
+
+    if hasattr(obj, "to_dict"):
+        # User-defined method
+        return lambda o: o.to_dict()
+    if isinstance(obj, dict):
+        # Dictionary
+        encode = _compile_value(cls_key)
+        return lambda o: {k: encode(v) for k, v in o.items()}
+    elif isinstance(obj, datetime):
+        # Datetime
+        return Formatters.datetime
+    elif isinstance(obj, date):
+        # Date
+        return Formatters.date
+    elif isinstance(obj, Enum):
+        return _enum_value
+    elif hasattr(obj, "_ast"):
+        # Abstract syntax tree
+        return lambda o: Serializer.to_dict(o._ast())
+    elif hasattr(obj, "__dict__") or is_dataclass(obj):
+        # General object (or dataclass, which may have __slots__ instead of __dict__)
+        return _compile_object(obj, cls_key, key_filter)
+    elif hasattr(obj, "__iter__") and not isinstance(obj, str):
+        # Iterables (except strings)
+        encode = _compile_value(cls_key)
+        return lambda o: [encode(v) for v in o]
+    else:
+        # Fallback to self
+        return _identity
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet and Feather output require pyarrow, install it via `pip install contxt-sdk[arrow]`"
+        )
+    return pyarrow
+
+
+def _arrow_type(pa: Any, column_type: Any) -> Any:
+    """Returns the Arrow type of `column_type`, which may also be a Python type"""
+    python_types = {
+        bool: pa.bool_(),
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        datetime: pa.timestamp("us", tz="UTC"),
+        date: pa.date32(),
+    }
+    return python_types.get(column_type, column_type)
+
+
+def _columnar_value(value: Any) -> Any:
+    """Keeps `value` as is if Arrow has a type for it, otherwise serializes it (as JSON for nested
+    values, i.e. lists or models)"""
+    if value is None or isinstance(value, (bool, int, float, str, datetime, date)):
+        return value
+    elif isinstance(value, Enum):
+        return value.value
+    return dumps(Serializer.to_dict(value), sort_keys=True)
+
+
+def _columnar_row(obj: Any) -> Dict[str, Any]:
+    if not isinstance(obj, dict):
+        obj = {k: v for k, v in object_vars(obj).items() if not callable(v) and _default_filter(k)}
+    return {k: _columnar_value(v) for k, v in obj.items()}
+
+
+def _arrow_column(pa: Any, name: str, values: list, column_type: Any) -> Any:
+    try:
+        return pa.array(values, type=column_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if pa.types.is_floating(column_type):
+            convert: Callable[[Any], Any] = float
+        elif pa.types.is_integer(column_type):
+            convert = int
+        elif pa.types.is_string(column_type):
+            convert = str
+        else:
+            raise
+    # Coerce stray values (i.e. "NaN" strings of numeric columns), instead of failing the export
+    logger.warning(f"Converting values of column {name} to {column_type}, or null if invalid")
+
+    def coerce(value: Any) -> Any:
+        try:
+            return None if value is None else convert(value)
+        except (TypeError, ValueError):
+            return None
+
+    return pa.array([coerce(v) for v in values], type=column_type)
+
+
+def _write_columnar(
+    objs: Iterable[Any],
+    open_writer: Callable[[Any], Any],
+    fieldnames: Optional[Sequence[str]],
+    types: Optional[Dict[str, Any]],
+    row_group_size: int,
+) -> int:
+    """Writes `objs` in record batches of `row_group_size` rows, via the writer `open_writer(schema)`.
+    The columns are declared (by `fieldnames` and `types`) or inferred from the first batch."""
+    pa = _import_pyarrow()
+    types = types or {}
+
+    def make_schema(batch: list) -> Any:
+        names = list(fieldnames) if fieldnames is not None else Serializer._keys(batch)
+        fields = []
+        for name in names:
+            column_type = _arrow_type(pa, types.get(name))
+            if column_type is None:
+                try:
+                    column_type = pa.array([row.get(name) for row in batch]).type
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    # Mixed types
+                    column_type = None
+            # NOTE: columns of mixed types, or without any value yet, are assumed to hold strings
+            if column_type is None or column_type == pa.null():
+                column_type = pa.string()
+            fields.append(pa.field(name, column_type))
+        return pa.schema(fields)
+
+    rows = (_columnar_row(obj) for obj in objs)
+    batch = list(islice(rows, row_group_size))
+    schema = make_schema(batch)
+    writer = open_writer(schema)
+    count = 0
+    try:
+        while batch:
+            columns = [
+                _arrow_column(pa, field.name, [row.get(field.name) for row in batch], field.type)
+                for field in schema
+            ]
+            # NOTE: each batch is one row group (of Parquet) or record batch (of Arrow IPC)
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            count += len(batch)
+            batch = list(islice(rows, row_group_size))
+    finally:
+        writer.close()
+    return count
+
 
 class Serializer:
     """Serializer to transform a Python object to common data formats"""
@@ -35,8 +277,6 @@ class Serializer:
         :return: dictionary
         :rtype: `dict`
         """
-        from contxt.models import Formatters
-
         # TODO: this may not return a dict but instead a list, or a native type
         # (for example, if passed an int, it will return it). this is likely
         # an unexpected behavior for callers
@@ -44,47 +284,11 @@ class Serializer:
         # 1. d = json.dumps(d, default=lambda o: getattr(o, "__dict__", str(o)))
         # 2. d = jsonpickle.encode(d, unpicklable=False))
         # >> json.loads(d)
-
-        def default_filter(key: str) -> bool:
-            return not key.startswith("_")
-
-        # Create default key filter (ignore _ vars)
-        key_filter = key_filter or default_filter
-
-        # Serialize
-        if hasattr(obj, "to_dict"):
-            # User-defined method
-            return obj.to_dict()
-        if isinstance(obj, dict):
-            # Dictionary
-            return {k: Serializer.to_dict(v, cls_key=cls_key) for k, v in obj.items()}
-        elif isinstance(obj, datetime):
-            # Datetime
-            return Formatters.datetime(obj)
-        elif isinstance(obj, date):
-            # Date
-            return Formatters.date(obj)
-        elif isinstance(obj, Enum):
-            return obj.value
-        elif hasattr(obj, "_ast"):
-            # Abstract syntax tree
-            return Serializer.to_dict(obj._ast())
-        elif hasattr(obj, "__dict__"):
-            # General object
-            d = {
-                k: Serializer.to_dict(v, cls_key)
-                for k, v in obj.__dict__.items()
-                if not callable(v) and key_filter(k)
-            }
-            if cls_key is not None and hasattr(obj, "__class__"):
-                d[cls_key] = obj.__class__.__name__
-            return d
-        elif hasattr(obj, "__iter__") and not isinstance(obj, str):
-            # Iterables (except strings)
-            return [Serializer.to_dict(v, cls_key) for v in obj]
-        else:
-            # Fallback to self
-            return obj
+        # NOTE: the encoders of each type are compiled once, then cached. A custom key filter only
+        # applies to the attributes of `obj` itself though, so its encoder is not cached.
+        if key_filter is None:
+            return _encoder(obj, cls_key)(obj)
+        return _compile(obj, cls_key, key_filter)(obj)
 
     @staticmethod
     def to_json(obj: Any, path: Optional[Path] = None, **kwargs):
@@ -197,9 +401,201 @@ class Serializer:
                 # Write dict
                 writer.writerow(d)
 
+    @staticmethod
+    def write_csv(
+        objs: Iterable[Any],
+        path: Path,
+        fieldnames: Optional[Sequence[str]] = None,
+        header: bool = True,
+        sample_size: int = 100,
+        **kwargs,
+    ) -> int:
+        """Streams `objs` to CSV, one row per object, without holding them all in memory (i.e. from
+        a generator, or `PagedRecords`).
+
+        :param objs: objects to serialize
+        :type objs: Iterable[Any]
+        :param path: path to export
+        :type path: Path
+        :param fieldnames: columns, defaults to the keys of the first `sample_size` rows
+        :param fieldnames: Optional[Sequence[str]], optional
+        :param header: write header row, defaults to True
+        :param header: bool, optional
+        :param sample_size: rows sampled for the columns, if not declared, defaults to 100
+        :param sample_size: int, optional
+        :return: number of rows written
+        :rtype: int
+        """
+        # NOTE: keys outside of a sampled header are dropped, instead of failing halfway through
+        kwargs.setdefault("extrasaction", "ignore")
+        rows: Iterable[Dict] = (Serializer.to_dict(obj) for obj in objs)
+        if fieldnames is None:
+            sample = list(islice(rows, sample_size))
+            fieldnames = Serializer._keys(sample)
+            rows = chain(sample, rows)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # warned about (once) when keys are dropped
+        check_extras = kwargs["extrasaction"] == "ignore"
+        columns = set(fieldnames)
+        count = 0
+        with path.open("w", newline="") as f:
+            writer = DictWriter(f, fieldnames=fieldnames, **kwargs)
+            if header:
+                writer.writeheader()
+            for row in rows:
+                if check_extras and not columns.issuperset(row):
+                    extras = [k for k in row if k not in columns]
+                    logger.warning(
+                        f"Dropping keys {extras} of row {count} (and any later ones), not in the columns"
+                    )
+                    check_extras = False
+                writer.writerow(row)
+                count += 1
+        return count
+
+    @staticmethod
+    def write_json(objs: Iterable[Any], path: Path, **kwargs) -> int:
+        """Streams `objs` to a JSON array, without holding them all in memory (i.e. from a
+        generator, or `PagedRecords`).
+
+        :param objs: objects to serialize
+        :type objs: Iterable[Any]
+        :param path: path to export
+        :type path: Path
+        :return: number of objects written
+        :rtype: int
+        """
+        kwargs.setdefault("sort_keys", True)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+        with path.open("w") as f:
+            f.write("[")
+            for obj in objs:
+                f.write(",\n" if count else "\n")
+                f.write(dumps(Serializer.to_dict(obj), **kwargs))
+                count += 1
+            f.write("\n]\n" if count else "]\n")
+        return count
+
+    @staticmethod
+    def write_parquet(
+        objs: Iterable[Any],
+        path: Path,
+        fieldnames: Optional[Sequence[str]] = None,
+        types: Optional[Dict[str, Any]] = None,
+        row_group_size: int = 100_000,
+        compression: Optional[str] = "zstd",
+    ) -> int:
+        """Streams `objs` to a Parquet file, one row group per `row_group_size` objects. Requires
+        the `arrow` extra (pyarrow).
+
+        :param objs: objects to serialize
+        :type objs: Iterable[Any]
+        :param path: path to export
+        :type path: Path
+        :param fieldnames: columns, defaults to the keys of the first row group
+        :param fieldnames: Optional[Sequence[str]], optional
+        :param types: types of columns, as Python types (i.e. `float`, or `datetime` for UTC
+        timestamps) or Arrow types (i.e. `pyarrow.float32()`), defaults to those inferred
+        from the first row group
+        :param types: Optional[Dict[str, Union[type, pyarrow.DataType]]], optional
+        :param row_group_size: rows per row group, defaults to 100000
+        :param row_group_size: int, optional
+        :param compression: compression codec (i.e. snappy, gzip, zstd, or None), defaults to zstd
+        :param compression: Optional[str], optional
+        :return: number of rows written
+        :rtype: int
+        """
+        _import_pyarrow()
+        import pyarrow.parquet as pq
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return _write_columnar(
+            objs,
+            lambda schema: pq.ParquetWriter(str(path), schema, compression=compression or "none"),
+            fieldnames,
+            types,
+            row_group_size,
+        )
+
+    @staticmethod
+    def write_feather(
+        objs: Iterable[Any],
+        path: Path,
+        fieldnames: Optional[Sequence[str]] = None,
+        types: Optional[Dict[str, Any]] = None,
+        row_group_size: int = 100_000,
+        compression: Optional[str] = "zstd",
+    ) -> int:
+        """Streams `objs` to a Feather (Arrow IPC) file, one record batch per `row_group_size`
+        objects. Requires the `arrow` extra (pyarrow).
+
+        :param objs: objects to serialize
+        :type objs: Iterable[Any]
+        :param path: path to export
+        :type path: Path
+        :param fieldnames: columns, defaults to the keys of the first record batch
+        :param fieldnames: Optional[Sequence[str]], optional
+        :param types: types of columns, as Python types (i.e. `float`, or `datetime` for UTC
+        timestamps) or Arrow types (i.e. `pyarrow.float32()`), defaults to those inferred
+        from the first record batch
+        :param types: Optional[Dict[str, Union[type, pyarrow.DataType]]], optional
+        :param row_group_size: rows per record batch, defaults to 100000
+        :param row_group_size: int, optional
+        :param compression: compression codec (i.e. lz4, zstd, or None), defaults to zstd
+        :param compression: Optional[str], optional
+        :return: number of rows written
+        :rtype: int
+        """
+        pa = _import_pyarrow()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        return _write_columnar(
+            objs,
+            lambda schema: pa.ipc.new_file(str(path), schema, options=options),
+            fieldnames,
+            types,
+            row_group_size,
+        )
+
+    @staticmethod
+    def write_file(
+        objs: Iterable[Any], path: Path, fieldnames: Optional[Sequence[str]] = None, **kwargs
+    ) -> int:
+        """Streams `objs` to a file, in the format of its extension: csv (calls
+        `Serializer.write_csv`), json (calls `Serializer.write_json`), parquet (calls
+        `Serializer.write_parquet`), or feather/arrow (calls `Serializer.write_feather`). Keyword
+        arguments are passed on to the writer.
+
+        :param objs: objects to serialize
+        :type objs: Iterable[Any]
+        :param path: path to export
+        :type path: Path
+        :param fieldnames: columns, if supported by the format, defaults to sampling the objects
+        :param fieldnames: Optional[Sequence[str]], optional
+        :return: number of objects written
+        :rtype: int
+        """
+        if path.suffix == ".csv":
+            return Serializer.write_csv(objs, path, fieldnames=fieldnames, **kwargs)
+        elif path.suffix == ".json":
+            return Serializer.write_json(objs, path, **kwargs)
+        elif path.suffix == ".parquet":
+            return Serializer.write_parquet(objs, path, fieldnames=fieldnames, **kwargs)
+        elif path.suffix in (".feather", ".arrow"):
+            return Serializer.write_feather(objs, path, fieldnames=fieldnames, **kwargs)
+        raise RuntimeError(
+            f"Unsupported filetype: '{path.suffix}'. Choose from .csv, .json, .parquet, .feather, .arrow"
+        )
+
     @staticmethod
     def to_file(
-        obj: Any, path: Optional[Path] = None, valid_exts: Iterable[str] = (".csv", ".json", ".txt")
+        obj: Any,
+        path: Optional[Path] = None,
+        valid_exts: Iterable[str] = (".csv", ".json", ".txt", ".parquet", ".feather", ".arrow"),
     ):
         """Write an object to a file (or stdout).
 
@@ -207,13 +603,17 @@ class Serializer:
         extension is used to determine the data format of `obj` before exporting.
         Supported file extensions are csv (calls `Serializer.to_csv`),
         json (calls `Serializer.to_json`), or txt (calls `Serializer.to_table`).
+        Iterables other than lists and tuples (i.e. generators) are streamed to
+        csv and json files, via `Serializer.write_csv` and `Serializer.write_json`.
+        Parquet (parquet) and Feather (feather, arrow) files are written via
+        `Serializer.write_file`, and require pyarrow.
 
         :param obj: object to output
         :type obj: Any
         :param path: path to export, defaults to None
         :param path: Optional[Path], optional
         :param valid_exts: supported file extensions, defaults to
-        (".csv", ".json", ".txt")
+        (".csv", ".json", ".txt", ".parquet", ".feather", ".arrow")
         :param valid_exts: Optional[List[str]], optional
         """
 
@@ -231,10 +631,20 @@ class Serializer:
                 f"Unsupported filetype: '{path.suffix}'. Choose from {', '.join(valid_exts)}"
             )
 
-        # Dump to file
-        if path.suffix == ".csv":
-            Serializer.to_csv(obj, path)
+        # Dump to file, streaming iterables other than lists (i.e. generators)
+        stream = isinstance(obj, Iterable) and not isinstance(obj, (list, tuple, dict, str))
+        if path.suffix in (".parquet", ".feather", ".arrow"):
+            # Columnar formats hold rows, so a single object is one row
+            Serializer.write_file(obj if stream or isinstance(obj, (list, tuple)) else [obj], path)
+        elif path.suffix == ".csv":
+            if stream:
+                Serializer.write_csv(obj, path)
+            else:
+                Serializer.to_csv(obj, path)
         elif path.suffix == ".json":
-            Serializer.to_json(obj, path)
+            if stream:
+                Serializer.write_json(obj, path)
+            else:
+                Serializer.to_json(obj, path)
         else:
             Serializer.to_table(obj, path)
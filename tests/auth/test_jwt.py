@@ -1,10 +1,16 @@
+import json
+import time
+
 import jwt
 import pytest
 
-from contxt.auth.jwt import ContxtTokenValidator, InvalidTokenError, TokenValidator
+from contxt.auth import jwt as jwt_module
+from contxt.auth.jwt import ContxtTokenValidator, InvalidTokenError, JwksCache, TokenValidator
 
 pytest.importorskip("cryptography", reason="Requires cryptography")
 
+from jwt.algorithms import RSAAlgorithm  # noqa: E402
+
 
 @pytest.fixture
 def public_key():
@@ -53,3 +59,54 @@ def test_contxt_token_validator():
     token_validator = ContxtTokenValidator(audience="foo_audience")
     with pytest.raises(InvalidTokenError):
         token_validator.validate("bad_token")
+
+
+def make_jwks(public_key, *kids):
+    jwk = json.loads(RSAAlgorithm.to_jwk(RSAAlgorithm(RSAAlgorithm.SHA256).prepare_key(public_key)))
+    return {"keys": [{**jwk, "kid": kid} for kid in kids]}
+
+
+def test_jwks_cache(public_key):
+    now = [0.0]
+    jwks = [make_jwks(public_key, "a")]
+    cache = JwksCache(lambda: jwks[0], ttl=100, min_refetch_interval=10, clock=lambda: now[0])
+
+    assert cache.get("a") is not None
+    assert cache.get("a") is cache.get("a")
+    # unknown key ids are refetched, at most once per interval
+    assert cache.get("b") is None
+    assert cache.fetch_count == 1
+    jwks[0] = make_jwks(public_key, "a", "b")
+    now[0] = 10
+    assert cache.get("b") is not None
+    assert cache.get("c") is None
+    assert cache.fetch_count == 2
+    # and all keys once expired
+    now[0] = 110
+    cache.get("a")
+    assert cache.fetch_count == 3
+
+
+def test_token_validator_caches_validated_tokens(public_key, private_key, monkeypatch):
+    claims = {"aud": "foo_audience", "iss": "foo_issuer", "exp": int(time.time()) + 60}
+    validator = TokenValidator(audience=claims["aud"], issuer=claims["iss"], public_key=public_key)
+    token = jwt.encode(claims, private_key, algorithm="RS256")
+    assert validator.validate(token) == claims
+
+    decodes = []
+    monkeypatch.setattr(jwt_module, "decode", lambda *args, **kwargs: decodes.append(args))
+    assert validator.validate(token) == claims
+    assert not decodes
+
+
+def test_token_validator_with_jwks(public_key, private_key):
+    claims = {"aud": "foo_audience", "iss": "foo_issuer"}
+    validator = TokenValidator(
+        audience=claims["aud"],
+        issuer=claims["iss"],
+        public_key=JwksCache(lambda: make_jwks(public_key, "a")),
+    )
+    token = jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "a"})
+    assert validator.validate(token) == claims
+    with pytest.raises(InvalidTokenError):
+        validator.validate(jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "b"}))
@@ -0,0 +1,123 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import jwt
+import pytest
+
+from contxt.auth.refresh import TokenRefreshManager
+
+
+def make_token(expires_in: float, **claims) -> str:
+    return jwt.encode({"exp": time.time() + expires_in, **claims}, "secret", algorithm="HS256").decode()
+
+
+@pytest.fixture
+def manager():
+    manager = TokenRefreshManager(refresh_fraction=0.5, min_refresh_interval=0)
+    manager.expiry_leeway = 0
+    yield manager
+    manager.reset()
+
+
+def test_single_flight(manager):
+    fetches = []
+    release = Event()
+
+    def fetch():
+        fetches.append(1)
+        release.wait(5)
+        return make_token(3600)
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(manager.get_token, "key", fetch) for _ in range(8)]
+        time.sleep(0.2)
+        release.set()
+        tokens = {f.result() for f in futures}
+    assert len(fetches) == 1
+    assert len(tokens) == 1
+
+
+def test_uses_stored_token(manager):
+    stored = make_token(3600)
+    assert (
+        manager.get_token("key", lambda: pytest.fail("fetched"), stored=lambda newer_than: stored)
+        == stored
+    )
+    # an expired stored token is fetched instead
+    fresh = make_token(3600, n=1)
+    assert manager.get_token("other", lambda: fresh, stored=lambda newer_than: make_token(-1)) == fresh
+
+
+def test_refreshes_in_background(manager):
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return make_token(1, n=len(fetches))
+
+    token0 = manager.get_token("key", fetch)
+    assert manager.get_token("key", fetch) == token0
+    # refreshed halfway through the token's lifetime, since it was used
+    time.sleep(0.8)
+    assert len(fetches) == 2
+    token1 = manager.get_token("key", fetch)
+    assert token1 != token0
+
+    # unused tokens lapse instead
+    time.sleep(1.2)
+    assert len(fetches) == 3
+    time.sleep(1.2)
+    assert len(fetches) == 3
+    # and are fetched again on demand
+    assert manager.get_token("key", fetch) != token1
+    assert len(fetches) == 4
+
+
+def test_refresh_uses_token_stored_by_another_process(manager):
+    store = {"token": make_token(1, n=0)}
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        store["token"] = make_token(1, n=len(fetches))
+        return store["token"]
+
+    def stored(newer_than):
+        token = store["token"]
+        return (
+            token if newer_than is None or jwt.decode(token, verify=False)["exp"] > newer_than else None
+        )
+
+    token0 = manager.get_token("key", fetch, stored=stored)
+    assert manager.get_token("key", fetch, stored=stored) == token0
+    assert not fetches
+    # another process refreshed the token first
+    store["token"] = make_token(2, n=-1)
+    time.sleep(0.8)
+    assert not fetches
+    assert manager.get_token("key", fetch, stored=stored) == store["token"] != token0
+
+    # otherwise, the stored token is no newer than the refreshed one, so a new one is fetched
+    time.sleep(1.2)
+    assert len(fetches) == 1
+    assert manager.get_token("key", fetch, stored=stored) == store["token"]
+
+
+def test_refreshes_are_jittered():
+    manager = TokenRefreshManager(refresh_fraction=0.5, min_refresh_interval=0, refresh_jitter=0.5)
+    delays = []
+    manager._schedule = lambda key, entry, fetch, delay: delays.append(delay)
+    for i in range(20):
+        manager.get_token(i, lambda: make_token(100))
+    assert all(24 < delay <= 50 for delay in delays)
+    assert len({round(delay, 3) for delay in delays}) > 1
+
+
+def test_failed_fetch_is_raised(manager):
+    def fetch():
+        raise RuntimeError("auth provider down")
+
+    with pytest.raises(RuntimeError):
+        manager.get_token("key", fetch)
+    assert manager.get_token("key", lambda: make_token(60))
@@ -0,0 +1,82 @@
+import time
+
+import jwt
+
+from contxt.auth.machine import PlainMachineTokenProvider
+from contxt.auth.refresh import TokenRefreshManager
+from contxt.auth.registry import TokenProviderRegistry
+from contxt.services import AssetsService, EventsService
+from contxt.services.api import ConfiguredLegacyApi
+from contxt.utils.config import ApiEnvironment, ContxtEnvironmentConfig
+
+
+def env_config(
+    service: str,
+    audience: str,
+    client_id: str = "client",
+    secret: str = "secret",
+    auth_required: bool = True,
+) -> ContxtEnvironmentConfig:
+    return ContxtEnvironmentConfig(
+        service=service,
+        environment="staging",
+        isGraph=False,
+        apiEnvironment=ApiEnvironment(
+            baseUrl=f"https://{service}.example.com", clientId=audience, authRequired=auth_required
+        ),
+        clientId=client_id,
+        clientSecret=secret,
+    )
+
+
+def test_registry_shares_token_providers():
+    registry = TokenProviderRegistry()
+    provider = registry.get_token_provider(env_config("assets", "audience"))
+    assert isinstance(provider, PlainMachineTokenProvider)
+    assert registry.get_token_provider(env_config("facilities", "audience")) is provider
+    assert registry.get_token_provider(env_config("assets", "other")) is not provider
+    assert (
+        registry.get_token_provider(env_config("assets", "audience", client_id="other")) is not provider
+    )
+    assert registry.get_token_provider(env_config("assets", "audience", secret="other")) is not provider
+    assert (
+        registry.get_token_provider(env_config("assets", "audience", auth_required=False))
+        is not provider
+    )
+
+    registry.clear()
+    assert registry.get_token_provider(env_config("assets", "audience")) is not provider
+
+
+def test_configured_apis_share_token_providers():
+    assets = AssetsService(env_config("assets", "shared-audience"))
+    events = EventsService(env_config("events", "shared-audience"))
+    assert assets.token_provider is events.token_provider
+
+    override = PlainMachineTokenProvider(env_config("assets", "shared-audience"))
+    assert (
+        ConfiguredLegacyApi(env_config("assets", "shared-audience"), override).token_provider is override
+    )
+
+
+def test_refresh_keyed_like_token_providers(monkeypatch):
+    fetched = []
+    token = jwt.encode({"exp": time.time() + 3600}, "secret", algorithm="HS256").decode()
+    monkeypatch.setattr(
+        PlainMachineTokenProvider, "_fetch_token", lambda self: fetched.append(self) or token
+    )
+    monkeypatch.setattr(PlainMachineTokenProvider, "_stored_token", lambda self, newer_than=None: None)
+    refresh_manager = TokenRefreshManager()
+    other_provider = env_config("assets", "audience")
+    other_provider.apiEnvironment.authProvider = "other.auth0.com"
+    configs = [
+        env_config("assets", "audience"),
+        env_config("assets", "audience", secret="other"),
+        other_provider,
+    ]
+    try:
+        for config in configs:
+            PlainMachineTokenProvider(config, refresh_manager).access_token
+    finally:
+        refresh_manager.reset()
+    assert len(fetched) == 3
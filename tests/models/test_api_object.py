@@ -0,0 +1,163 @@
+import json
+import pickle
+from copy import deepcopy
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, ClassVar, Dict, List, Optional
+
+import pytest
+
+from contxt.models import ApiField, ApiObject, slotted
+from contxt.models.assets import Asset, AssetType, AttributeValue, CompleteAsset, Metric, MetricValue
+from contxt.models.iot import Field, FieldValueType
+from contxt.utils.serializer import Serializer
+
+
+def field_record(i: int) -> dict:
+    return {
+        "id": i,
+        "label": f"Field {i}",
+        "output_id": "7",
+        "field_descriptor": f"field_{i}",
+        "field_human_name": f"Field {i}",
+        "units": "kWh",
+        "scalar": "1.5",
+        "value_type": "numeric",
+        "FieldGroupingField": {"id": i},
+        "created_at": "2020-01-02T03:04:05.000Z",
+    }
+
+
+def test_from_api():
+    record = field_record(1)
+    original = deepcopy(record)
+    field = Field.from_api(record)
+    assert field.id == 1
+    assert field.output_id == 7
+    assert field.scalar == 1.5
+    assert field.value_type is FieldValueType.NUMERIC
+    assert field.name is None
+    assert field.created_at.year == 2020
+    assert field.field_grouping_field == {"id": 1}
+    # input is left untouched
+    assert record == original
+
+
+def test_from_api_missing_field():
+    record = field_record(1)
+    del record["units"]
+    with pytest.raises(KeyError, match="units"):
+        Field.from_api(record)
+
+
+def test_from_api_many_shares_strings():
+    # parsed JSON has a distinct string object per record
+    records = json.loads(json.dumps([field_record(i) for i in range(3)]))
+    assert records[0]["units"] is not records[1]["units"]
+
+    fields = Field.from_api_many(records)
+    assert fields == [Field.from_api(r) for r in records]
+    assert fields[0].units is fields[1].units is fields[2].units
+
+
+@slotted
+@dataclass
+class Reading(ApiObject):
+    _api_fields: ClassVar = (
+        ApiField("id", creatable=True),
+        ApiField("value", data_type=float, updatable=True),
+    )
+
+    id: str
+    value: float = 0.0
+
+    def post(self) -> Dict:
+        return {**super().post(), "source": "test"}
+
+
+def test_slotted():
+    reading = Reading.from_api({"id": "r", "value": "1.5"})
+    assert not hasattr(reading, "__dict__")
+    assert Reading("r") == Reading("r", 0.0)
+    with pytest.raises(AttributeError):
+        reading.other = 1
+
+    assert Serializer.to_dict(reading) == {"id": "r", "value": 1.5}
+    assert reading.post() == {"id": "r", "source": "test"}
+    assert reading.put() == {"value": 1.5}
+    assert pickle.loads(pickle.dumps(reading)) == reading
+
+
+def test_complete_asset_with_slotted_values():
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    asset_type = AssetType(label="Meter", description="", organization_id="org", id="type")
+    asset_type.attributes = []
+    asset_type.metrics = [
+        Metric(
+            asset_type_id="type",
+            label="Usage",
+            description="",
+            organization_id="org",
+            time_interval="daily",
+            units="kWh",
+            id="metric",
+        )
+    ]
+    value = MetricValue(
+        asset_id="asset",
+        asset_metric_id="metric",
+        effective_start_date=start,
+        effective_end_date=start,
+        notes="",
+        value=1.0,
+    )
+    asset = Asset(
+        asset_type_id="type",
+        label="Meter 1",
+        description="",
+        organization_id="org",
+        metric_values=[value],
+    )
+    assert not hasattr(value, "__dict__")
+    assert not hasattr(AttributeValue("asset", "attribute", "", 1), "__dict__")
+
+    complete_asset = CompleteAsset(asset, asset_type)
+    assert complete_asset.metrics == {"usage": {start: 1.0}}
+    assert value.post()["value"] == 1.0
+
+
+@dataclass
+class ScaledReading(ApiObject):
+    _api_fields: ClassVar = (
+        ApiField("id"),
+        ApiField("value", data_type=float),
+        ApiField("values", data_type=float, optional=True),
+    )
+
+    id: str
+    value: float
+    values: Optional[List[float]] = None
+
+    @classmethod
+    def clean_api_value(cls, field: ApiField, value: Any) -> Any:
+        value = super().clean_api_value(field, value)
+        return value * 1000 if field.data_type is float and isinstance(value, float) else value
+
+
+def test_from_api_overridden_clean_api_value():
+    reading = ScaledReading.from_api({"id": "r", "value": "1.5", "values": ["1", None]})
+    assert reading == ScaledReading("r", 1500.0, [1000.0, None])
+    assert ScaledReading.from_api_many([{"id": "r", "value": 2}]) == [ScaledReading("r", 2000.0)]
+    # not inherited by the parsers of other models
+    assert Reading.from_api({"id": "r", "value": "1.5"}).value == 1.5
+
+
+@dataclass
+class OffsetReading(Reading):
+    @classmethod
+    def from_api(cls, api_dict: Dict) -> "OffsetReading":
+        return cls(api_dict["id"], float(api_dict["value"]) + 1)
+
+
+def test_from_api_many_overridden_from_api():
+    assert OffsetReading.from_api_many([{"id": "r", "value": "1"}]) == [OffsetReading("r", 2.0)]
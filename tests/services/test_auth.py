@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import time
+
+import jwt
+import pytest
+
+from contxt.services import auth
+from contxt.services.auth import SqliteTokenStore, StoredTokenCache, TokenConfig, YamlTokenStore
+from contxt.utils.persistent_contxt_config import PersistentContxtConfig
+
+
+def make_token(expires_in: float) -> str:
+    return jwt.encode({"exp": time.time() + expires_in}, "secret", algorithm="HS256").decode()
+
+
+@pytest.fixture
+def token_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    return StoredTokenCache()
+
+
+def count_loads(monkeypatch):
+    loads = []
+    read_tokens = YamlTokenStore.read_tokens
+
+    def counted(self):
+        loads.append(self.location)
+        return read_tokens(self)
+
+    monkeypatch.setattr(YamlTokenStore, "read_tokens", counted)
+    return loads
+
+
+def test_token_cache_serves_from_memory(token_cache, monkeypatch):
+    token = make_token(3600)
+    token_cache.set_token("client", "audience", token)
+
+    loads = count_loads(monkeypatch)
+    decodes = []
+    monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: decodes.append(args))
+    # shared by new instances, without reading the file or decoding the token
+    for _ in range(3):
+        assert StoredTokenCache().get_token("client", "audience") == token
+    assert not loads and not decodes
+
+
+def test_token_cache_reads_file_on_miss(token_cache):
+    token = make_token(3600)
+    token_cache.set_token("client", "audience", token)
+    # as if the token was stored by another process
+    StoredTokenCache._memory.pop(token_cache.store.location)
+
+    assert StoredTokenCache().get_token("client", "audience") == token
+    assert StoredTokenCache().get_token("client", "other") is None
+
+
+def test_token_cache_skips_expiring_tokens(token_cache):
+    token_cache.set_token("client", "audience", make_token(StoredTokenCache.expiry_leeway / 2))
+    assert token_cache.get_token("client", "audience") is None
+
+    token = make_token(3600)
+    token_cache.set_token("client", "audience", token)
+    token_cache.set_token("client", "other", make_token(3600))
+    assert token_cache.get_token("client", "audience") == token
+
+
+def test_token_cache_reads_newer_token_from_store(token_cache):
+    old = make_token(3600)
+    token_cache.set_token("client", "audience", old)
+    expires_at = jwt.decode(old, verify=False)["exp"]
+    assert token_cache.get_token("client", "audience", newer_than=expires_at) is None
+
+    # as if another process refreshed the token
+    new = make_token(7200)
+    token_cache.store.write_token("client", "audience", new)
+    assert token_cache.get_token("client", "audience") == old
+    assert token_cache.get_token("client", "audience", newer_than=expires_at) == new
+
+
+def test_token_cache_keeps_config_interface(token_cache):
+    assert isinstance(token_cache, PersistentContxtConfig)
+    assert token_cache.filename.endswith("auth_tokens.yml")
+    assert token_cache.config is None
+    token = make_token(3600)
+    token_cache.config = TokenConfig(tokens=[])
+    token_cache.config.set_token_for_client("client", "audience", token)
+    token_cache.write_contxt_file()
+
+    assert StoredTokenCache().get_token("client", "audience") == token
+    assert StoredTokenCache().config.tokens_for_client("client").audiences == {"audience": token}
+    # holds credentials, so is only readable by the user
+    assert os.stat(token_cache.filename).st_mode & 0o777 == 0o600
+
+
+def write_tokens(store_factory, writes: int):
+    store = store_factory()
+    for i in range(writes):
+        store.write_token(f"client-{os.getpid()}", f"audience-{i}", make_token(3600))
+
+
+@pytest.mark.parametrize("store_factory", [YamlTokenStore, SqliteTokenStore])
+def test_token_store_concurrent_writes(store_factory, tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=write_tokens, args=(store_factory, 10)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    # no token was lost to a concurrent write
+    tokens = store_factory().read_tokens()
+    assert len(tokens) == 40
+    assert StoredTokenCache(store_factory()).get_token(f"client-{processes[0].pid}", "audience-9")
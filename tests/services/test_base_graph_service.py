@@ -0,0 +1,128 @@
+import json
+import sys
+
+import pytest
+import sgqlc.types
+from sgqlc.operation import Operation
+
+from contxt.services.base_graph_service import BaseGraphService, LazySchema, SchemaMissingException
+from contxt.services.schema_artifacts import file_digest, text_digest
+from contxt.utils.cache import TTLCache
+
+
+def test_lazy_schema_imports_on_first_access():
+    schema = LazySchema("json.decoder", "JSONDecoder")
+    assert not schema.is_loaded
+    assert schema.decode is sys.modules["json.decoder"].JSONDecoder.decode
+    assert schema.is_loaded
+
+
+def test_lazy_schema_falls_back_to_full_schema(monkeypatch):
+    resolved = {}
+    monkeypatch.setattr("contxt.services.schema_artifacts._resolved_modules", resolved)
+    # stands in for a trimmed schema without the type
+    monkeypatch.setattr(
+        "contxt.services.base_graph_service.resolve_schema_module",
+        lambda module_path: resolved.get(module_path, "json.encoder"),
+    )
+    schema = LazySchema("json.decoder", prefer_trimmed=True)
+    assert schema.JSONEncoder is sys.modules["json.encoder"].JSONEncoder
+    assert schema.JSONDecoder is sys.modules["json.decoder"].JSONDecoder
+    assert resolved == {"json.decoder": "json.decoder"}
+    with pytest.raises(AttributeError):
+        schema.Missing
+
+
+def test_write_schema_digest_matches_dump(tmp_path):
+    data = {"data": {"__schema__": {"description": "caf\u00e9\nmenu"}}}
+    _, json_schema_filepath, _ = FakeMutationService(None).write_schema(
+        data, "my-service", str(tmp_path), force=True
+    )
+    dump = json.dumps(data, sort_keys=True, indent=2, default=str, ensure_ascii=False)
+    assert file_digest(json_schema_filepath) == text_digest(dump)
+
+
+def test_lazy_schema_missing():
+    schema = LazySchema("contxt.schemas.does_not_exist.does_not_exist_schema")
+    with pytest.raises(SchemaMissingException):
+        schema.Query
+
+
+class Thing(sgqlc.types.Type):
+    __schema__ = sgqlc.types.Schema()
+    id = sgqlc.types.Field(sgqlc.types.String)
+
+
+class Mutation(sgqlc.types.Type):
+    __schema__ = Thing.__schema__
+    touch = sgqlc.types.Field(Thing, args={"id": sgqlc.types.Arg(sgqlc.types.String)})
+
+
+class FakeMutationService(BaseGraphService):
+    def __init__(self, responder):
+        self.endpoint = responder
+        self.requests = []
+
+
+def add_touch(op, id, alias):
+    op.touch(id=id, __alias__=alias).id()
+
+
+def test_run_mutations_batches_and_maps_errors():
+    def respond(op):
+        service.requests.append(op)
+        aliases = [s.__alias__ for s in op]
+        return {
+            "data": {alias: None if alias == "m1" else {"id": alias} for alias in aliases},
+            "errors": [{"message": "not found", "path": ["m1"]}] if "m1" in aliases else [],
+        }
+
+    service = FakeMutationService(respond)
+    results = service.run_mutations(Mutation, ["a", "b", "c"], add_touch, max_per_request=2)
+
+    assert len(service.requests) == 2
+    assert [r.alias for r in results] == ["m0", "m1", "m2"]
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[0].data.id == "m0"
+    assert results[1].data is None
+    assert results[1].errors[0]["message"] == "not found"
+
+
+def test_run_mutations_request_error_fails_whole_batch():
+    service = FakeMutationService(lambda op: {"data": None, "errors": [{"message": "invalid token"}]})
+    results = service.run_mutations(Mutation, ["a", "b"], add_touch)
+
+    assert [r.ok for r in results] == [False, False]
+    assert all(r.data is None for r in results)
+
+
+class Query(sgqlc.types.Type):
+    __schema__ = Thing.__schema__
+    thing = sgqlc.types.Field(Thing, args={"id": sgqlc.types.Arg(sgqlc.types.String)})
+
+
+def test_run_cached_keys_on_variables_and_invalidates():
+    requests = []
+
+    def respond(op):
+        requests.append(op)
+        return {"data": {"thing": {"id": "1"}}}
+
+    service = FakeMutationService(respond)
+    service.url = "http://graph"
+    service.query_cache = TTLCache()
+
+    def get_thing(id):
+        op = Operation(Query)
+        op.thing(id=id).id()
+        return service.run_cached(op, "things")
+
+    get_thing("1")
+    get_thing("1")
+    get_thing("2")
+    assert len(requests) == 2
+
+    service.invalidate_cached("things")
+    get_thing("1")
+    assert len(requests) == 3
+    assert (service.query_cache.stats.hits, service.query_cache.stats.misses) == (1, 3)
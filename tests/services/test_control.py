@@ -0,0 +1,292 @@
+import sys
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+import sgqlc.types
+from sgqlc.types import Field, Float, Input, Int, String, Type, list_of
+
+from contxt.models.control import ComponentSavings
+from contxt.models.control import ControllableComponent as Component
+from contxt.models.control import EventTransition, NewComponent, ProposalApproval
+from contxt.services.control import control
+from contxt.services.control.control import ControlService
+from contxt.utils.cache import TTLCache
+
+# Just the types used by the bulk mutations. This module stands in for the generated schema.
+fake_schema = sgqlc.types.Schema()
+
+
+class TransitionControlEventInput(Input):
+    __schema__ = fake_schema
+    control_event_id = Field(String)
+    transition_event = Field(String)
+    message = Field(String)
+
+
+class EventApprovalInputRecordInput(Input):
+    __schema__ = fake_schema
+    id = Field(String)
+
+
+class ComponentToControlInputRecordInput(Input):
+    __schema__ = fake_schema
+    controllable_component_id = Field(String)
+    state_definition_slug = Field(String)
+
+
+class ApproveProposalInput(Input):
+    __schema__ = fake_schema
+    approved_proposal = Field(EventApprovalInputRecordInput)
+    approved_components = Field(list_of(ComponentToControlInputRecordInput))
+
+
+class EventProposalMetricInput(Input):
+    __schema__ = fake_schema
+    event_proposal_id = Field(String)
+    controllable_component_id = Field(String)
+    project_success_metric_id = Field(String)
+    projected_impact_amount = Field(Float)
+
+
+class CreateEventProposalMetricInput(Input):
+    __schema__ = fake_schema
+    event_proposal_metric = Field(EventProposalMetricInput)
+
+
+class ControllableComponentInput(Input):
+    __schema__ = fake_schema
+    controlled_by_edge_node_client_id = Field(String)
+    label = Field(String)
+    slug = Field(String)
+    description = Field(String)
+    facility_id = Field(Int)
+
+
+class CreateControllableComponentInput(Input):
+    __schema__ = fake_schema
+    controllable_component = Field(ControllableComponentInput)
+
+
+class StateMachine(Type):
+    __schema__ = fake_schema
+    current_state = Field(String)
+
+
+class ControlEvent(Type):
+    __schema__ = fake_schema
+    id = Field(String)
+    state_machine = Field(StateMachine)
+
+
+class TransitionControlEventPayload(Type):
+    __schema__ = fake_schema
+    control_event = Field(ControlEvent)
+
+
+class EventProposal(Type):
+    __schema__ = fake_schema
+    id = Field(String)
+    start_time = Field(String)
+    end_time = Field(String)
+
+
+class ApproveProposalPayload(Type):
+    __schema__ = fake_schema
+    event_proposal = Field(EventProposal)
+
+
+class EventProposalMetric(Type):
+    __schema__ = fake_schema
+    project_success_metric_id = Field(String)
+
+
+class CreateEventProposalMetricPayload(Type):
+    __schema__ = fake_schema
+    event_proposal_metric = Field(EventProposalMetric)
+
+
+class ControllableComponent(Type):
+    __schema__ = fake_schema
+    id = Field(String)
+
+
+class CreateControllableComponentPayload(Type):
+    __schema__ = fake_schema
+    controllable_component = Field(ControllableComponent)
+
+
+class Mutation(Type):
+    __schema__ = fake_schema
+    transition_control_event = Field(
+        TransitionControlEventPayload, args={"input": sgqlc.types.Arg(TransitionControlEventInput)}
+    )
+    approve_proposal = Field(
+        ApproveProposalPayload, args={"input": sgqlc.types.Arg(ApproveProposalInput)}
+    )
+    create_event_proposal_metric = Field(
+        CreateEventProposalMetricPayload, args={"input": sgqlc.types.Arg(CreateEventProposalMetricInput)}
+    )
+    create_controllable_component = Field(
+        CreateControllableComponentPayload,
+        args={"input": sgqlc.types.Arg(CreateControllableComponentInput)},
+    )
+
+
+class FakeGraphEndpoint:
+    """Answers each aliased mutation of a request with `resolve(field_name, input)`, like a
+    GraphQL server would. Mutations for which `fail(input)` returns a message fail on their own."""
+
+    def __init__(
+        self,
+        resolve: Callable[[str, Any], Dict[str, Any]],
+        fail: Callable[[Any], Optional[str]] = lambda input: None,
+    ):
+        self.resolve = resolve
+        self.fail = fail
+        self.requests = []
+
+    def __call__(self, op):
+        self.requests.append(op)
+        data, errors = {}, []
+        for selection in op:
+            alias, input = selection.__alias__, selection.__args__["input"]
+            message = self.fail(input)
+            if message:
+                data[alias] = None
+                errors.append({"message": message, "path": [alias]})
+            else:
+                data[alias] = self.resolve(selection.__field__.graphql_name, input)
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+
+class FakeControlService(ControlService):
+    def __init__(self, endpoint: FakeGraphEndpoint):
+        self.endpoint = endpoint
+        self.url = "http://control"
+        self.query_cache = TTLCache()
+
+
+@pytest.fixture(autouse=True)
+def schema(monkeypatch):
+    monkeypatch.setattr(control, "schema", sys.modules[__name__])
+
+
+def cache_lookups(service: ControlService, *tags: str) -> None:
+    for tag in tags:
+        service.query_cache.set(tag, {}, tags=[(service.url, tag)])
+
+
+def test_transition_events():
+    def resolve(field_name, input):
+        assert field_name == "transitionControlEvent"
+        state = {"start": "active", "stop": "completed"}[input.transition_event]
+        return {"controlEvent": {"id": input.control_event_id, "stateMachine": {"currentState": state}}}
+
+    endpoint = FakeGraphEndpoint(
+        resolve, fail=lambda input: input.control_event_id == "e2" and "not found"
+    )
+    service = FakeControlService(endpoint)
+    cache_lookups(service, "controllables", "facility", "projects")
+
+    transitions = [
+        EventTransition("e1", "start", message="go"),
+        EventTransition("e2", "start"),
+        EventTransition("e3", "stop"),
+    ]
+    results = service.transition_events(transitions, max_per_request=2)
+
+    assert len(endpoint.requests) == 2
+    assert 'm1: transitionControlEvent(input: {controlEventId: "e2"' in str(endpoint.requests[0])
+    assert [r.alias for r in results] == ["m0", "m1", "m2"]
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[0].data.control_event.id == "e1"
+    assert results[0].data.control_event.state_machine.current_state == "active"
+    assert results[2].data.control_event.state_machine.current_state == "completed"
+    assert results[1].data is None
+    assert results[1].errors == [{"message": "not found", "path": ["m1"]}]
+    # cached lookups that include proposals are stale
+    cached = [service.query_cache.get(tag) for tag in ("controllables", "facility", "projects")]
+    assert cached == [None, None, {}]
+
+
+def test_approve_proposals():
+    approved = {}
+
+    def resolve(field_name, input):
+        assert field_name == "approveProposal"
+        proposal_id = input.approved_proposal.id
+        approved[proposal_id] = [
+            (c.controllable_component_id, c.state_definition_slug) for c in input.approved_components
+        ]
+        return {"eventProposal": {"id": proposal_id, "startTime": "2021-01-01", "endTime": "2021-01-02"}}
+
+    endpoint = FakeGraphEndpoint(
+        resolve, fail=lambda input: input.approved_proposal.id == "p1" and "expired"
+    )
+    service = FakeControlService(endpoint)
+    approvals = [
+        ProposalApproval("p1", [Component("c1", "hvac")]),
+        ProposalApproval("p2", [Component("c1", "hvac"), Component("c2", None)]),
+    ]
+    results = service.approve_proposals(approvals)
+
+    assert len(endpoint.requests) == 1
+    assert [r.ok for r in results] == [False, True]
+    assert results[0].errors[0]["message"] == "expired"
+    assert results[1].data.event_proposal.id == "p2"
+    assert results[1].data.event_proposal.end_time == "2021-01-02"
+    assert approved == {"p2": [("c1", "hvac"), ("c2", None)]}
+
+
+def test_add_savings_for_component_control_events():
+    def resolve(field_name, input):
+        assert field_name == "createEventProposalMetric"
+        metric = input.event_proposal_metric
+        assert (metric.event_proposal_id, metric.projected_impact_amount) == ("p1", 12.5)
+        return {"eventProposalMetric": {"projectSuccessMetricId": metric.project_success_metric_id}}
+
+    endpoint = FakeGraphEndpoint(
+        resolve,
+        fail=lambda input: input.event_proposal_metric.controllable_component_id == "c2" and "denied",
+    )
+    service = FakeControlService(endpoint)
+    savings = [ComponentSavings(f"c{i}", "p1", f"metric-{i}", 12.5) for i in range(4)]
+    results = service.add_savings_for_component_control_events(savings, max_per_request=3)
+
+    assert len(endpoint.requests) == 2
+    assert [r.alias for r in results] == ["m0", "m1", "m2", "m3"]
+    assert [r.ok for r in results] == [True, True, False, True]
+    assert [r.data and r.data.event_proposal_metric.project_success_metric_id for r in results] == [
+        "metric-0",
+        "metric-1",
+        None,
+        "metric-3",
+    ]
+
+
+def test_create_components():
+    def resolve(field_name, input):
+        assert field_name == "createControllableComponent"
+        component = input.controllable_component
+        return {"controllableComponent": {"id": f"{component.facility_id}-{component.slug}"}}
+
+    endpoint = FakeGraphEndpoint(
+        resolve, fail=lambda input: input.controllable_component.slug == "taken" and "duplicate slug"
+    )
+    service = FakeControlService(endpoint)
+    cache_lookups(service, "controllables", "facility", "edge_node", "definitions")
+
+    components = [
+        NewComponent("HVAC", "hvac", "", facility_id=1, controlled_by_edge_client_id="edge-1"),
+        NewComponent("Taken", "taken", "", facility_id=1),
+    ]
+    results = service.create_components(components)
+
+    assert 'controlledByEdgeNodeClientId: "edge-1"' in str(endpoint.requests[0])
+    assert [r.ok for r in results] == [True, False]
+    assert results[0].data.controllable_component.id == "1-hvac"
+    assert results[1].errors == [{"message": "duplicate slug", "path": ["m1"]}]
+    cached = [
+        service.query_cache.get(tag) for tag in ("controllables", "facility", "edge_node", "definitions")
+    ]
+    assert cached == [None, None, None, {}]
@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+from typing import List
+
+import pytest
+
+# Modules that pull in generated sgqlc schemas (or pandas), and so must only be imported on demand
+LAZY_MODULES = (
+    "contxt.schemas.foundry_graph.foundry_graph_schema",
+    "contxt.schemas.nionic.nionic_schema",
+    "contxt.services.control.control",
+    "contxt.services.base.base",
+    "contxt.services.nionic_iot",
+    "sgqlc.codegen.schema",
+)
+
+
+def loaded_modules(statement: str) -> List[str]:
+    """Runs `statement` in a fresh interpreter, returning all modules it loaded"""
+    proc = subprocess.run(
+        [sys.executable, "-c", f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+@pytest.mark.parametrize(
+    "statement", ["import contxt.services", "from contxt.services import IotService"]
+)
+def test_services_import_does_not_load_schemas(statement):
+    modules = loaded_modules(statement)
+    assert not [m for m in LAZY_MODULES if m in modules]
+
+
+def test_graph_service_is_imported_on_access():
+    modules = loaded_modules("from contxt.services import BaseService")
+    assert "contxt.services.base.base" in modules
+    assert "contxt.schemas.foundry_graph.foundry_graph_schema" not in modules
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from contxt.services.iot import merge_time_series
+
+START = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+
+def points(hours, value):
+    # a generator, as streamed page by page
+    return ((START + timedelta(hours=h), value) for h in hours)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_merge_time_series(descending):
+    series = {
+        "power": points(sorted([0, 1, 3], reverse=descending), 1.0),
+        "usage": points(sorted([1, 2, 3], reverse=descending), 2.0),
+        "empty": points([], 3.0),
+    }
+    rows = list(merge_time_series(series))
+
+    expected = [
+        {"timestamp": START, "power": 1.0},
+        {"timestamp": START + timedelta(hours=1), "power": 1.0, "usage": 2.0},
+        {"timestamp": START + timedelta(hours=2), "usage": 2.0},
+        {"timestamp": START + timedelta(hours=3), "power": 1.0, "usage": 2.0},
+    ]
+    assert rows == (expected[::-1] if descending else expected)
@@ -0,0 +1,152 @@
+import json
+import os
+from importlib import util
+
+import pytest
+
+from contxt.services.base_graph_service import BaseGraphService, update_schemas
+from contxt.services.schema_artifacts import (
+    collect_schema_usage,
+    generate_schema_modules,
+    resolve_schema_module,
+    trim_schema,
+    trimmed_path,
+)
+
+graphql = pytest.importorskip("graphql")
+
+SDL = """
+interface Node { nodeId: ID! }
+type Facility implements Node { nodeId: ID! id: Int! name: String! components: [Component!]! }
+type Component implements Node { nodeId: ID! slug: String! facility: Facility }
+type Report implements Node { nodeId: ID! title: String! }
+input ComponentInput { slug: String! facilityId: Int! }
+input ReportInput { title: String! }
+type CreateComponentPayload { component: Component query: Query }
+type CreateReportPayload { report: Report }
+type Query { facility(id: Int!): Facility reports: [Report!]! node(nodeId: ID!): Node }
+type Mutation {
+  createComponent(input: ComponentInput!): CreateComponentPayload
+  createReport(input: ReportInput!): CreateReportPayload
+}
+"""
+
+
+@pytest.fixture
+def introspection():
+    schema = graphql.build_schema(SDL)
+    return {"data": graphql.introspection_from_schema(schema)}
+
+
+def type_names(schema):
+    return {t["name"] for t in schema["types"] if not t["name"].startswith("__")}
+
+
+def test_trim_schema(introspection):
+    schema = introspection["data"]["__schema"]
+    trimmed = trim_schema(schema, root_fields={"facility", "create_component"}, type_names=set())
+
+    names = type_names(trimmed)
+    assert {"Query", "Mutation", "Facility", "Component", "Node", "ComponentInput"} <= names
+    assert not {"Report", "ReportInput", "CreateReportPayload"} & names
+    query = next(t for t in trimmed["types"] if t["name"] == "Query")
+    assert [f["name"] for f in query["fields"]] == ["facility"]
+
+
+def test_trim_schema_without_mutations(introspection):
+    schema = introspection["data"]["__schema"]
+    trimmed = trim_schema(schema, root_fields={"reports"}, type_names={"ReportInput"})
+
+    assert trimmed["mutationType"] is None
+    assert "Mutation" not in type_names(trimmed)
+    assert "ReportInput" in type_names(trimmed)
+
+
+def test_collect_schema_usage():
+    root_fields, types = collect_schema_usage()
+    assert {"edge_control_events", "transition_control_event", "metric_data", "users"} <= root_fields
+    assert {"Query", "Mutation", "TransitionControlEventInput"} <= types
+
+
+def test_generate_schema_modules(introspection, tmp_path, monkeypatch):
+    monkeypatch.setattr("contxt.services.schema_artifacts.__version__", "1.2.3")
+    package = tmp_path / "fake_schemas" / "fake"
+    package.mkdir(parents=True)
+    json_path = package / "fake_schema.json"
+    json_path.write_text(json.dumps(introspection))
+    py_path = package / "fake_schema.py"
+
+    generate_schema_modules("fake", str(json_path), str(py_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    # The trimmed module is importable and only has the types used by the SDK
+    spec = util.spec_from_file_location("fake_schema_trimmed", trimmed_path(str(py_path)))
+    module = util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert hasattr(module, "Facility") and not hasattr(module, "Report")
+
+    # Resolving hashes the dump, but not the SDK's source
+    def no_hashing(*args):
+        raise AssertionError("hashed on import")
+
+    monkeypatch.setattr("contxt.services.schema_artifacts.sdk_fingerprint", no_hashing)
+    module_path = "fake_schemas.fake.fake_schema"
+    assert resolve_schema_module(module_path) == f"{module_path}_trimmed"
+
+    # A changed introspection dump makes the trimmed module stale, even with the same size and mtime
+    stat = json_path.stat()
+    json_path.write_text(json_path.read_text().replace("Facility", "Fucility"))
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert json_path.stat().st_size == stat.st_size
+    monkeypatch.setattr("contxt.services.schema_artifacts._resolved_modules", {})
+    assert resolve_schema_module(module_path) == module_path
+
+
+@pytest.mark.parametrize("version", ["0.0.0", "unknown"])
+def test_generated_for_other_sdk_version(introspection, tmp_path, monkeypatch, version):
+    monkeypatch.setattr("contxt.services.schema_artifacts.__version__", version)
+    package = tmp_path / "other_schemas" / "other"
+    package.mkdir(parents=True)
+    json_path = package / "other_schema.json"
+    json_path.write_text(json.dumps(introspection))
+    generate_schema_modules("other", str(json_path), str(package / "other_schema.py"))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    # installs without a version may have changed services, so are never current
+    if version != "unknown":
+        monkeypatch.setattr("contxt.services.schema_artifacts.__version__", "1.2.3")
+    monkeypatch.setattr("contxt.services.schema_artifacts._resolved_modules", {})
+    assert (
+        resolve_schema_module("other_schemas.other.other_schema") == "other_schemas.other.other_schema"
+    )
+
+
+class FakeGraphService(BaseGraphService):
+    def __init__(self, service_name, data):
+        self.service_name = service_name
+        self.data = data
+        self.fetches = 0
+
+    def _get_endpoint(self):
+        pass
+
+    def fetch_schema(self):
+        self.fetches += 1
+        return self.data
+
+
+def test_update_schemas(introspection, tmp_path, capsys):
+    services = [FakeGraphService("fake-one", introspection), FakeGraphService("fake-two", introspection)]
+
+    update_schemas(services, base_file_path=str(tmp_path), max_workers=2)
+    for name in ("fake_one", "fake_two"):
+        assert (tmp_path / name / f"{name}_schema.py").exists()
+        assert (tmp_path / name / f"{name}_schema_trimmed.py").exists()
+
+    # Unchanged introspection results are not regenerated, unless forced
+    capsys.readouterr()
+    update_schemas(services, base_file_path=str(tmp_path))
+    assert "All schemas are up-to-date!" in capsys.readouterr().out
+    update_schemas(services, base_file_path=str(tmp_path), force=True)
+    assert "Schemas and types updated!" in capsys.readouterr().out
+    assert [s.fetches for s in services] == [3, 3]
@@ -0,0 +1,45 @@
+from contxt.utils.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(default_ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=30)
+
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.expirations) == (2, 1, 1)
+
+
+def test_ttl_cache_invalidates_by_tag():
+    cache = TTLCache()
+    cache.set("a", 1, tags=["x"])
+    cache.set("b", 2, tags=["x", "y"])
+    cache.set("c", 3, tags=["y"])
+
+    assert cache.invalidate("x") == 2
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.invalidate("x") == 0
+
+
+def test_ttl_cache_evicts_oldest_and_loads():
+    cache = TTLCache(max_size=2)
+    for key in "abc":
+        cache.get_or_load(key, lambda: key.upper())
+
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get_or_load("c", lambda: "unused") == "C"
+    assert cache.stats.evictions == 1
@@ -0,0 +1,183 @@
+import os
+import stat
+from dataclasses import dataclass
+from typing import List
+
+import pytest
+
+from contxt.services.auth import MachineClientConfig, TokenConfig
+from contxt.utils import config as config_module
+from contxt.utils import files
+from contxt.utils.config import (
+    ComponentConfig,
+    Config,
+    EvaporatorConfig,
+    FacilityConfig,
+    RefrigerationConfig,
+    config_class_fingerprint,
+    config_schema,
+    load_config_class_from_file,
+    load_config_class_from_object,
+    write_config_class_to_file,
+)
+
+
+def test_config_schema_is_memoized():
+    assert config_schema(TokenConfig) is config_schema(TokenConfig)
+    assert config_schema(TokenConfig) is not config_schema(MachineClientConfig)
+
+
+def test_config_round_trip(tmp_path):
+    config = TokenConfig(
+        tokens=[MachineClientConfig(clientId="client", audiences={"audience": "token"})]
+    )
+    filename = str(tmp_path / "tokens.yml")
+    write_config_class_to_file(filename, config, TokenConfig)
+    assert load_config_class_from_file(filename, TokenConfig) == config
+
+
+def test_write_config_keeps_file_mode(tmp_path):
+    config = TokenConfig(tokens=[])
+    new, existing = str(tmp_path / "new.yml"), str(tmp_path / "existing.yml")
+    with open(existing, "w"):
+        pass
+    os.chmod(existing, 0o640)
+
+    write_config_class_to_file(new, config, TokenConfig)
+    write_config_class_to_file(existing, config, TokenConfig, file_mode=0o600)
+    assert os.stat(new).st_mode & 0o777 == files.DEFAULT_FILE_MODE
+    assert os.stat(existing).st_mode & 0o777 == 0o640
+
+
+def facility(id: int, slug: str) -> FacilityConfig:
+    return FacilityConfig(
+        name=slug,
+        slug=slug,
+        id=id,
+        timezone="UTC",
+        components=[ComponentConfig(name=f"{slug}-{i}", slug=f"component-{i}") for i in range(3)],
+    )
+
+
+def test_config_indexes():
+    config = load_config_class_from_object(
+        {
+            "facilityConfigs": [
+                config_schema(FacilityConfig).dump(facility(i, f"facility-{i}")) for i in range(3)
+            ]
+        },
+        Config,
+    )
+    assert config.get_config_by_facility_id(1).slug == "facility-1"
+    assert config.get_config_by_facility_slug("facility-2").id == 2
+    assert config.get_config_by_facility_slug("missing") is None
+    assert (
+        config.get_config_by_facility_id(1).get_facility_component_with_slug("component-2").name
+        == "facility-1-2"
+    )
+
+    # indexes follow changes to the lists, and to the attributes
+    config.facilityConfigs.append(facility(3, "facility-3"))
+    assert config.get_config_by_facility_id(3).slug == "facility-3"
+    config.facilityConfigs = [facility(4, "facility-4")]
+    assert config.get_config_by_facility_id(1) is None
+    assert config.get_config_by_facility_slug("facility-4").id == 4
+    config.facilityConfigs[0] = facility(5, "facility-5")
+    assert config.get_config_by_facility_id(4) is None
+    assert config.get_config_by_facility_slug("facility-5").id == 5
+    config.facilityConfigs[:] = [facility(6, "facility-6")]
+    assert config.get_config_by_facility_id(6).slug == "facility-6"
+    # and need invalidating after changing keys in place
+    config.facilityConfigs[0].slug = "renamed"
+    config.invalidate_indexes()
+    assert config.get_config_by_facility_slug("renamed").id == 6
+
+
+def test_config_multi_indexes():
+    refrigeration = RefrigerationConfig(
+        feedKey="feed",
+        blastCells=None,
+        evaporators=[
+            EvaporatorConfig(slug=f"evaporator-{i}", label="", facilityAttributes={"room": str(i % 2)})
+            for i in range(4)
+        ],
+        compressors=[],
+        curtailment=None,
+    )
+    evaporators = refrigeration.get_evaporators_for_facility_attribute("room", "1")
+    assert [e.slug for e in evaporators] == ["evaporator-1", "evaporator-3"]
+    evaporators.clear()
+    assert len(refrigeration.get_evaporators_for_facility_attribute("room", "1")) == 2
+    assert refrigeration.get_evaporators_for_facility_attribute("floor", "1") == []
+    assert refrigeration.get_evaporator_with_slug("evaporator-2").facilityAttributes == {"room": "0"}
+    assert refrigeration.get_blast_cell_with_slug("cell") is None
+
+
+def test_config_binary_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    config = TokenConfig(
+        tokens=[MachineClientConfig(clientId="client", audiences={"audience": "token"})]
+    )
+    filename = str(tmp_path / "tokens.yml")
+    write_config_class_to_file(filename, config, TokenConfig)
+    assert load_config_class_from_file(filename, TokenConfig, cache=True) == config
+    # cached in a directory of the SDK, rather than next to the file
+    assert sorted(os.listdir(tmp_path)) == ["home", "tokens.yml"]
+    (cache_file,) = (tmp_path / "home" / ".contxt" / "cache").iterdir()
+    assert stat.S_IMODE(cache_file.stat().st_mode) == 0o600
+    assert stat.S_IMODE(cache_file.parent.stat().st_mode) == 0o700
+
+    # loaded from the cache while the file is unchanged, even if only touched
+    def fail(*args, **kwargs):
+        raise AssertionError("parsed the YAML file")
+
+    original_load = config_module._load_config_class_from_yaml
+    monkeypatch.setattr(config_module, "_load_config_class_from_yaml", fail)
+    assert load_config_class_from_file(filename, TokenConfig, cache=True) == config
+    os.utime(filename, ns=(0, 0))
+    assert load_config_class_from_file(filename, TokenConfig, cache=True) == config
+    monkeypatch.setattr(config_module, "_load_config_class_from_yaml", original_load)
+
+    config.tokens[0].audiences["audience"] = "changed"
+    write_config_class_to_file(filename, config, TokenConfig)
+    assert load_config_class_from_file(filename, TokenConfig, cache=True) == config
+    # an unreadable cache is replaced
+    cache_file.write_bytes(b"garbage")
+    assert load_config_class_from_file(filename, TokenConfig, cache=True) == config
+
+    # not loaded into a changed class
+    monkeypatch.setattr(config_module, "_load_config_class_from_yaml", fail)
+    monkeypatch.setattr(config_module, "config_class_fingerprint", lambda config_class: "changed")
+    with pytest.raises(AssertionError, match="parsed"):
+        load_config_class_from_file(filename, TokenConfig, cache=True)
+    monkeypatch.setattr(config_module, "_load_config_class_from_yaml", original_load)
+
+    # nor from a directory others can write to
+    cache_file.parent.chmod(0o777)
+    unpickled = []
+    monkeypatch.setattr(config_module.pickle, "load", unpickled.append)
+    assert load_config_class_from_file(filename, TokenConfig, cache=True) == config
+    assert unpickled == []
+
+
+def test_config_class_fingerprint():
+    @dataclass
+    class Child:
+        value: int
+
+    @dataclass
+    class Parent:
+        children: List[Child]
+
+    fingerprint = config_class_fingerprint(Parent)
+    assert fingerprint == config_class_fingerprint(Parent)
+
+    @dataclass  # type: ignore[no-redef]
+    class Child:
+        value: str
+
+    @dataclass  # type: ignore[no-redef]
+    class Parent:
+        children: List[Child]
+
+    assert config_class_fingerprint(Parent) != fingerprint
@@ -1,7 +1,10 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List
 
 import pytest
 
+from contxt.services.pagination import Page, PageMetadata
 from contxt.utils.object_mapper import ObjectMapper
 
 
@@ -25,3 +28,58 @@ def test_load(cls, raw):
 def test_load_and_dump(cls, raw):
     actual = ObjectMapper.dump(ObjectMapper.load(raw, cls))
     assert raw == actual
+
+
+class Color(Enum):
+    RED = "red"
+
+
+@dataclass
+class Bar:
+    foos: List[Foo]
+    colors: Dict[str, Color]
+    children: List["Bar"] = field(default_factory=list)
+
+
+def test_compile_is_cached():
+    assert ObjectMapper.compile(List[Foo]) is ObjectMapper.compile(List[Foo])
+    assert ObjectMapper.compile(List[Foo]) is not ObjectMapper.compile(List[Foo], strict=False)
+
+
+def test_load_nested():
+    raw = {"foos": [{"foo": 1, "bar": 2, "baz": "baz"}], "colors": {"a": "RED", "b": "red"}}
+    bar = ObjectMapper.load({**raw, "children": [raw]}, Bar)
+    assert bar.foos == [Foo(1, 2.0, "baz")]
+    assert bar.colors == {"a": Color.RED, "b": Color.RED}
+    assert bar.children == [Bar(foos=bar.foos, colors=bar.colors)]
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        {"foo": 1, "bar": 4},
+        {"foo": 1, "bar": 4, "baz": "baz", "qux": None},
+        {"foo": 1.5, "bar": 4, "baz": "baz"},
+        [{"foo": 1, "bar": 4, "baz": "baz"}],
+    ],
+)
+def test_load_strict(raw):
+    with pytest.raises((AssertionError, NotImplementedError)):
+        ObjectMapper.load(raw, Foo)
+
+
+def test_load_lenient():
+    foo = ObjectMapper.load({"foo": 1.5, "bar": 4, "baz": "baz", "qux": None}, Foo, strict=False)
+    assert vars(foo) == {"foo": 1.5, "bar": 4, "baz": "baz"}
+
+
+def test_load_shallow():
+    records = [{"id": 1, "nested": {"a": [1, 2]}}]
+    page = ObjectMapper.load({"records": records, "_metadata": {"totalRecords": 1}}, Page, shallow=True)
+    # records are passed through as they are, while the envelope is still validated
+    assert page.records is records
+    assert page._metadata == PageMetadata(totalRecords=1)
+    with pytest.raises(AssertionError):
+        ObjectMapper.load({"records": records, "_metadata": {"totalRecords": "1"}}, Page, shallow=True)
+    with pytest.raises(AssertionError):
+        ObjectMapper.load({"records": {}, "_metadata": {"totalRecords": 1}}, Page, shallow=True)
@@ -0,0 +1,30 @@
+from contxt.utils.controlsim.scheduler import Scheduler
+
+
+def test_scheduler_pops_due_calls_in_deadline_order():
+    now = [0.0]
+    scheduler = Scheduler(clock=lambda: now[0])
+    calls = []
+    for key, delay in [("c", 3), ("a", 1), ("b", 2)]:
+        scheduler.schedule_in(key, delay, lambda key=key: calls.append(key))
+
+    assert scheduler.next_deadline() == 1
+    now[0] = 2.5
+    for call in scheduler.pop_due():
+        call.callback()
+    assert calls == ["a", "b"]
+    assert len(scheduler) == 1 and "c" in scheduler
+
+
+def test_scheduler_replaces_and_cancels_keys():
+    scheduler = Scheduler(clock=lambda: 0.0)
+    scheduler.schedule("a", 5, lambda: None)
+    scheduler.schedule("a", 1, lambda: None)
+    scheduler.schedule("b", 2, lambda: None)
+    assert scheduler.deadline("a") == 1
+
+    assert scheduler.cancel("a")
+    assert not scheduler.cancel("a")
+    assert scheduler.next_deadline() == 2
+    assert [call.key for call in scheduler.pop_due(now=10)] == ["b"]
+    assert scheduler.next_deadline() is None
@@ -0,0 +1,173 @@
+import json
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, List
+
+import pytest
+
+from contxt.models import slotted
+from contxt.utils.serializer import Serializer
+
+NOW = datetime(2021, 1, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+
+
+class Color(Enum):
+    RED = "red"
+
+
+class Custom:
+    def to_dict(self):
+        return "custom"
+
+
+class Query:
+    def _ast(self):
+        return {"query": [Color.RED]}
+
+
+@dataclass
+class Child:
+    at: datetime
+    on: date
+    color: Color
+
+
+@slotted
+@dataclass
+class SlottedChild:
+    at: datetime
+    color: Color
+    _hidden: int = 0
+
+
+@dataclass
+class Parent:
+    name: str
+    children: List[Any] = field(default_factory=list)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    custom: Any = None
+
+    def __post_init__(self):
+        self._hidden = 1
+        self.callback = lambda: None
+
+
+def test_to_dict():
+    parent = Parent(
+        name="parent",
+        children=[Child(NOW, NOW.date(), Color.RED), SlottedChild(NOW, Color.RED), None, (1, 2)],
+        meta={"query": Query(), "at": NOW},
+        custom=Custom(),
+    )
+    expected = {
+        "name": "parent",
+        "children": [
+            {"at": "2021-01-02T03:04:05.000006Z", "on": "2021-01-02", "color": "red"},
+            {"at": "2021-01-02T03:04:05.000006Z", "color": "red"},
+            None,
+            [1, 2],
+        ],
+        "meta": {"query": {"query": ["red"]}, "at": "2021-01-02T03:04:05.000006Z"},
+        "custom": "custom",
+    }
+    # twice, as encoders are compiled on first use
+    assert Serializer.to_dict(parent) == expected
+    assert Serializer.to_dict(parent) == expected
+
+
+def test_to_dict_cls_key():
+    parents = [Parent(name="parent", children=[SlottedChild(NOW, Color.RED)])]
+    d = Serializer.to_dict(parents, cls_key="cls")
+    assert d[0]["cls"] == "Parent"
+    assert d[0]["children"][0]["cls"] == "SlottedChild"
+    assert "cls" not in Serializer.to_dict(Parent(name="parent"))
+
+
+def test_to_dict_key_filter():
+    parent = Parent(name="parent", children=[SlottedChild(NOW, Color.RED)])
+    d = Serializer.to_dict(parent, key_filter=lambda k: k in ("children", "_hidden"))
+    # only applies to the attributes of the object itself
+    assert d == {"_hidden": 1, "children": [{"at": "2021-01-02T03:04:05.000006Z", "color": "red"}]}
+
+
+def test_to_dict_datetime_must_be_utc():
+    with pytest.raises(AssertionError):
+        Serializer.to_dict(NOW.astimezone(timezone(timedelta(hours=2))))
+
+
+def rows(n: int):
+    for i in range(n):
+        yield {"timestamp": NOW, "value": i, **({"extra": i} if i == 5 else {})}
+
+
+def test_write_csv(tmp_path, caplog):
+    path = tmp_path / "out" / "data.csv"
+    assert Serializer.write_csv(rows(10), path, sample_size=3) == 10
+    lines = path.read_text().splitlines()
+    # sampled header, dropping keys first seen later
+    assert lines[0] == "timestamp,value"
+    assert lines[1] == "2021-01-02T03:04:05.000006Z,0"
+    assert len(lines) == 11
+    assert [r.getMessage() for r in caplog.records] == [
+        "Dropping keys ['extra'] of row 5 (and any later ones), not in the columns"
+    ]
+
+    caplog.clear()
+    assert Serializer.write_csv(rows(10), path, fieldnames=["value", "extra"]) == 10
+    assert "Dropping keys ['timestamp'] of row 0" in caplog.records[0].getMessage()
+    assert path.read_text().splitlines()[:7] == ["value,extra", "0,", "1,", "2,", "3,", "4,", "5,5"]
+
+
+def test_write_json(tmp_path):
+    path = tmp_path / "data.json"
+    assert Serializer.write_json(iter([]), path) == 0
+    assert json.loads(path.read_text()) == []
+
+    assert Serializer.write_json((SlottedChild(NOW, Color.RED) for _ in range(3)), path) == 3
+    assert json.loads(path.read_text()) == [{"at": "2021-01-02T03:04:05.000006Z", "color": "red"}] * 3
+
+
+def test_write_csv_memory_is_flat(tmp_path):
+    def peak(n: int) -> int:
+        tracemalloc.start()
+        Serializer.write_csv(rows(n), tmp_path / "data.csv")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak
+
+    peak(100)
+    assert peak(20000) < 2 * peak(1000)
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".feather"])
+def test_write_columnar(tmp_path, suffix):
+    pa = pytest.importorskip("pyarrow")
+    path = tmp_path / f"data{suffix}"
+    values = ({"timestamp": NOW, "value": "n/a" if i == 3 else i, "color": Color.RED} for i in range(25))
+    types = {"timestamp": datetime, "value": float}
+    assert Serializer.write_file(values, path, row_group_size=10, types=types, compression="zstd") == 25
+
+    if suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        assert pq.ParquetFile(path).num_row_groups == 3
+        table = pq.read_table(path)
+    else:
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path)
+    assert table.schema.field("timestamp").type == pa.timestamp("us", tz="UTC")
+    assert table.schema.field("value").type == pa.float64()
+    assert table.column("value").to_pylist()[2:5] == [2.0, None, 4.0]
+    assert set(table.column("color").to_pylist()) == {"red"}
+
+
+def test_to_file_columnar(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "children.parquet"
+    Serializer.to_file([SlottedChild(NOW, Color.RED), SlottedChild(NOW, Color.RED)], path)
+    assert pq.read_table(path).to_pylist() == [{"at": NOW, "color": "red"}] * 2
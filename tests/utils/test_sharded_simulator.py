@@ -0,0 +1,82 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytz
+
+from contxt.utils.controlsim.fake import FakeControlServiceManager, constant_factory
+from contxt.utils.controlsim.models import (
+    DefinitionConfig,
+    SimulatedStateConfig,
+    SimulatedStateRunMode,
+    SimulationConfigs,
+)
+from contxt.utils.controlsim.sharded import HashRing, ShardedSimulator
+
+
+def test_hash_ring_is_stable_and_consistent():
+    keys = [f"component-{i}" for i in range(2000)]
+    ring = HashRing(4)
+    shards = [ring.shard(key) for key in keys]
+
+    assert shards == [HashRing(4).shard(key) for key in keys]
+    assert all(300 < n < 700 for n in Counter(shards).values())
+
+    # adding a shard only moves keys to the new shard
+    grown = HashRing(5)
+    moved = [(a, grown.shard(key)) for a, key in zip(shards, keys) if grown.shard(key) != a]
+    assert moved and all(b == 4 for _, b in moved)
+
+
+def test_sharded_simulator_runs_events_across_processes():
+    config = SimulationConfigs(
+        simulationConfigs=[
+            DefinitionConfig(
+                definitionSlug="curtail",
+                appliesTo="all",
+                simulatedStateConfigs={
+                    "pending": SimulatedStateConfig(
+                        controllable=True, delay=1, workMessage=None, onSuccess="start", onFail=None
+                    ),
+                    "active": SimulatedStateConfig(
+                        controllable=True,
+                        delay=None,
+                        workMessage=None,
+                        onSuccess="finish",
+                        onFail=None,
+                        mode=SimulatedStateRunMode.runUntilEndTime,
+                    ),
+                },
+            )
+        ]
+    )
+    hooks = Counter()
+
+    with FakeControlServiceManager() as manager:
+        control = manager.FakeControlService(
+            {"curtail": {"pending": {"start": "active"}, "active": {"finish": "completed"}}},
+            final_states=["completed"],
+        )
+        now = datetime.now(tz=pytz.UTC)
+        components = [f"component-{i}" for i in range(8)]
+        for slug in components:
+            control.add_event(slug, "curtail", "pending", now, now + timedelta(seconds=5))
+
+        simulator = ShardedSimulator(
+            ["curtail"],
+            simulation_config=config,
+            event_hooks={"active": lambda state, event: hooks.update([event.id])},
+            shards=2,
+            fetch_interval=0.5,
+            min_fetch_interval=0.1,
+            control_service=control,
+            control_service_factory=constant_factory(control),
+            idle_fetch_interval=1.0,
+            hook_interval=0.5,
+        )
+        simulator.run(until=now + timedelta(seconds=7))
+        log = control.get_transition_log()
+
+    assert Counter(r.transition_event for r in log) == {"start": 8, "finish": 8}
+    assert sum(simulator.transitions_by_shard.values()) == 16
+    assert len(simulator.transitions_by_shard) == 2
+    assert simulator.hook_invocations["active"] > 0 and len(hooks) == 8
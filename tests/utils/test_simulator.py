@@ -0,0 +1,121 @@
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from sgqlc.endpoint.http import HTTPEndpoint
+
+from contxt.utils.controlsim.clock import VirtualClock
+from contxt.utils.controlsim.fake import FakeControlApi, FakeControlService
+from contxt.utils.controlsim.models import (
+    DefinitionConfig,
+    SimulatedStateConfig,
+    SimulatedStateRunMode,
+    SimulationConfigs,
+)
+from contxt.utils.controlsim.simulator import Simulator
+
+START = datetime(2021, 6, 1, 12, tzinfo=pytz.UTC)
+END = START + timedelta(hours=4)
+
+SIMULATION_CONFIG = SimulationConfigs(
+    simulationConfigs=[
+        DefinitionConfig(
+            definitionSlug="curtail",
+            appliesTo="all",
+            simulatedStateConfigs={
+                "pending": SimulatedStateConfig(
+                    controllable=True, delay=60, workMessage="Preparing", onSuccess="start", onFail=None
+                ),
+                "active": SimulatedStateConfig(
+                    controllable=True,
+                    delay=None,
+                    workMessage="Curtailing",
+                    onSuccess="finish",
+                    onFail=None,
+                    mode=SimulatedStateRunMode.runUntilEndTime,
+                ),
+            },
+        )
+    ]
+)
+
+TRANSITIONS = {"curtail": {"pending": {"start": "active"}, "active": {"finish": "completed"}}}
+
+
+def test_simulator_fast_forwards_event_lifecycle(capsys):
+    clock = VirtualClock(START)
+    control = FakeControlService(TRANSITIONS, final_states=["completed"], clock=clock)
+    components = [f"component-{i}" for i in range(50)]
+    for slug in components:
+        control.add_event(slug, "curtail", "pending", START, END)
+
+    simulator = Simulator(
+        definitions=["curtail"],
+        simulation_config=SIMULATION_CONFIG,
+        control_service=control,
+        clock=clock,
+    )
+    t0 = time.time()
+    simulator.run(until=END + timedelta(minutes=5))
+    assert time.time() - t0 < 30
+
+    assert len(control.transition_log) == 2 * len(components)
+    assert {(r.transition_event, r.time) for r in control.transition_log} == {
+        ("start", START + timedelta(seconds=60)),
+        ("finish", END),
+    }
+    assert not simulator.events_to_monitor
+    assert simulator.transition_metrics.summary()["lateness_max"] == 0
+    # idle between transitions, so far fewer fetches than polling every 5 s
+    assert control.fetch_count < 4 * 3600 / 5 / 4
+
+
+def test_simulator_hooks_keep_their_cadence_while_idle():
+    clock = VirtualClock(START)
+    control = FakeControlService(TRANSITIONS, final_states=["completed"], clock=clock)
+    control.add_event("component-0", "curtail", "pending", START, END)
+    calls = []
+    hooks = {
+        "active": lambda state, event: calls.append(("active", clock.now())),
+        "_idle_tick": lambda slug: calls.append((slug, clock.now())),
+    }
+
+    simulator = Simulator(
+        definitions=["curtail"],
+        simulation_config=SIMULATION_CONFIG,
+        event_hooks=hooks,
+        components_to_simulate=["component-0", "component-1"],
+        control_service=control,
+        clock=clock,
+    )
+    simulator.run(until=START + timedelta(minutes=10))
+
+    # hooks run every 5 s, although events are only fetched every 30 s while idle
+    active = [t for name, t in calls if name == "active"]
+    idle = [t for name, t in calls if name == "component-1"]
+    assert len(idle) >= 10 * 60 / 5
+    assert len(active) >= (10 * 60 - 120) / 5
+    assert {b - a for a, b in zip(idle, idle[1:])} == {timedelta(seconds=5)}
+    assert control.fetch_count < 10 * 60 / 5 / 2
+
+
+def test_fake_control_api_serves_simulator_operations():
+    control = FakeControlService(TRANSITIONS, final_states=["completed"])
+    event_id = control.add_event("component-0", "curtail", "pending", START, END)
+    api = FakeControlApi(control)
+    endpoint = HTTPEndpoint(api.start())
+    try:
+        events = endpoint("query { edgeControlEvents { nodes { componentslug } } }")
+        transition = (
+            f'transitionControlEvent(input: {{controlEventId: "{event_id}", transitionEvent: "start"}})'
+            " { controlEvent { id } }"
+        )
+        transitions = endpoint(f"mutation {{ m0: {transition} m1: {transition} }}")
+    finally:
+        api.stop()
+
+    assert events["data"]["edgeControlEvents"]["nodes"][0]["componentslug"] == "component-0"
+    assert transitions["data"]["m0"]["controlEvent"]["stateMachine"]["currentState"] == "active"
+    assert transitions["data"]["m1"] is None
+    assert transitions["errors"][0]["path"] == ["m1"]
+    assert api.stats() == {"edgeControlEvents": 1, "transitionControlEvent": 2}
@@ -0,0 +1,34 @@
+import threading
+import time
+
+from contxt.utils.controlsim.workers import KeyedExecutor, TransitionMetrics
+
+
+def test_keyed_executor_orders_calls_per_key():
+    executor = KeyedExecutor(4)
+    calls = {key: [] for key in ("a", "b", "c")}
+    threads = {}
+
+    def call(key, i):
+        time.sleep(0.001)
+        calls[key].append(i)
+        threads.setdefault(key, set()).add(threading.current_thread().name)
+
+    futures = [executor.submit(key, call, key, i) for i in range(20) for key in calls]
+    for future in futures:
+        future.result()
+    executor.shutdown()
+
+    assert all(c == list(range(20)) for c in calls.values())
+    assert all(len(names) == 1 for names in threads.values())
+
+
+def test_transition_metrics_summary():
+    metrics = TransitionMetrics(max_samples=3)
+    for lateness in (0.1, 0.2, 0.3, 0.4):
+        metrics.record(lateness, 0.05)
+
+    summary = metrics.summary()
+    assert summary["count"] == 4
+    assert summary["lateness_max"] == 0.4
+    assert summary["lateness_p50"] == 0.3